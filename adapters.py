@@ -0,0 +1,356 @@
+import json
+import logging
+import math
+from typing import Callable, NamedTuple, Optional
+
+from events import Event, Ignored, MediaInfo, MediaType, Source, Status
+
+# Get logger for this module
+logger = logging.getLogger('adapters')
+
+class Adapter(NamedTuple):
+    """
+    Per-source webhook adapter
+
+    Attributes:
+        name: Display name used in logs and responses
+        decode: Coroutine turning the request into a payload dict
+        normalize: Function turning the payload into an Event (or Ignored)
+        route: Route kind used by the pipeline (search, arr, process)
+        requires: NotifierConfig flag that must be enabled for the source to be processed
+    """
+    name: str
+    decode: Callable
+    normalize: Callable
+    route: str
+    requires: Optional[str] = None
+
+# Source name -> Adapter, populated by @adapter below
+ADAPTERS = {}
+
+def adapter(source, name, decode, route, requires=None):
+    """Register a normalize function as the adapter for a webhook source"""
+    def register(normalize):
+        ADAPTERS[source] = Adapter(name, decode, normalize, route, requires)
+        return normalize
+    return register
+
+async def decode_json(request):
+    return await request.json()
+
+async def decode_plex(request):
+    # Plex sends multipart form data with the JSON in the "payload" field
+    form = await request.form()
+    return json.loads(form.get("payload", "{}"))
+
+def _poster_url(images):
+    """Public poster URL from an *arr images array (the local "url" needs our *arr instance, so only remoteUrl)"""
+    for image in images or ():
+        remote_url = image.get("remoteUrl")
+        if image.get("coverType") == "poster" and remote_url and remote_url.startswith(("http://", "https://")):
+            return remote_url
+    return None
+
+def _plex_ids(metadata):
+    """External ids from Plex's Guid list (e.g. {"id": "tmdb://603"})"""
+    ids = {}
+    for guid in metadata.get("Guid") or ():
+        scheme, _, value = guid.get("id", "").partition("://")
+        if scheme in ("tmdb", "tvdb") and value.isdigit():
+            ids[f"{scheme}_id"] = int(value)
+        elif scheme == "imdb" and value:
+            ids["imdb_id"] = value
+    return ids
+
+def _arr_download_status(data, name, title):
+    """Map an *arr Download event to our status"""
+    # Check if manual interaction is needed
+    if data.get("manualInteraction", False):
+        logger.info(f"Manual interaction required for {title}")
+        return Status.MANUAL_INTERACTION
+    # Map event to our status
+    elif data.get("isUpgrade", False):
+        logger.debug(f"{name} event is an upgrade for {title}")
+        return Status.DOWNLOAD_COMPLETE
+    logger.debug(f"{name} import complete for {title}")
+    return Status.IMPORT_COMPLETE
+
+def _arr_delete_status(data, title):
+    """Map an *arr file delete event to our status"""
+    delete_reason = data.get("deleteReason", "Unknown")
+    logger.info(f"File deletion detected for {title}, reason: {delete_reason}")
+    return Status.MANUAL_INTERACTION if delete_reason == "Manual" else Status.FILE_DELETED
+
+def _arr_manual_interaction(data, title):
+    logger.info(f"Manual interaction required for {title} (Download ID: {data.get('downloadId', 'Unknown')})")
+
+def _arr_other(name, event_type):
+    if event_type == "Test":
+        logger.info(f"{name} test webhook received")
+        return Ignored("Test webhook received")
+    # Handle other event types
+    logger.debug(f"Unhandled {name} event type: {event_type}")
+    return Ignored(f"Event {event_type} not processed")
+
+@adapter("prowlarr", "Prowlarr", decode_json, route="search")
+def normalize_prowlarr(data):
+    # Log the entire webhook structure (with sensitive data redacted)
+    debug_data = str(data)
+    if len(debug_data) > 1000:
+        debug_data = debug_data[:1000] + "... [truncated]"
+    logger.debug(f"Prowlarr webhook raw data: {debug_data}")
+
+    # Check if this is a test event
+    if data.get("eventType") == "Test":
+        logger.info("Prowlarr test webhook received")
+        return Ignored("Test webhook received")
+
+    # Extract relevant information based on Prowlarr's actual webhook structure
+    title = "Unknown"
+    download_type = "torrent"
+    source = data.get("source", "unknown")  # Extract the source (Sonarr, Radarr, Lidarr)
+
+    # Check if this is a release grab event
+    if "release" in data and "releaseTitle" in data["release"]:
+        title = data["release"]["releaseTitle"]
+    elif "download" in data and "title" in data["download"]:
+        # Fallback to download.title if present
+        title = data["download"]["title"]
+
+    # Extract the download type (indexer)
+    if "release" in data and "indexer" in data["release"]:
+        download_type = data["release"]["indexer"]
+    elif "indexer" in data:
+        download_type = data["indexer"]
+
+    logger.info(f"Prowlarr webhook received for: {title}")
+    logger.debug(f"Prowlarr data: download={download_type}, source={source}")
+
+    return Event(Source.PROWLARR, Status.FOUND, title, details={"download_type": download_type, "origin": source})
+
+@adapter("sonarr", "Sonarr", decode_json, route="arr")
+def normalize_sonarr(data):
+    event_type = data.get("eventType", "")
+    series = data.get("series", {})
+    series_title = series.get("title", "Unknown")
+
+    logger.info(f"Sonarr webhook received: {event_type} for {series_title}")
+
+    if event_type in ("Grab", "Download"):
+        # Extract episode details if available
+        episodes = data.get("episodes") or [{}]
+        episode = episodes[0]
+        episode_title = episode.get("title", "")
+        title = f"{series_title} - {episode_title}" if episode_title else series_title
+
+        metadata = MediaInfo(
+            media_type=MediaType.SERIES,
+            season=episode.get("seasonNumber"),
+            episode=episode.get("episodeNumber"),
+            series_title=series_title,
+            episode_title=episode_title,
+            tvdb_id=series.get("tvdbId"),
+            imdb_id=series.get("imdbId") or None,
+            poster_url=_poster_url(series.get("images"))
+        )
+
+        if event_type == "Grab":
+            logger.debug(f"Sonarr grab detected for {title} (Download ID: {data.get('downloadId', 'Unknown')})")
+            return Event(Source.SONARR, Status.DOWNLOAD_STARTED, title, metadata=metadata)
+
+        file_path = data.get("episodeFile", {}).get("path", None)
+        status = _arr_download_status(data, "Sonarr", title)
+        logger.debug(f"File path: {file_path}")
+        return Event(Source.SONARR, status, title, file_path=file_path, metadata=metadata)
+
+    elif event_type == "ManualInteractionRequired":
+        episodes = data.get("episodes", [])
+        episode_title = episodes[0].get("title", "") if episodes else ""
+        title = f"{series_title} - {episode_title}" if episode_title else series_title
+        _arr_manual_interaction(data, title)
+        return Event(Source.SONARR, Status.MANUAL_INTERACTION, title)
+
+    # Handle both EpisodeFileDelete and EpisodeFileDeleted events
+    elif event_type in ("EpisodeFileDelete", "EpisodeFileDeleted"):
+        episode_file = data.get("episodeFile", {})
+        title = f"{series_title} - {episode_file.get('relativePath', 'Unknown Episode')}"
+        status = _arr_delete_status(data, title)
+        return Event(Source.SONARR, status, title, file_path=episode_file.get("path", None))
+
+    return _arr_other("Sonarr", event_type)
+
+@adapter("radarr", "Radarr", decode_json, route="arr")
+def normalize_radarr(data):
+    event_type = data.get("eventType", "")
+    movie = data.get("movie", {})
+    title = movie.get("title", "Unknown")
+
+    logger.info(f"Radarr webhook received: {event_type} for {title}")
+
+    metadata = MediaInfo(
+        media_type=MediaType.MOVIE,
+        year=movie.get("year"),
+        imdb_id=movie.get("imdbId"),
+        tmdb_id=movie.get("tmdbId"),
+        poster_url=_poster_url(movie.get("images"))
+    )
+
+    if event_type == "Grab":
+        logger.debug(f"Radarr grab detected for {title} (Download ID: {data.get('downloadId', 'Unknown')})")
+        return Event(Source.RADARR, Status.DOWNLOAD_STARTED, title, metadata=metadata)
+
+    elif event_type == "Download":
+        file_path = data.get("movieFile", {}).get("path", None)
+        status = _arr_download_status(data, "Radarr", title)
+        logger.debug(f"File path: {file_path}")
+        return Event(Source.RADARR, status, title, file_path=file_path, metadata=metadata)
+
+    elif event_type == "ManualInteractionRequired":
+        _arr_manual_interaction(data, title)
+        return Event(Source.RADARR, Status.MANUAL_INTERACTION, title)
+
+    # Handle both MovieFileDelete and MovieFileDeleted events
+    elif event_type in ("MovieFileDelete", "MovieFileDeleted"):
+        status = _arr_delete_status(data, title)
+        return Event(Source.RADARR, status, title, file_path=data.get("movieFile", {}).get("path", None))
+
+    return _arr_other("Radarr", event_type)
+
+@adapter("lidarr", "Lidarr", decode_json, route="arr")
+def normalize_lidarr(data):
+    event_type = data.get("eventType", "")
+    artist_name = data.get("artist", {}).get("name", "Unknown")
+    albums = data.get("albums", [{}])
+    album = albums[0] if albums else {}
+    album_title = album.get("title", "Unknown")
+    title = f"{artist_name} - {album_title}"
+
+    metadata = MediaInfo(media_type=MediaType.MUSIC, artist=artist_name, album=album_title)
+
+    logger.info(f"Lidarr webhook received: {event_type} for {title}")
+
+    track_files = data.get("trackFiles")
+    first_track_path = track_files[0].get("path", None) if track_files else None
+
+    if event_type == "Grab":
+        logger.debug(f"Lidarr grab detected for {title} (Download ID: {data.get('downloadId', 'Unknown')})")
+        return Event(Source.LIDARR, Status.DOWNLOAD_STARTED, title, metadata=metadata)
+
+    elif event_type == "Download":
+        status = _arr_download_status(data, "Lidarr", title)
+        return Event(Source.LIDARR, status, title, file_path=first_track_path, metadata=metadata)
+
+    elif event_type == "ManualInteractionRequired":
+        _arr_manual_interaction(data, title)
+        return Event(Source.LIDARR, Status.MANUAL_INTERACTION, title)
+
+    # Handle both TrackFileDelete and TrackFileDeleted events
+    elif event_type in ("TrackFileDelete", "TrackFileDeleted"):
+        status = _arr_delete_status(data, title)
+        return Event(Source.LIDARR, status, title, file_path=data.get("trackFile", {}).get("path", None))
+
+    elif event_type == "DownloadFailed":
+        error_message = data.get("message", "Unknown error")
+        logger.info(f"Lidarr download failed for {title} (Download ID: {data.get('downloadId', 'Unknown')}): {error_message}")
+        return Event(Source.LIDARR, Status.DOWNLOAD_FAILED, title)
+
+    elif event_type == "ImportFailed":
+        error_message = data.get("message", "Unknown import error")
+        logger.info(f"Lidarr import failed for {title}: {error_message}")
+        return Event(Source.LIDARR, Status.IMPORT_FAILED, title, file_path=first_track_path)
+
+    return _arr_other("Lidarr", event_type)
+
+def _normalize_process(source, name, data):
+    """Shared normalization for the simple Tdarr/Tapearr payload format"""
+    status = Status.parse(data.get("status", ""))
+    title = data.get("title", "Unknown")
+
+    # Extract media type for topic routing
+    media_type = MediaType.parse(data.get("media_type") or "unknown")
+
+    details = None
+    if status == Status.PROGRESS:
+        # Progress updates can arrive many times a minute, keep them out of the info log
+        try:
+            percent = float(data.get("progress"))
+        except (TypeError, ValueError):
+            percent = None
+        # NaN would pass the clamp unchanged and fail later when the notification is built
+        if percent is None or not math.isfinite(percent):
+            return Ignored(f"{name} progress webhook without a valid progress value")
+        percent = min(max(percent, 0.0), 100.0)
+        logger.debug(f"{name} progress {percent:.1f}% for {title}")
+        details = {"progress": percent}
+    else:
+        logger.info(f"{name} webhook received: {status} for {title} (type: {media_type})")
+
+    return Event(source, status, title, file_path=data.get("file_path", None),
+                 error=data.get("error", None), metadata=MediaInfo(media_type=media_type), details=details)
+
+@adapter("tdarr", "Tdarr", decode_json, route="process", requires="enable_tdarr")
+def normalize_tdarr(data):
+    return _normalize_process(Source.TDARR, "Tdarr", data)
+
+@adapter("tapearr", "Tapearr", decode_json, route="process", requires="enable_tapearr")
+def normalize_tapearr(data):
+    return _normalize_process(Source.TAPEARR, "Tapearr", data)
+
+@adapter("plex", "Plex", decode_plex, route="process")
+def normalize_plex(data):
+    event = data.get("event", "")
+
+    logger.info(f"Plex webhook received: {event}")
+
+    if event != "library.new":
+        return Ignored("Plex webhook processed")
+
+    metadata = data.get("Metadata", {})
+
+    # Extract common fields
+    title = metadata.get("title", "Unknown")
+    # TODO - this might do better using "librarySectionType" to determine media type
+    media_type = metadata.get("type", "unknown")
+
+    # Extract structured metadata based on media type
+    if media_type == "movie":
+        formatted_title = title
+        extracted_metadata = MediaInfo(media_type=MediaType.MOVIE, year=metadata.get("year"), **_plex_ids(metadata))
+
+    elif media_type == "episode":
+        series_title = metadata.get("grandparentTitle", "Unknown Series")
+        formatted_title = f"{series_title} - {title}"
+        extracted_metadata = MediaInfo(
+            media_type=MediaType.SERIES,
+            series_title=series_title,
+            season=metadata.get("parentIndex"),  # Season number
+            episode=metadata.get("index"),       # Episode number
+            episode_title=title
+        )
+
+    elif media_type == "track":
+        artist = metadata.get("grandparentTitle", "Unknown Artist")
+        album = metadata.get("parentTitle", "Unknown Album")
+        formatted_title = f"{artist} - {album} - {title}"
+        extracted_metadata = MediaInfo(media_type=MediaType.MUSIC, artist=artist, album=album, track=title)
+
+    else:
+        # Fallback for other types
+        formatted_title = title
+        extracted_metadata = MediaInfo(media_type=MediaType.parse(media_type))
+
+    # Plex thumbnails are usually paths on the Plex server (which need a token); only public URLs are usable
+    thumb = metadata.get("grandparentThumb" if media_type == "episode" else "thumb") or ""
+    if thumb.startswith(("http://", "https://")):
+        extracted_metadata = extracted_metadata._replace(poster_url=thumb)
+
+    # Extract file path from the first media part that has one
+    parts = (part for media_item in metadata.get("Media", [])
+             for part in media_item.get("Part", []) if "file" in part)
+    first_part = next(parts, None)
+    file_path = first_part.get("file") if first_part else None
+
+    logger.debug(f"Plex new library item: {formatted_title}, file path: {file_path}")
+    logger.debug(f"Extracted metadata: {extracted_metadata}")
+
+    return Event(Source.PLEX, Status.ADDED, formatted_title, file_path=file_path, metadata=extracted_metadata)
@@ -0,0 +1,95 @@
+import logging
+import time
+from collections import OrderedDict
+
+from events import MediaType
+
+# Get logger for this module
+logger = logging.getLogger('artwork')
+
+def link_for(metadata):
+    """Page about the media for the notification's Click action, built from its external ids"""
+    if metadata.imdb_id:
+        return f"https://www.imdb.com/title/{metadata.imdb_id}/"
+    if metadata.media_type == MediaType.MOVIE and metadata.tmdb_id:
+        return f"https://www.themoviedb.org/movie/{metadata.tmdb_id}"
+    if metadata.media_type == MediaType.SERIES and metadata.tvdb_id:
+        return f"https://www.thetvdb.com/dereferrer/series/{metadata.tvdb_id}"
+    return None
+
+def cache_keys(metadata):
+    """Keys a media item's artwork can be found under"""
+    keys = []
+    if metadata.tmdb_id:
+        keys.append(("tmdb", metadata.media_type, metadata.tmdb_id))
+    if metadata.tvdb_id:
+        keys.append(("tvdb", metadata.tvdb_id))
+    if metadata.imdb_id:
+        keys.append(("imdb", metadata.imdb_id))
+    if metadata.media_type == MediaType.SERIES and metadata.series_title:
+        # Plex episodes only carry episode ids, so series artwork is also found by title
+        keys.append(("series", metadata.series_title.lower()))
+    return keys
+
+class ArtworkCache:
+    """
+    Bounded LRU cache of poster URLs with a TTL, keyed by tmdb/tvdb/imdb id (and series title).
+
+    Artwork is learned from the webhooks that carry it (the *arr images arrays) and reused
+    for later events about the same media that don't (further episodes of a season, Plex
+    library events, file deletions), so enrichment never does any I/O of its own.
+
+    Only used from the event loop thread, so no locking is needed.
+    """
+    def __init__(self, max_entries=1000, ttl=86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (poster_url, expires_at)
+
+    def get(self, keys):
+        now = time.monotonic()
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            if entry[1] <= now:
+                del self._entries[key]
+                continue
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        return None
+
+    def put(self, keys, poster_url):
+        expires = time.monotonic() + self.ttl
+        for key in keys:
+            self._entries[key] = (poster_url, expires)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def size(self):
+        return len(self._entries)
+
+    def enrich(self, metadata):
+        """
+        Fill in the poster (from the cache if the event didn't carry one) and the click link
+
+        Returns:
+            MediaInfo, or the same instance if there was nothing to add
+        """
+        if metadata.media_type not in (MediaType.MOVIE, MediaType.SERIES):
+            return metadata
+        keys = cache_keys(metadata)
+        poster_url = metadata.poster_url
+        if poster_url:
+            self.put(keys, poster_url)
+        elif keys:
+            poster_url = self.get(keys)
+        link_url = metadata.link_url or link_for(metadata)
+        if poster_url == metadata.poster_url and link_url == metadata.link_url:
+            return metadata
+        return metadata._replace(poster_url=poster_url, link_url=link_url)
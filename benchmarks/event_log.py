@@ -0,0 +1,118 @@
+"""
+Event log append and recovery benchmark
+
+Appends normalized Tdarr progress events (spread over a few hundred files, with
+some files finishing) to an event log in a temporary directory and reports the
+cost per append. Then measures startup recovery, i.e. reading the log back and
+rebuilding the progress tracker, for growing histories: with snapshots taken
+every --snapshot-events events as the service does, and without any snapshot,
+where every event ever logged has to be replayed. Checks that both rebuild the
+same state as the tracker that saw the events live; exits non-zero if not.
+
+Usage:
+    python benchmarks/event_log.py [--events 12000,123000,321000] [--snapshot-events 5000]
+"""
+import argparse
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from event_log import EventLog, decode_event, encode_event
+from events import Event, MediaInfo, MediaType, Source, Status
+from pipeline import Pipeline
+from progress import ProgressTracker
+
+def make_events(count, seed=1):
+    """Progress events for a rotating set of files, each file ending with a completion"""
+    rng = random.Random(seed)
+    events, active = [], {}
+    for i in range(count):
+        if len(active) < 300:
+            name = f"/media/tv/Show {i}/Episode {i}.mkv"
+            active[name] = 0.0
+        name = rng.choice(list(active))
+        active[name] = min(100.0, active[name] + rng.uniform(0.5, 5.0))
+        metadata = MediaInfo(media_type=MediaType.SERIES, season=1, episode=i % 20 + 1)
+        if active[name] >= 100.0:
+            del active[name]
+            events.append(Event(Source.TDARR, Status.COMPLETE, os.path.basename(name), file_path=name,
+                                metadata=metadata))
+        else:
+            events.append(Event(Source.TDARR, Status.PROGRESS, os.path.basename(name), file_path=name,
+                                metadata=metadata, details={"progress": round(active[name], 1)}))
+    return events
+
+def run_live(directory, events, snapshot_events):
+    """Log and apply events like the service does; returns (tracker, seconds per append)"""
+    log = EventLog(directory)
+    log.recover()
+    pipeline = Pipeline(None, None, progress=ProgressTracker())
+    appended = 0.0
+    for event in events:
+        started = time.perf_counter()
+        log.append(encode_event(event))
+        appended += time.perf_counter() - started
+        pipeline.replay(event, time.time())
+        if snapshot_events and log.pending() >= snapshot_events:
+            log.flush()
+            log.write_snapshot(log.last_seq, {"progress": pipeline.progress.snapshot()})
+    log.close()
+    return pipeline.progress, appended / len(events)
+
+def recover(directory):
+    """Startup recovery; returns (tracker, seconds, events replayed)"""
+    started = time.perf_counter()
+    log = EventLog(directory)
+    snapshot, tail = log.recover()
+    pipeline = Pipeline(None, None, progress=ProgressTracker())
+    if snapshot is not None:
+        pipeline.progress.restore(snapshot["progress"])
+    for timestamp, record in tail:
+        pipeline.replay(decode_event(record), timestamp)
+    elapsed = time.perf_counter() - started
+    log.close()
+    return pipeline.progress, elapsed, len(tail)
+
+def same_state(a, b):
+    """Trackers hold the same files with the same progress (ages differ by the time recovery took)"""
+    return [row[:5] + row[6:] for row in a.snapshot()] == [row[:5] + row[6:] for row in b.snapshot()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", default="12000,123000,321000", help="Comma-separated history lengths")
+    parser.add_argument("--snapshot-events", type=int, default=5000, help="Events between snapshots")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    failed = False
+    print(f"{'events':>8} {'append':>10} {'recover, snapshots':>20} {'replayed':>9} "
+          f"{'recover, no snapshot':>21} {'replayed':>9}")
+    for count in (int(n) for n in args.events.split(",")):
+        events = make_events(count)
+        results = []
+        for snapshot_events in (args.snapshot_events, 0):
+            directory = tempfile.mkdtemp(prefix="mns-event-log-")
+            try:
+                live, append_seconds = run_live(directory, events, snapshot_events)
+                rebuilt, seconds, replayed = recover(directory)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+            if not same_state(live, rebuilt):
+                print(f"FAIL: state rebuilt from {count} events differs from the live state "
+                      f"(snapshots every {snapshot_events or 'never'})")
+                failed = True
+            results.append((append_seconds, seconds, replayed))
+        (append_seconds, with_snapshots, replayed), (_, without, replayed_all) = results
+        print(f"{count:>8} {append_seconds * 1e6:>7.1f} us {with_snapshots * 1000:>17.1f} ms {replayed:>9} "
+              f"{without * 1000:>18.1f} ms {replayed_all:>9}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Logging latency benchmark
+
+Measures how long a logging call takes in the caller's thread while the log file
+is being rotated, for the previous synchronous RotatingFileHandler and for the
+queued pipeline from logging_config, from several threads at once (like delivery
+workers during a busy import night with LOG_LEVEL=DEBUG). Also checks that the
+pipeline's rotated files end up compressed and pruned to the backup count.
+
+--disk-delay adds a sleep to every write flush to stand in for slow storage
+(a busy HDD, network filesystem or SD card), where the difference shows most.
+
+Usage:
+    python benchmarks/logging_latency.py [--records 50000] [--threads 4] [--max-bytes 1048576] [--disk-delay 0.001]
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import logging_config
+
+def _reset_root():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+def slow_disk(handler, delay):
+    """Make every flush of a file handler take `delay` seconds longer"""
+    if delay:
+        flush = handler.flush
+        def slow_flush():
+            time.sleep(delay)
+            flush()
+        handler.flush = slow_flush
+
+def measure(records, threads):
+    """Per-call latencies of logger.debug from `threads` threads, sorted"""
+    logger = logging.getLogger("bench")
+    samples = []
+    lock = threading.Lock()
+
+    def worker(n):
+        local = []
+        for i in range(n):
+            started = time.perf_counter()
+            logger.debug("Processing %s: %s", i, "x" * 150)
+            local.append(time.perf_counter() - started)
+        with lock:
+            samples.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(records // threads,)) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    samples.sort()
+    return samples
+
+def report(name, samples):
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] * 1e6
+    print(f"{name}: p50 {pick(0.5):.1f} us, p99 {pick(0.99):.1f} us, p99.9 {pick(0.999):.1f} us, "
+          f"max {samples[-1] * 1e3:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--max-bytes", type=int, default=1024 * 1024, help="Rotation size")
+    parser.add_argument("--backups", type=int, default=3)
+    parser.add_argument("--disk-delay", type=float, default=0.0, help="Seconds added to every write flush")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Previous setup: rotation and writes in the calling thread
+        _reset_root()
+        handler = RotatingFileHandler(os.path.join(tmp, "sync.log"), maxBytes=args.max_bytes, backupCount=args.backups)
+        handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s:%(lineno)d - %(message)s'))
+        slow_disk(handler, args.disk_delay)
+        logging.getLogger().addHandler(handler)
+        logging.getLogger().setLevel(logging.DEBUG)
+        report("RotatingFileHandler", measure(args.records, args.threads))
+        _reset_root()
+
+        # Queued pipeline (console output silenced so only the file path is compared)
+        log_file = os.path.join(tmp, "queued.log")
+        stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+        try:
+            logging_config.configure_logging("DEBUG", log_file, max_bytes=args.max_bytes, rotate_hours=0,
+                                             backup_count=args.backups, retention_days=0)
+            for handler in logging_config._listener.handlers:
+                if isinstance(handler, logging_config.RotatingLogFileHandler):
+                    slow_disk(handler, args.disk_delay)
+            samples = measure(args.records, args.threads)
+            logging_config._stop_listener()
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        report("queued pipeline    ", samples)
+        _reset_root()
+
+        # Let the maintenance thread finish compressing and pruning
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            rotated = glob.glob(log_file + ".*")
+            if len(rotated) <= args.backups and all(path.endswith(".gz") for path in rotated):
+                break
+            time.sleep(0.1)
+        print(f"Rotated files kept: {sorted(os.path.basename(path) for path in rotated)}")
+        if len(rotated) > args.backups or not all(path.endswith(".gz") for path in rotated):
+            print("FAIL: rotated files were not compressed and pruned")
+            return 1
+    print("OK")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
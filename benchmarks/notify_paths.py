@@ -0,0 +1,226 @@
+"""
+Notifier formatting and routing benchmark
+
+Runs every notify path (send_notification, notify_prowlarr_found, notify_arr_status,
+notify_parallel_process, notify_progress, notify_processing_complete, notify_error,
+notify_companion_file_update) over a fixed corpus of titles, metadata and statuses,
+under several configurations (single/separate topics, headers/JSON publishing,
+Tdarr/Tapearr on/off), with a fake transport that records the requests instead of
+sending them. Reports the time per call for each path.
+
+The recorded requests are reduced to one digest per path and configuration:
+--save writes them to a file and --check compares against one, so a refactoring
+can be verified to produce byte-identical requests. It also checks the title
+formatting rules of format_media_title (movie year, SxxEyy, artist/album kept,
+length bounds) over seeded random titles. Exits non-zero on any difference or
+violated rule.
+
+Usage:
+    python benchmarks/notify_paths.py [--repeat 5] [--save digests.json | --check digests.json]
+"""
+import argparse
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import random
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import load_settings
+from events import MediaInfo, MediaType, Stage, Status
+from notifier import Notifier
+
+class _Response:
+    status_code = 200
+    text = "{}"
+
+class RecordingSession:
+    """Fake transport: records every request a Notifier would send and answers 200"""
+    def __init__(self):
+        self.requests = []
+
+    def post(self, url, data=None, headers=None, auth=None, timeout=None):
+        self.requests.append((url, data, headers, auth))
+        return _Response()
+
+    def digest(self):
+        """Stable digest of everything recorded so far"""
+        h = hashlib.sha256()
+        for url, data, headers, auth in self.requests:
+            h.update(json.dumps([url, data.decode("utf-8") if isinstance(data, bytes) else data,
+                                 sorted(headers.items()), auth], ensure_ascii=False).encode("utf-8"))
+        return h.hexdigest()
+
+CONFIGURATIONS = {
+    "single-headers": {},
+    "separate-headers": {"ntfy_use_separate_topics": True},
+    "separate-json": {"ntfy_use_separate_topics": True, "ntfy_publish_mode": "json"},
+    "stages-headers": {"enable_tdarr": True, "enable_tapearr": True, "ntfy_token": "token"},
+}
+
+TITLES = ["Short", "A" * 70, "The Extremely Long Title Of A Show That Goes On And On Forever",
+          "Artist - Album", "Amélie", "x"]
+METADATA = [
+    None,
+    MediaInfo(media_type=MediaType.SERIES, season=1, episode=2),
+    MediaInfo(media_type=MediaType.SERIES, season="x", episode=2),
+    MediaInfo(media_type=MediaType.SERIES),
+    MediaInfo(media_type=MediaType.MOVIE, year=1999, imdb_id="tt0133093"),
+    MediaInfo(media_type=MediaType.MOVIE),
+    MediaInfo(media_type=MediaType.MUSIC, artist="Artist", album="Album"),
+    MediaInfo(media_type=MediaType.MUSIC, artist="Zed"),
+    MediaInfo(media_type=MediaType.UNKNOWN),
+]
+ARR_STATUSES = [Status.DOWNLOAD_STARTED, Status.IMPORT_COMPLETE, Status.DOWNLOAD_FAILED, Status.FILE_DELETED,
+                Status.MANUAL_INTERACTION]
+PROCESS_STATUSES = [Status.STARTED, Status.COMPLETE, Status.ERROR, Status.ADDED]
+
+def path_calls(notifier):
+    """The corpus: a list of calls per notify path"""
+    calls = {name: [] for name in ("send_notification", "notify_prowlarr_found", "notify_arr_status",
+                                   "notify_parallel_process", "notify_progress", "notify_processing_complete",
+                                   "notify_error", "notify_companion_file_update")}
+    for title in TITLES:
+        calls["send_notification"].append((notifier.send_notification, (title, "Message", "high", ["a", "b"])))
+        for source in ("Sonarr", "radarr", "unknown"):
+            for suffix in ("", ".S01E02.1080p", ".2019.1080p.BluRay", " FLAC album"):
+                calls["notify_prowlarr_found"].append((notifier.notify_prowlarr_found, (title + suffix, "torrent", source)))
+        for metadata in METADATA:
+            for service in ("sonarr", "radarr", "lidarr"):
+                for status in ARR_STATUSES:
+                    calls["notify_arr_status"].append(
+                        (notifier.notify_arr_status, (service, title, status, "/media/file.mkv", metadata)))
+            for process in ("plex", "tdarr", "tapearr"):
+                for status in PROCESS_STATUSES:
+                    calls["notify_parallel_process"].append(
+                        (notifier.notify_parallel_process,
+                         (process, title, status, "boom" if status == Status.ERROR else None, "/media/file.mkv",
+                          metadata, f"{process}-0123456789abcdef")))
+                calls["notify_progress"].append(
+                    (notifier.notify_progress, (process, title, 42.5, f"{process}-0123456789abcdef", None, metadata)))
+            calls["notify_processing_complete"].append(
+                (notifier.notify_processing_complete, (title, None, metadata, "plex")))
+            calls["notify_error"].append(
+                (notifier.notify_error, (title, "Something failed", None, Stage.IMPORT, metadata, "radarr")))
+        for status in ("added", "updated", "deleted", "error"):
+            calls["notify_companion_file_update"].append(
+                (notifier.notify_companion_file_update,
+                 ("subtitle", title, "/media/file.en.srt", status, "sonarr", "boom" if status == "error" else None)))
+    return calls
+
+def run_paths(repeat):
+    """Time every path in every configuration; returns ({path: best seconds per call}, {config/path: digest})"""
+    base = load_settings()
+    timings, digests = {}, {}
+    for config_name, overrides in CONFIGURATIONS.items():
+        # Pin everything the requests depend on, so .env doesn't change the digests
+        fixed = dict(ntfy_server="https://ntfy.example", ntfy_topic="media-processing", ntfy_tv_topic="media-tv",
+                     ntfy_movie_topic="media-movies", ntfy_music_topic="media-music", ntfy_token="", ntfy_user="",
+                     ntfy_pass="", ntfy_publish_mode="headers", enable_tdarr=False, enable_tapearr=False,
+                     ntfy_use_separate_topics=False, enable_artwork=True, quiet_hours="")
+        settings = dataclasses.replace(base, **{**fixed, **overrides})
+        for path, calls in path_calls(Notifier(settings, session=RecordingSession())).items():
+            best = None
+            for i in range(repeat):
+                session = RecordingSession()
+                notifier = Notifier(settings, session=session)
+                bound = [(getattr(notifier, fn.__name__), args) for fn, args in calls]
+                started = time.perf_counter()
+                for fn, args in bound:
+                    fn(*args)
+                elapsed = (time.perf_counter() - started) / len(bound)
+                best = elapsed if best is None else min(best, elapsed)
+                if i == 0:
+                    digests[f"{config_name}/{path}"] = session.digest()
+            timings.setdefault(path, []).append(best)
+    return {path: min(values) for path, values in timings.items()}, digests
+
+def check_title_rules(samples, seed=1):
+    """format_media_title invariants over random titles; returns a list of violations"""
+    rng = random.Random(seed)
+    notifier = Notifier(dataclasses.replace(load_settings(), quiet_hours=""), session=RecordingSession())
+    alphabet = string.ascii_letters + string.digits + " -:'&é"
+    violations = []
+
+    def check(ok, rule, *inputs):
+        if not ok:
+            violations.append(f"{rule}: {inputs!r}")
+
+    for _ in range(samples):
+        title = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 120)))
+        max_length = rng.randint(20, 80)
+
+        result = notifier.format_media_title(title, None, max_length)
+        check(len(result) <= max_length, "plain title fits", title, max_length)
+        check(result == title or len(title) > max_length, "short plain title unchanged", title, max_length)
+
+        year = rng.randint(1920, 2030)
+        result = notifier.format_media_title(title, MediaInfo(media_type=MediaType.MOVIE, year=year), max_length)
+        check(result.endswith(f" ({year})"), "movie keeps its year", title, year, max_length)
+        check(len(result) <= max_length, "movie title fits", title, year, max_length)
+
+        season, episode = rng.randint(0, 99), rng.randint(0, 999)
+        metadata = MediaInfo(media_type=MediaType.SERIES, season=season, episode=episode)
+        result = notifier.format_media_title(title, metadata, max_length)
+        check(f" S{season:02d}E{episode:02d}" in result, "episode keeps SxxEyy", title, season, episode, max_length)
+        check(len(result.rstrip()) <= max_length, "episode title fits", title, season, episode, max_length)
+
+        artist, album = rng.choice(["Radiohead", "Daft Punk", "Sigur Rós"]), rng.choice(["OK Computer", "Discovery"])
+        metadata = MediaInfo(media_type=MediaType.MUSIC, artist=artist, album=album)
+        result = notifier.format_media_title(title, metadata, max_length)
+        check(len(result) <= max_length, "music title fits", title, artist, album, max_length)
+        if artist.lower() not in title.lower():
+            check(result.startswith(artist[:max_length - 3]), "music keeps the artist", title, artist, album, max_length)
+    return violations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per path (the best is reported)")
+    parser.add_argument("--samples", type=int, default=5000, help="Random titles for the formatting rules")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--save", help="Write request digests to this file")
+    group.add_argument("--check", help="Compare request digests with this file")
+    args = parser.parse_args()
+
+    # The notify paths log every call; keep that out of the measurement
+    logging.disable(logging.CRITICAL)
+
+    timings, digests = run_paths(args.repeat)
+    for path, seconds in timings.items():
+        print(f"{path:<30} {seconds * 1e6:8.1f} us/call")
+
+    failed = False
+    violations = check_title_rules(args.samples)
+    for violation in violations[:10]:
+        print(f"  {violation}")
+    if violations:
+        print(f"FAIL: {len(violations)} title formatting rule violations")
+        failed = True
+    else:
+        print(f"Title formatting rules hold for {args.samples} random titles")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(digests, f, indent=2, sort_keys=True)
+        print(f"Saved {len(digests)} request digests to {args.save}")
+    elif args.check:
+        with open(args.check) as f:
+            expected = json.load(f)
+        changed = sorted(key for key in expected.keys() | digests.keys() if expected.get(key) != digests.get(key))
+        for key in changed:
+            print(f"  requests changed: {key}")
+        if changed:
+            print(f"FAIL: {len(changed)} of {len(expected)} path/configuration request digests differ")
+            failed = True
+        else:
+            print(f"Requests identical to {args.check} for all {len(expected)} paths/configurations")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Release name classifier benchmark
+
+Measures the speed of release_parser.parse_release against the substring
+heuristic it replaced over a deterministic, generated corpus of a few thousand
+names following scene/P2P naming conventions (episodes, season packs, daily
+shows, movies, music in its common layouts). The generator builds names from
+the same kinds of tokens the parser looks for, so it is only used for timing.
+
+Accuracy is measured on labelled real-world names: tests/fixtures/release_names.tsv
+by default, or a TSV file given with --corpus whose lines start with
+"<series|movie|music|unknown><TAB>" and end with "<TAB><name>". Exits non-zero
+when accuracy drops below the threshold; tests/test_release_parser.py runs the
+same check on the fixture, plus exact season/episode/year extraction.
+
+Usage:
+    python benchmarks/release_parser.py [--corpus names.tsv] [--size 3000] [--min-accuracy 0.95]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+FIXTURE = os.path.join(ROOT, "tests", "fixtures", "release_names.tsv")
+
+from release_parser import parse_release
+
+TITLE_WORDS = ["The", "Last", "Kingdom", "Dark", "Night", "Blue", "River", "House", "Of", "Dragon", "Silent",
+               "Witness", "Station", "Eleven", "Lost", "City", "Star", "Crossing", "Broken", "Empire", "Winter",
+               "Garden", "Iron", "Heart", "Wild", "Frontier", "Ghost", "Signal", "Little", "Fire", "Ocean",
+               # Words that used to fool substring matching
+               "Album", "Episode", "Season", "Seasons", "Single", "Complete", "Web", "Mp3", "Discography"]
+ARTISTS = ["Radiohead", "Daft Punk", "Massive Attack", "Portishead", "Bjork", "Boards of Canada", "Aphex Twin",
+           "The National", "Arcade Fire", "Beach House", "Sigur Ros", "Bonobo", "Tycho", "Moderat"]
+GROUPS = ["NTb", "FLUX", "SPARKS", "GECKOS", "RARBG", "CMRG", "TEPES", "KOGi", "EDITH", "YTS", "PSA", "ETHEL"]
+RESOLUTIONS = ["480p", "720p", "1080p", "2160p", "1080i"]
+VIDEO_SOURCES = ["BluRay", "Blu-ray", "WEB-DL", "WEBRip", "HDTV", "BDRip", "DVDRip", "REMUX", "AMZN.WEB-DL",
+                 "NF.WEBRip", "DSNP.WEB-DL"]
+CODECS = ["x264", "x265", "H.264", "H264", "HEVC", "AV1", "XviD", "10bit"]
+AUDIO = ["DTS", "DTS-HD.MA.5.1", "TrueHD.Atmos", "DDP5.1", "DD5.1", "AC3", "EAC3", "AAC2.0", "AAC"]
+MUSIC_FORMATS = ["FLAC", "MP3", "MP3 320", "FLAC 24bit", "24-96 FLAC", "ALAC", "V0", "320kbps", "OPUS"]
+
+def _title(rng, words=(1, 4)):
+    return " ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(*words)))
+
+def _join(rng, parts):
+    separator = rng.choice([".", ".", ".", " ", "_"])
+    name = separator.join(p.replace(" ", separator) for p in parts if p)
+    return name.lower() if rng.random() < 0.1 else name
+
+def _video_tail(rng):
+    parts = [rng.choice(RESOLUTIONS) if rng.random() < 0.85 else None,
+             rng.choice(VIDEO_SOURCES) if rng.random() < 0.8 else None,
+             rng.choice(AUDIO) if rng.random() < 0.4 else None,
+             rng.choice(CODECS) if rng.random() < 0.8 else None]
+    if not any(parts):
+        parts[0] = rng.choice(RESOLUTIONS)
+    return parts
+
+def series_name(rng):
+    title = _title(rng)
+    season, episode = rng.randint(1, 25), rng.randint(1, 30)
+    marker = rng.choice([
+        f"S{season:02d}E{episode:02d}", f"S{season:02d}E{episode:02d}E{episode + 1:02d}", f"s{season}e{episode:02d}",
+        f"{season}x{episode:02d}", f"S{season:02d}", f"Season {season}", f"Season.{season}.Complete",
+        f"{rng.randint(2000, 2024)}.{rng.randint(1, 12):02d}.{rng.randint(1, 28):02d}",
+    ])
+    return _join(rng, [title, marker, *_video_tail(rng)]) + f"-{rng.choice(GROUPS)}"
+
+def movie_name(rng):
+    title = _title(rng)
+    year = str(rng.randint(1930, 2024))
+    return _join(rng, [title, year, *_video_tail(rng)]) + f"-{rng.choice(GROUPS)}"
+
+def music_name(rng):
+    artist, album = rng.choice(ARTISTS), _title(rng, (1, 3))
+    year = rng.randint(1970, 2024)
+    fmt = rng.choice(MUSIC_FORMATS)
+    layout = rng.randrange(4)
+    if layout == 0:
+        return f"{artist} - {album} ({year}) [{fmt}]"
+    if layout == 1:
+        return f"{artist.replace(' ', '_')}-{album.replace(' ', '_')}-{rng.choice(['WEB', 'CD', 'Vinyl'])}-{fmt.replace(' ', '-')}-{year}-{rng.choice(GROUPS)}"
+    if layout == 2:
+        return f"{artist} - Discography {year - 20}-{year} {fmt}"
+    return f"{artist} - {album} EP {year} {fmt}"
+
+def generate_corpus(size, seed=1):
+    rng = random.Random(seed)
+    makers = [("series", series_name), ("movie", movie_name), ("music", music_name)]
+    return [(label, make(rng)) for label, make in (makers[i % 3] for i in range(size))]
+
+def load_corpus(path):
+    """(label, name) pairs from a TSV file; the label is the first column and the name the last"""
+    corpus = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                fields = line.rstrip("\n").split("\t")
+                corpus.append((fields[0].strip().lower(), fields[-1]))
+    return corpus
+
+def legacy_classify(title):
+    """The substring heuristic parse_release replaced"""
+    lowered = title.lower()
+    if any(x in lowered for x in ("s01e", "season", "episode")):
+        return "series"
+    if any(x in lowered for x in ("1080p", "720p", "2160p", "bluray", "web-dl")):
+        return "movie"
+    if any(x in lowered for x in ("mp3", "flac", "album", "discography")):
+        return "music"
+    return "unknown"
+
+def timing(name, classify, corpus, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for _, release in corpus:
+            classify(release)
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{name}: {elapsed / len(corpus) * 1e6:.2f} us/name")
+
+def accuracy(name, classify, corpus):
+    correct = Counter()
+    totals = Counter()
+    confusion = Counter()
+    for label, release in corpus:
+        predicted = classify(release)
+        totals[label] += 1
+        if predicted == label:
+            correct[label] += 1
+        else:
+            confusion[(label, predicted)] += 1
+    result = sum(correct.values()) / len(corpus)
+    print(f"{name}: accuracy {result:.1%}")
+    for label in sorted(totals):
+        print(f"  {label:<8} {correct[label]}/{totals[label]}")
+    for (label, predicted), n in confusion.most_common(5):
+        print(f"  {n} {label} classified as {predicted}")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=FIXTURE, help="Labelled TSV file of real release names")
+    parser.add_argument("--size", type=int, default=3000, help="Generated corpus size for timing")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-accuracy", type=float, default=0.95)
+    parser.add_argument("--show-errors", type=int, default=0, help="Print this many misclassified names")
+    args = parser.parse_args()
+
+    def classify(release):
+        return parse_release(release).media_type.value
+
+    generated = generate_corpus(args.size)
+    print(f"Speed, generated corpus: {len(generated)} names")
+    timing("legacy substring matching", legacy_classify, generated, args.repeat)
+    timing("parse_release", classify, generated, args.repeat)
+
+    labelled = load_corpus(args.corpus)
+    print(f"Accuracy, labelled corpus: {len(labelled)} names from {os.path.relpath(args.corpus)}")
+    accuracy("legacy substring matching", legacy_classify, labelled)
+    result = accuracy("parse_release", classify, labelled)
+
+    if args.show_errors:
+        errors = [(label, release) for label, release in labelled if classify(release) != label]
+        for label, release in errors[:args.show_errors]:
+            print(f"  expected {label}, got {classify(release)}: {release}")
+
+    if result < args.min_accuracy:
+        print(f"FAIL: accuracy below {args.min_accuracy:.0%}")
+        return 1
+    print(f"OK: accuracy at least {args.min_accuracy:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
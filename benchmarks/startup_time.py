@@ -0,0 +1,94 @@
+"""
+Startup time benchmark
+
+Measures how long `import main` takes and how long a freshly started server
+needs until /health/live and /health/ready answer. Exits non-zero when the
+time-to-ready exceeds the budget, so it can be used as a regression check.
+
+Usage:
+    python benchmarks/startup_time.py [--runs 5] [--budget 2.0]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _env(port=None):
+    env = dict(os.environ)
+    env["ENABLE_FILE_LOGGING"] = "False"
+    env["LOG_LEVEL"] = "WARNING"
+    if port:
+        env["HOST"] = "127.0.0.1"
+        env["PORT"] = str(port)
+    return env
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _get_status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=0.5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+def measure_import():
+    """Wall time of a fresh interpreter importing the app module"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import main"], cwd=ROOT, env=_env(), check=True)
+    return time.perf_counter() - started
+
+def measure_ready(timeout=30.0):
+    """Seconds until /health/live and /health/ready first return 200"""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=_env(port),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    live = None
+    try:
+        while time.perf_counter() - started < timeout:
+            if live is None and _get_status(f"{base}/health/live") == 200:
+                live = time.perf_counter() - started
+            if live is not None and _get_status(f"{base}/health/ready") == 200:
+                return live, time.perf_counter() - started
+            time.sleep(0.01)
+        raise RuntimeError(f"Server did not become ready within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=2.0, help="Time-to-ready budget in seconds")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    readiness = [measure_ready() for _ in range(args.runs)]
+    live = [r[0] for r in readiness]
+    ready = [r[1] for r in readiness]
+
+    print(f"import main:   median {statistics.median(imports) * 1000:.0f} ms, max {max(imports) * 1000:.0f} ms")
+    print(f"time to live:  median {statistics.median(live) * 1000:.0f} ms, max {max(live) * 1000:.0f} ms")
+    print(f"time to ready: median {statistics.median(ready) * 1000:.0f} ms, max {max(ready) * 1000:.0f} ms")
+
+    if statistics.median(ready) > args.budget:
+        print(f"FAIL: median time to ready exceeds budget of {args.budget:.2f}s")
+        return 1
+    print(f"OK: within budget of {args.budget:.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+State backend benchmark
+
+Measures the per-operation latency of each state backend and the per-event
+overhead of storm suppression (one counter increment plus one read), and checks
+that every backend returns the same results for the same sequence of operations.
+
+Redis is only benchmarked when --redis-url is given (any Redis-compatible server
+works, e.g. a local redis-server or valkey started for the run; needs `pip install redis`).
+
+Usage:
+    python benchmarks/state_backends.py [--ops 20000] [--redis-url redis://localhost:6379/15]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from state import MemoryState, SQLiteState, RedisState
+from suppression import StormSuppressor
+
+def check_semantics(state):
+    """Run a fixed sequence of operations; every backend must produce the same list"""
+    prefix = f"check:{time.time()}:"
+    results = [
+        state.incr(prefix + "a"),
+        state.incr(prefix + "a", 5),
+        state.get(prefix + "a"),
+        state.get(prefix + "missing"),
+        state.incr(prefix + "b", 7, ttl=60),
+        state.get(prefix + "b"),
+        state.pop(prefix + "b"),
+        state.pop(prefix + "b"),
+        state.incr(prefix + "short", ttl=0.05),
+    ]
+    time.sleep(0.1)
+    results.append(state.get(prefix + "short"))
+    results.append(state.incr(prefix + "short", ttl=0.05))
+    return results
+
+def time_op(fn, ops):
+    samples = []
+    for i in range(ops):
+        started = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.99)]
+
+def bench(name, state, ops):
+    keys = [f"bench:{i % 500}" for i in range(ops)]
+    suppressor = StormSuppressor(None, None, state, threshold=1000000, window_seconds=60)
+    results = {
+        "incr": time_op(lambda i: state.incr(keys[i], ttl=120), ops),
+        "get": time_op(lambda i: state.get(keys[i]), ops),
+        "pop": time_op(lambda i: state.pop(keys[i]), ops),
+        "storm event": time_op(lambda i: suppressor._count(f"storm:bench:{i % 500}"), ops),
+    }
+    print(f"{name}:")
+    for op, (mean, p99) in results.items():
+        print(f"  {op:<14} mean {mean * 1e6:8.1f} us   p99 {p99 * 1e6:8.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--redis-url", help="Redis-compatible server to include (data is written under mns:)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [
+            ("memory", MemoryState()),
+            ("sqlite", SQLiteState(f"sqlite:///{os.path.join(tmp, 'state.db')}")),
+        ]
+        if args.redis_url:
+            backends.append(("redis", RedisState(args.redis_url)))
+
+        expected = None
+        for name, state in backends:
+            result = check_semantics(state)
+            if expected is None:
+                expected = result
+            elif result != expected:
+                print(f"FAIL: {name} returned {result}, memory returned {expected}")
+                return 1
+        print(f"Semantics consistent across: {', '.join(name for name, _ in backends)}")
+
+        for name, state in backends:
+            bench(name, state, args.ops)
+            state.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
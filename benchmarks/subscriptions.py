@@ -0,0 +1,128 @@
+"""
+Subscription matcher benchmark
+
+Generates seeded random subscription rules (a few broad ones by priority, media type,
+status, source and stage, then per-person topics subscribed by series or artist, some
+limited to certain statuses or priorities) and random notifications, and times the
+compiled SubscriptionMatcher against checking every rule in turn, for growing numbers
+of rules. Checks that both pick the same topics for every notification; exits non-zero
+if not.
+
+Usage:
+    python benchmarks/subscriptions.py [--rules 10,100,1000,5000,20000] [--notifications 2000]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from events import MediaInfo, MediaType, Source, Stage, Status
+from policy import PRIORITY_LEVELS
+from subscriptions import SubscriptionMatcher, normalize_title, title_keys
+
+SERIES = [f"Series {i}" for i in range(500)]
+ARTISTS = [f"Artist {i}" for i in range(300)]
+MEDIA_TYPES = [MediaType.SERIES, MediaType.MOVIE, MediaType.MUSIC, MediaType.UNKNOWN]
+ARR_STATUSES = [Status.DOWNLOAD_STARTED, Status.IMPORT_COMPLETE, Status.DOWNLOAD_FAILED, Status.IMPORT_FAILED]
+
+def make_rules(count, rng):
+    """What a household writes: a few broad rules, then people subscribing to series and artists"""
+    rules = [
+        {"topic": "admin", "min_priority": "high"},
+        {"topic": "music-errors", "media_type": "music", "status": ["download_failed", "import_failed", "error"]},
+        {"topic": "library", "source": "plex", "stage": "library"},
+    ][:count]
+    for i in range(count - len(rules)):
+        rule = {"topic": f"person-{i % max(1, count // 10)}"}
+        rule["title"] = rng.choice(SERIES) if rng.random() < 0.7 else rng.choice(ARTISTS)
+        if rng.random() < 0.3:
+            rule["status"] = rng.sample([s.value for s in ARR_STATUSES + [Status.ADDED]], rng.randint(1, 3))
+        if rng.random() < 0.2:
+            rule["min_priority"] = rng.choice(list(PRIORITY_LEVELS))
+        rules.append(rule)
+    return rules
+
+def make_notifications(count, rng):
+    """(source, media_type, stage, status, priority, media title, metadata) tuples"""
+    notifications = []
+    for _ in range(count):
+        media_type = rng.choice(MEDIA_TYPES)
+        if media_type == MediaType.SERIES:
+            series = rng.choice(SERIES)
+            title, metadata = f"{series} - Episode", MediaInfo(media_type=media_type, series_title=series)
+        elif media_type == MediaType.MUSIC:
+            artist = rng.choice(ARTISTS)
+            title, metadata = f"{artist} - Album", MediaInfo(media_type=media_type, artist=artist, album="Album")
+        else:
+            title, metadata = f"Movie {rng.randint(0, 999)}", MediaInfo(media_type=media_type)
+        source = rng.choice([Source.SONARR, Source.RADARR, Source.LIDARR, Source.PLEX, Source.TDARR, None])
+        stage = rng.choice([None] + list(Stage))
+        status = rng.choice(ARR_STATUSES + [Status.ADDED, Status.ERROR, None])
+        priority = rng.choice(list(PRIORITY_LEVELS))
+        notifications.append((source, media_type, stage, status, priority, title, metadata))
+    return notifications
+
+def linear_match(rules, source, media_type, stage, status, priority, titles):
+    """Reference implementation: check every rule"""
+    values = {"source": source, "media_type": media_type, "stage": stage, "status": status}
+    topics = []
+    for rule in rules:
+        if PRIORITY_LEVELS[rule.get("min_priority", "min")] > PRIORITY_LEVELS[priority]:
+            continue
+        ok = True
+        for field, value in values.items():
+            wanted = rule.get(field)
+            if wanted is not None:
+                wanted = wanted if isinstance(wanted, list) else [wanted]
+                ok = ok and value is not None and value.lower() in wanted
+        wanted = rule.get("title")
+        if wanted is not None:
+            ok = ok and normalize_title(wanted) in titles
+        if ok and rule["topic"] not in topics:
+            topics.append(rule["topic"])
+    return topics
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rules", default="10,100,1000,5000,20000", help="Comma-separated rule counts")
+    parser.add_argument("--notifications", type=int, default=2000, help="Notifications matched per rule count")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    failed = False
+    print(f"{'rules':>7} {'compile':>10} {'indexed':>12} {'linear scan':>14} {'topics/notification':>20}")
+    for count in (int(n) for n in args.rules.split(",")):
+        rng = random.Random(count)
+        rules = make_rules(count, rng)
+        notifications = [n[:5] + (title_keys(n[5], n[6]),) for n in make_notifications(args.notifications, rng)]
+
+        started = time.perf_counter()
+        matcher = SubscriptionMatcher.compile(rules)
+        compiled = time.perf_counter() - started
+
+        started = time.perf_counter()
+        indexed = [matcher.match(*n) for n in notifications]
+        indexed_seconds = (time.perf_counter() - started) / len(notifications)
+
+        # The scan gets slow at high rule counts; a sample is enough to time it
+        sample = notifications[:max(50, len(notifications) * 100 // count)]
+        started = time.perf_counter()
+        scanned = [linear_match(rules, *n) for n in sample]
+        scan_seconds = (time.perf_counter() - started) / len(sample)
+
+        mismatches = sum(1 for a, b in zip(indexed, scanned) if a != b)
+        if mismatches:
+            print(f"FAIL: {mismatches} of {len(sample)} notifications matched different topics with {count} rules")
+            failed = True
+        fan_out = sum(len(topics) for topics in indexed) / len(indexed)
+        print(f"{count:>7} {compiled * 1000:>7.1f} ms {indexed_seconds * 1e6:>9.1f} us {scan_seconds * 1e6:>11.1f} us "
+              f"{fan_out:>20.1f}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,36 +1,247 @@
 import os
-from dotenv import load_dotenv
+from dataclasses import dataclass
+from dotenv import load_dotenv, dotenv_values
+
+# Snapshot the real process environment before .env is merged in, so a reload
+# can re-read .env without letting it override variables set by systemd/shell
+_BASE_ENV = dict(os.environ)
 
 load_dotenv()
 
+def _get_bool(env, name, default):
+    return env.get(name, default).lower() in ("true", "1", "t", "yes")
+
+@dataclass(frozen=True)
+class Settings:
+    """Immutable snapshot of the service configuration"""
+    # ntfy configuration
+    ntfy_server: str
+    ntfy_topic: str
+    ntfy_token: str
+    ntfy_user: str
+    ntfy_pass: str
+
+    # Topic splitting configuration
+    ntfy_use_separate_topics: bool
+    ntfy_tv_topic: str
+    ntfy_movie_topic: str
+    ntfy_music_topic: str
+    subscriptions_file: str
+
+    # Logging configuration
+    log_level: str
+    log_file: str
+    log_max_bytes: int
+    log_rotate_hours: float
+    log_backup_count: int
+    log_retention_days: float
+    log_compress: bool
+
+    # Service enable/disable flags
+    enable_tdarr: bool
+    enable_tapearr: bool
+    enable_artwork: bool
+    artwork_cache_size: int
+    artwork_cache_ttl: float
+
+    # Database settings
+    database_url: str
+    outbox_enabled: bool
+    outbox_max_entries: int
+    outbox_resend_rate: float
+    history_enabled: bool
+    history_retention_days: int
+    storm_threshold: int
+    storm_window_seconds: float
+    storm_summary_interval: float
+    quiet_hours: str
+    quiet_hours_min_priority: str
+    quiet_hours_topics: str
+    max_body_bytes: int
+    max_body_bytes_per_source: str
+    progress_step_percent: float
+    progress_min_interval: float
+    state_backend: str
+    state_url: str
+    event_log_enabled: bool
+    event_log_dir: str
+    event_log_segment_bytes: int
+    event_log_snapshot_events: int
+
+    # Server settings
+    host: str
+    port: int
+
+    # Admin endpoints (/admin/*) require this bearer token when set
+    admin_token: str
+
+    # Webhook and /notify authentication, rate limiting and browser access
+    webhook_secret: str
+    webhook_secrets: str
+    webhook_rate_limit: int
+    webhook_rate_window: float
+    cors_allow_origins: str
+
+    # Development auto-reload on file changes
+    reload: bool
+
+    # Outbound delivery
+    ntfy_publish_mode: str
+    ntfy_timeout: float
+    delivery_workers: int
+    delivery_queue_size: int
+    shutdown_drain_seconds: float
+    ntfy_max_concurrent_sends: int
+
+    # Health checks
+    ntfy_probe_interval: float
+    health_max_error_rate: float
+    health_max_loop_lag_ms: float
+
+    # Instrumentation
+    slow_handler_threshold_ms: float
+    slow_handler_sample_interval: float
+
+def load_settings(reload_env=False):
+    """
+    Build a Settings snapshot from the environment
+
+    Args:
+        reload_env: Re-read the .env file instead of using the values loaded at startup.
+                    Variables set in the real process environment still take precedence.
+
+    Returns:
+        Settings instance
+    """
+    if reload_env:
+        env = {k: v for k, v in dotenv_values().items() if v is not None}
+        env.update(_BASE_ENV)
+    else:
+        env = os.environ
+
+    log_file = env.get("LOG_FILE", "data/media_notification.log")
+    if not _get_bool(env, "ENABLE_FILE_LOGGING", "True"):
+        log_file = None
+
+    settings = Settings(
+        ntfy_server=env.get("NTFY_SERVER", "https://ntfy.sh"),
+        ntfy_topic=env.get("NTFY_TOPIC", "media-processing"),
+        ntfy_token=env.get("NTFY_TOKEN", ""),  # Token-based auth (preferred)
+        ntfy_user=env.get("NTFY_USER", ""),    # Legacy user/pass auth
+        ntfy_pass=env.get("NTFY_PASS", ""),    # Legacy user/pass auth
+        ntfy_use_separate_topics=_get_bool(env, "NTFY_USE_SEPARATE_TOPICS", "False"),
+        ntfy_tv_topic=env.get("NTFY_TV_TOPIC", "media-tv"),
+        ntfy_movie_topic=env.get("NTFY_MOVIE_TOPIC", "media-movies"),
+        ntfy_music_topic=env.get("NTFY_MUSIC_TOPIC", "media-music"),
+        subscriptions_file=env.get("SUBSCRIPTIONS_FILE", ""),
+        log_level=env.get("LOG_LEVEL", "INFO"),
+        log_file=log_file,
+        log_max_bytes=int(env.get("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+        log_rotate_hours=float(env.get("LOG_ROTATE_HOURS", "24")),
+        log_backup_count=int(env.get("LOG_BACKUP_COUNT", "10")),
+        log_retention_days=float(env.get("LOG_RETENTION_DAYS", "30")),
+        log_compress=_get_bool(env, "LOG_COMPRESS", "True"),
+        enable_tdarr=_get_bool(env, "ENABLE_TDARR", "False"),
+        enable_tapearr=_get_bool(env, "ENABLE_TAPEARR", "False"),
+        enable_artwork=_get_bool(env, "ENABLE_ARTWORK", "True"),
+        artwork_cache_size=int(env.get("ARTWORK_CACHE_SIZE", "1000")),
+        artwork_cache_ttl=float(env.get("ARTWORK_CACHE_TTL", "86400")),
+        database_url=env.get("DATABASE_URL", "sqlite:///./media_tracker.db"),
+        outbox_enabled=_get_bool(env, "OUTBOX_ENABLED", "True"),
+        outbox_max_entries=int(env.get("OUTBOX_MAX_ENTRIES", "10000")),
+        outbox_resend_rate=float(env.get("OUTBOX_RESEND_RATE", "5")),
+        history_enabled=_get_bool(env, "HISTORY_ENABLED", "True"),
+        history_retention_days=int(env.get("HISTORY_RETENTION_DAYS", "30")),
+        storm_threshold=int(env.get("STORM_THRESHOLD", "5")),
+        storm_window_seconds=float(env.get("STORM_WINDOW_SECONDS", "60")),
+        storm_summary_interval=float(env.get("STORM_SUMMARY_INTERVAL", "300")),
+        quiet_hours=env.get("QUIET_HOURS", ""),
+        quiet_hours_min_priority=env.get("QUIET_HOURS_MIN_PRIORITY", "high"),
+        quiet_hours_topics=env.get("QUIET_HOURS_TOPICS", ""),
+        max_body_bytes=int(env.get("MAX_BODY_BYTES", "1048576")),
+        max_body_bytes_per_source=env.get("MAX_BODY_BYTES_PER_SOURCE", "plex=10485760"),
+        progress_step_percent=float(env.get("PROGRESS_STEP_PERCENT", "25")),
+        progress_min_interval=float(env.get("PROGRESS_MIN_INTERVAL", "300")),
+        state_backend=env.get("STATE_BACKEND", "memory"),
+        state_url=env.get("STATE_URL", "") or env.get("DATABASE_URL", "sqlite:///./media_tracker.db"),
+        event_log_enabled=_get_bool(env, "EVENT_LOG_ENABLED", "True"),
+        event_log_dir=env.get("EVENT_LOG_DIR", "data/events"),
+        event_log_segment_bytes=int(env.get("EVENT_LOG_SEGMENT_BYTES", "8388608")),
+        event_log_snapshot_events=int(env.get("EVENT_LOG_SNAPSHOT_EVENTS", "5000")),
+        host=env.get("HOST", "0.0.0.0"),
+        port=int(env.get("PORT", "8000")),
+        admin_token=env.get("ADMIN_TOKEN", ""),
+        webhook_secret=env.get("WEBHOOK_SECRET", ""),
+        webhook_secrets=env.get("WEBHOOK_SECRETS", ""),
+        webhook_rate_limit=int(env.get("WEBHOOK_RATE_LIMIT", "600")),
+        webhook_rate_window=float(env.get("WEBHOOK_RATE_WINDOW", "60")),
+        cors_allow_origins=env.get("CORS_ALLOW_ORIGINS", ""),
+        reload=_get_bool(env, "RELOAD", "False"),
+        ntfy_publish_mode=env.get("NTFY_PUBLISH_MODE", "headers"),
+        ntfy_timeout=float(env.get("NTFY_TIMEOUT", "10")),
+        delivery_workers=int(env.get("DELIVERY_WORKERS", "4")),
+        delivery_queue_size=int(env.get("DELIVERY_QUEUE_SIZE", "1000")),
+        shutdown_drain_seconds=float(env.get("SHUTDOWN_DRAIN_SECONDS", "20")),
+        ntfy_max_concurrent_sends=int(env.get("NTFY_MAX_CONCURRENT_SENDS", "8")),
+        ntfy_probe_interval=float(env.get("NTFY_PROBE_INTERVAL", "30")),
+        health_max_error_rate=float(env.get("HEALTH_MAX_ERROR_RATE", "0.5")),
+        health_max_loop_lag_ms=float(env.get("HEALTH_MAX_LOOP_LAG_MS", "500")),
+        slow_handler_threshold_ms=float(env.get("SLOW_HANDLER_THRESHOLD_MS", "200")),
+        slow_handler_sample_interval=float(env.get("SLOW_HANDLER_SAMPLE_INTERVAL", "60")),
+    )
+    check_settings(settings)
+    return settings
+
+# Numeric settings that must be greater than zero, and ones that can't be negative
+POSITIVE_SETTINGS = ("webhook_rate_window", "storm_window_seconds", "storm_summary_interval", "ntfy_timeout",
+                     "ntfy_max_concurrent_sends", "event_log_snapshot_events", "health_max_loop_lag_ms")
+NON_NEGATIVE_SETTINGS = ("progress_step_percent", "progress_min_interval", "max_body_bytes", "webhook_rate_limit",
+                         "storm_threshold", "outbox_resend_rate", "shutdown_drain_seconds", "health_max_error_rate")
+
+def check_settings(settings):
+    """
+    Reject numeric settings outside their valid range, so a bad value fails the
+    startup or reload instead of a request later on (NaN fails every check)
+
+    Raises:
+        ValueError naming every invalid setting
+    """
+    problems = [f"{name.upper()} must be greater than 0" for name in POSITIVE_SETTINGS
+                if not getattr(settings, name) > 0]
+    problems += [f"{name.upper()} must not be negative" for name in NON_NEGATIVE_SETTINGS
+                 if not getattr(settings, name) >= 0]
+    if problems:
+        raise ValueError("Invalid configuration: " + "; ".join(problems))
+
+# Settings loaded at startup; module-level names are kept for simple readers
+settings = load_settings()
+
 # ntfy configuration
-NTFY_SERVER = os.getenv("NTFY_SERVER", "https://ntfy.sh")
-NTFY_TOPIC = os.getenv("NTFY_TOPIC", "media-processing")
-NTFY_TOKEN = os.getenv("NTFY_TOKEN", "")  # Token-based auth (preferred)
-NTFY_USER = os.getenv("NTFY_USER", "")    # Legacy user/pass auth
-NTFY_PASS = os.getenv("NTFY_PASS", "")    # Legacy user/pass auth
+NTFY_SERVER = settings.ntfy_server
+NTFY_TOPIC = settings.ntfy_topic
+NTFY_TOKEN = settings.ntfy_token
+NTFY_USER = settings.ntfy_user
+NTFY_PASS = settings.ntfy_pass
 
 # Topic splitting configuration
-NTFY_USE_SEPARATE_TOPICS = os.getenv("NTFY_USE_SEPARATE_TOPICS", "False").lower() in ("true", "1", "t", "yes")
-NTFY_TV_TOPIC = os.getenv("NTFY_TV_TOPIC", "media-tv")
-NTFY_MOVIE_TOPIC = os.getenv("NTFY_MOVIE_TOPIC", "media-movies")
-NTFY_MUSIC_TOPIC = os.getenv("NTFY_MUSIC_TOPIC", "media-music")
+NTFY_USE_SEPARATE_TOPICS = settings.ntfy_use_separate_topics
+NTFY_TV_TOPIC = settings.ntfy_tv_topic
+NTFY_MOVIE_TOPIC = settings.ntfy_movie_topic
+NTFY_MUSIC_TOPIC = settings.ntfy_music_topic
 
 # Logging configuration
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-LOG_FILE = os.getenv("LOG_FILE", "data/media_notification.log")
-ENABLE_FILE_LOGGING = os.getenv("ENABLE_FILE_LOGGING", "True").lower() in ("true", "1", "t", "yes")
-
-if not ENABLE_FILE_LOGGING:
-    LOG_FILE = None
+LOG_LEVEL = settings.log_level
+LOG_FILE = settings.log_file
 
 # Service enable/disable flags
-ENABLE_TDARR = os.getenv("ENABLE_TDARR", "False").lower() in ("true", "1", "t", "yes")
-ENABLE_TAPEARR = os.getenv("ENABLE_TAPEARR", "False").lower() in ("true", "1", "t", "yes")
+ENABLE_TDARR = settings.enable_tdarr
+ENABLE_TAPEARR = settings.enable_tapearr
 
 # Database settings
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./media_tracker.db")
+DATABASE_URL = settings.database_url
 
 # Server settings
-HOST = os.getenv("HOST", "0.0.0.0")
-PORT = int(os.getenv("PORT", "8000"))
+HOST = settings.host
+PORT = settings.port
+ADMIN_TOKEN = settings.admin_token
+RELOAD = settings.reload
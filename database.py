@@ -0,0 +1,38 @@
+import logging
+import os
+import sqlite3
+
+# Get logger for this module
+logger = logging.getLogger('database')
+
+def sqlite_path(database_url):
+    """
+    Return the file path of a sqlite:/// database URL
+
+    sqlite:///./media_tracker.db -> ./media_tracker.db
+    sqlite:////var/lib/mns.db    -> /var/lib/mns.db
+    sqlite:///:memory:           -> :memory:
+    """
+    prefix = "sqlite:///"
+    if not database_url.startswith(prefix):
+        raise ValueError(f"Only sqlite:/// database URLs are supported, got: {database_url}")
+    return database_url[len(prefix):]
+
+def connect(database_url):
+    """
+    Open a SQLite connection shared between threads (callers serialize access with their own lock)
+
+    The database uses write-ahead logging so readers (admin queries) don't block
+    the delivery workers writing to it.
+    """
+    path = sqlite_path(database_url)
+    if path != ":memory:":
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    logger.debug(f"Opened database {path}")
+    return conn
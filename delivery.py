@@ -0,0 +1,174 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+# Get logger for this module
+logger = logging.getLogger('delivery')
+
+class DeliveryQueue:
+    """
+    Bounded queue of outbound notification sends processed by background worker threads.
+
+    Webhook handlers submit the notify call and return immediately, so a slow or
+    unreachable ntfy server never blocks the event loop.
+    """
+    def __init__(self, workers=4, max_size=1000):
+        self.workers = workers
+        self.max_size = max_size
+        self._queue = queue.Queue(maxsize=max_size)
+        self._threads = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"delivery-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.debug(f"Delivery queue started with {self.workers} workers (max size: {self.max_size})")
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue a call for execution on a worker thread
+
+        Args:
+            fn: Callable to run (typically a Notifier.notify_* method)
+            *args, **kwargs: Arguments for the callable
+
+        Returns:
+            concurrent.futures.Future resolving to the callable's return value
+
+        Raises:
+            queue.Full: If the queue is at capacity or shutting down
+        """
+        if self._closed:
+            raise queue.Full
+        future = Future()
+        self._queue.put_nowait((future, fn, args, kwargs))
+        return future
+
+    def stop(self, timeout=20.0):
+        """
+        Stop accepting sends and wait up to `timeout` seconds for queued and in-flight sends to finish
+
+        Returns:
+            List of (fn, args, kwargs) calls that were still queued at the deadline (not started)
+        """
+        self._closed = True
+        deadline = time.monotonic() + timeout
+        while self.depth() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            if item is not None:
+                future, fn, args, kwargs = item
+                future.cancel()
+                leftovers.append((fn, args, kwargs))
+
+        # Let idle workers exit; busy ones finish their current send first
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        if leftovers or self._in_flight:
+            logger.warning(f"Delivery queue stopped with {len(leftovers)} queued and {self._in_flight} in-flight sends")
+        else:
+            logger.info("Delivery queue drained")
+        return leftovers
+
+    def depth(self):
+        """Number of sends waiting in the queue or currently executing"""
+        return self._queue.qsize() + self._in_flight
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            future, fn, args, kwargs = item
+            with self._lock:
+                self._in_flight += 1
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except Exception as e:
+                        logger.exception(f"Error in queued delivery {getattr(fn, '__name__', fn)}: {e}")
+                        future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                self._queue.task_done()
+
+@lru_cache(maxsize=256)
+def sink_for(url):
+    """The sink a URL is sent to: its scheme and host (one ntfy server, whatever the topic)"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+class SendLimiter:
+    """
+    Bounds how many sends run at once against each sink (ntfy server).
+
+    Delivery workers, outbox resends and the startup replay all post through this,
+    so a burst can never open more than `max_concurrent` requests to one server.
+    Sends over the limit wait for a slot (never for long: every send holding one is
+    bounded by the ntfy timeout); while they wait, the delivery queue fills and
+    webhooks are rejected with 503, which pushes the backpressure to the senders.
+    """
+    def __init__(self, max_concurrent=8):
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._active = {}
+        self.max_concurrent = None
+        self.configure(max_concurrent)
+
+    def configure(self, max_concurrent):
+        """Change the limit; sends already holding a slot finish under the old one"""
+        with self._lock:
+            max_concurrent = max(1, max_concurrent)
+            if max_concurrent != self.max_concurrent:
+                self.max_concurrent = max_concurrent
+                self._semaphores = {}
+
+    def _semaphore(self, sink):
+        with self._lock:
+            semaphore = self._semaphores.get(sink)
+            if semaphore is None:
+                semaphore = self._semaphores[sink] = threading.BoundedSemaphore(self.max_concurrent)
+            return semaphore
+
+    def run(self, url, fn, *args, **kwargs):
+        """Call fn(*args, **kwargs) once a slot for the URL's sink is free"""
+        sink = sink_for(url)
+        semaphore = self._semaphore(sink)
+        semaphore.acquire()
+        with self._lock:
+            self._active[sink] = self._active.get(sink, 0) + 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active[sink] -= 1
+            semaphore.release()
+
+    def active(self):
+        """Number of sends in progress per sink"""
+        with self._lock:
+            return {sink: count for sink, count in self._active.items() if count}
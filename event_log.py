@@ -0,0 +1,245 @@
+import glob
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+from events import Event, MediaInfo, MediaType, Source, Status
+
+# Get logger for this module
+logger = logging.getLogger('event_log')
+
+# Record header: payload length, CRC32 of (seq, timestamp, payload), sequence number, unix timestamp
+HEADER = struct.Struct("<IIQd")
+SEGMENT_PATTERN = "segment-*.log"
+SNAPSHOT_PATTERN = "snapshot-*.json"
+
+def encode_event(event):
+    """Normalized event as a JSON-serializable dict (None fields left out)"""
+    record = {"source": event.source, "status": event.status, "title": event.title}
+    for name in ("file_path", "error", "details"):
+        value = getattr(event, name)
+        if value is not None:
+            record[name] = value
+    if event.metadata is not None:
+        record["metadata"] = {k: v for k, v in event.metadata._asdict().items() if v is not None}
+    return record
+
+def decode_event(record):
+    """Inverse of encode_event"""
+    metadata = record.get("metadata")
+    if metadata is not None:
+        metadata = MediaInfo(**dict(metadata, media_type=MediaType.parse(metadata.get("media_type", "unknown"))))
+    return Event(
+        source=Source.parse(record["source"]),
+        status=Status.parse(record["status"]),
+        title=record["title"],
+        file_path=record.get("file_path"),
+        error=record.get("error"),
+        metadata=metadata,
+        details=record.get("details"),
+    )
+
+def _sequence_of(path):
+    """Sequence number in a segment-<seq>.log / snapshot-<seq>.json file name"""
+    return int(os.path.basename(path).split("-", 1)[1].split(".", 1)[0])
+
+class _Segment:
+    """One preallocated, memory-mapped log file holding records from `first_seq` on"""
+    def __init__(self, path, size):
+        self.path = path
+        self.first_seq = _sequence_of(path)
+        self._file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        if os.fstat(self._file.fileno()).st_size < size:
+            self._file.truncate(size)
+        self.size = os.fstat(self._file.fileno()).st_size
+        self.map = mmap.mmap(self._file.fileno(), self.size)
+        self.end = 0
+
+    def records(self):
+        """Yield (seq, timestamp, payload bytes) up to the first empty or damaged record, leaving `end` after it"""
+        offset = 0
+        while offset + HEADER.size <= self.size:
+            length, crc, seq, timestamp = HEADER.unpack_from(self.map, offset)
+            start, stop = offset + HEADER.size, offset + HEADER.size + length
+            if length == 0 or stop > self.size:
+                break
+            payload = self.map[start:stop]
+            if zlib.crc32(payload, zlib.crc32(HEADER.pack(0, 0, seq, timestamp)[8:])) != crc:
+                logger.warning(f"Event log {self.path}: damaged record at offset {offset}, ignoring the rest")
+                break
+            offset = stop
+            self.end = offset
+            yield seq, timestamp, payload
+
+    def append(self, seq, timestamp, payload):
+        """Write a record; False if it doesn't fit"""
+        stop = self.end + HEADER.size + len(payload)
+        if stop > self.size:
+            return False
+        crc = zlib.crc32(payload, zlib.crc32(HEADER.pack(0, 0, seq, timestamp)[8:]))
+        self.map[self.end + HEADER.size:stop] = payload
+        # Header last: a record only becomes visible once it is complete
+        HEADER.pack_into(self.map, self.end, len(payload), crc, seq, timestamp)
+        self.end = stop
+        return True
+
+    def flush(self):
+        self.map.flush()
+
+    def close(self, trim=False):
+        self.map.flush()
+        self.map.close()
+        if trim:
+            # A finished segment doesn't need its unused preallocated space
+            self._file.truncate(self.end)
+        self._file.close()
+
+class EventLog:
+    """
+    Append-only log of normalized webhook events, with snapshots, for rebuilding in-memory state.
+
+    Events are appended as CRC-checked records to preallocated, memory-mapped segment
+    files, so an append is a memory copy; the OS writes the pages back, and flush()
+    forces that (called periodically off the event loop). A snapshot stores the
+    state as of a sequence number; after one is written, segments holding only older
+    events are deleted. Recovery loads the newest readable snapshot and returns only
+    the events after it, so startup time depends on the snapshot interval, not on
+    how much history there is.
+
+    Appends happen on the event loop and only copy into the map; flush(), snapshots and
+    compaction run in executor threads, and a lock guards switching segments.
+    """
+    def __init__(self, directory, segment_bytes=8 * 1024 * 1024, keep_snapshots=2):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.keep_snapshots = keep_snapshots
+        self.last_seq = 0
+        self.snapshot_seq = 0
+        self._segment = None
+        self._retired = []
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _segments(self):
+        return sorted(glob.glob(os.path.join(glob.escape(self.directory), SEGMENT_PATTERN)), key=_sequence_of)
+
+    def _snapshots(self):
+        return sorted(glob.glob(os.path.join(glob.escape(self.directory), SNAPSHOT_PATTERN)), key=_sequence_of)
+
+    def recover(self):
+        """
+        Read the log back after a restart and open it for appending
+
+        Returns:
+            (state from the newest snapshot or None, list of (timestamp, record dict) appended after it)
+        """
+        state = None
+        for path in reversed(self._snapshots()):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                state, self.snapshot_seq = snapshot["state"], snapshot["seq"]
+                break
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping unreadable event log snapshot {path}: {e}")
+
+        tail = []
+        self.last_seq = self.snapshot_seq
+        paths = self._segments()
+        for i, path in enumerate(paths):
+            # Skip segments that end before the snapshot without reading them
+            if i + 1 < len(paths) and _sequence_of(paths[i + 1]) <= self.snapshot_seq + 1:
+                continue
+            if not os.path.getsize(path):
+                # Created just before a crash, nothing was written to it
+                os.remove(path)
+                continue
+            segment = _Segment(path, 0)
+            for seq, timestamp, payload in segment.records():
+                if seq > self.snapshot_seq:
+                    tail.append((timestamp, json.loads(payload)))
+                self.last_seq = max(self.last_seq, seq)
+            if i + 1 < len(paths):
+                segment.close()
+            else:
+                # Keep appending to the last segment after its last intact record
+                segment.close()
+                self._segment = _Segment(path, self.segment_bytes)
+                self._segment.end = segment.end
+        logger.info(f"Event log recovered: snapshot at {self.snapshot_seq}, {len(tail)} events to replay")
+        return state, tail
+
+    def append(self, record, timestamp=None):
+        """Append a record (a JSON-serializable dict); returns its sequence number"""
+        payload = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            seq = self.last_seq + 1
+            if self._segment is None or not self._segment.append(seq, timestamp, payload):
+                if self._segment is not None:
+                    # Closed (and trimmed) by the next flush, off the event loop
+                    self._retired.append(self._segment)
+                path = os.path.join(self.directory, f"segment-{seq:020d}.log")
+                self._segment = _Segment(path, max(self.segment_bytes, HEADER.size + len(payload)))
+                self._segment.append(seq, timestamp, payload)
+            self.last_seq = seq
+        return seq
+
+    def pending(self):
+        """Events appended since the last snapshot"""
+        return self.last_seq - self.snapshot_seq
+
+    def flush(self):
+        """Force appended records to disk (blocks on I/O, don't call from the event loop)"""
+        with self._lock:
+            segment, retired, self._retired = self._segment, self._retired, []
+        for finished in retired:
+            finished.close(trim=True)
+        # The current segment is only ever closed by close(), so it can be flushed without the lock
+        if segment is not None:
+            segment.flush()
+
+    def write_snapshot(self, seq, state):
+        """
+        Store `state` as of sequence number `seq` (state must include every event up to it),
+        then delete snapshots and segments no longer needed
+        """
+        self.flush()
+        path = os.path.join(self.directory, f"snapshot-{seq:020d}.json")
+        with self._snapshot_lock:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"seq": seq, "created": time.time(), "state": state}, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            self.snapshot_seq = max(self.snapshot_seq, seq)
+            self._compact()
+
+    def _compact(self):
+        snapshots = self._snapshots()
+        for path in snapshots[:-self.keep_snapshots]:
+            os.remove(path)
+        # Events at or before the oldest kept snapshot are never replayed again
+        oldest = _sequence_of(snapshots[-self.keep_snapshots:][0])
+        with self._lock:
+            current = self._segment.path if self._segment is not None else None
+            paths = self._segments()
+            for path, following in zip(paths, paths[1:]):
+                if path != current and _sequence_of(following) <= oldest + 1:
+                    os.remove(path)
+
+    def segment_count(self):
+        return len(self._segments())
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
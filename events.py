@@ -0,0 +1,115 @@
+import sys
+from enum import Enum
+from typing import NamedTuple, Optional, Union
+
+class _StrEnum(str, Enum):
+    """
+    String-valued enum whose members compare, hash and format like their value,
+    so they can be used anywhere the plain strings were used before.
+    """
+    __str__ = str.__str__
+    __format__ = str.__format__
+
+    @classmethod
+    def parse(cls, value):
+        """Return the member for a value, or the value itself (interned) if it isn't a known member"""
+        member = cls._value2member_map_.get(value)
+        if member is not None:
+            return member
+        return sys.intern(value) if isinstance(value, str) else value
+
+class Source(_StrEnum):
+    PROWLARR = "prowlarr"
+    SONARR = "sonarr"
+    RADARR = "radarr"
+    LIDARR = "lidarr"
+    PLEX = "plex"
+    TDARR = "tdarr"
+    TAPEARR = "tapearr"
+
+class Stage(_StrEnum):
+    SEARCH = "search"         # Prowlarr found the media
+    DOWNLOAD = "download"     # *arr service is downloading
+    IMPORT = "import"         # *arr service has imported
+    LIBRARY = "library"       # Plex has added to library
+    TRANSCODE = "transcode"   # Tdarr is processing (optional)
+    BACKUP = "backup"         # Tapearr is backing up (optional)
+    DELETED = "deleted"       # Special stage for deleted files (step 0)
+
+class Status(_StrEnum):
+    # Prowlarr
+    FOUND = "found"
+    # *arr services
+    MANUAL_INTERACTION = "manual_interaction"
+    DOWNLOAD_STARTED = "download_started"
+    DOWNLOAD_COMPLETE = "download_complete"
+    IMPORT_COMPLETE = "import_complete"
+    DOWNLOAD_FAILED = "download_failed"
+    IMPORT_FAILED = "import_failed"
+    FILE_DELETED = "file_deleted"
+    # Plex, Tdarr, Tapearr
+    ADDED = "added"
+    STARTED = "started"
+    COMPLETE = "complete"
+    ERROR = "error"
+    PROGRESS = "progress"     # Tdarr, Tapearr percentage updates
+
+class MediaType(_StrEnum):
+    SERIES = "series"
+    MOVIE = "movie"
+    MUSIC = "music"
+    UNKNOWN = "unknown"
+
+# Default media type for sources that only handle one kind of media
+SOURCE_MEDIA_TYPES = {
+    Source.SONARR: MediaType.SERIES,
+    Source.RADARR: MediaType.MOVIE,
+    Source.LIDARR: MediaType.MUSIC
+}
+
+class MediaInfo(NamedTuple):
+    """
+    Media metadata used for title formatting and topic routing.
+
+    A NamedTuple keeps this immutable and free of a per-instance __dict__; use
+    _replace() to derive a modified copy.
+    """
+    media_type: Union[MediaType, str] = MediaType.UNKNOWN
+    year: Optional[int] = None
+    season: Optional[int] = None
+    episode: Optional[int] = None
+    series_title: Optional[str] = None
+    episode_title: Optional[str] = None
+    artist: Optional[str] = None
+    album: Optional[str] = None
+    track: Optional[str] = None
+    tmdb_id: Optional[int] = None
+    imdb_id: Optional[str] = None
+    tvdb_id: Optional[int] = None
+    poster_url: Optional[str] = None  # Public artwork URL (ntfy Attach)
+    link_url: Optional[str] = None    # Page about the media (ntfy Click)
+
+class Event(NamedTuple):
+    """
+    Normalized webhook event passed through the pipeline
+
+    Attributes:
+        source: Webhook source
+        status: Normalized status (a Status member, or the raw string for unknown statuses)
+        title: Media title as it should appear in the notification
+        file_path: Path to the media file, if known
+        error: Error message reported by the source, if any
+        metadata: Media metadata used for formatting and topic routing
+        details: Source-specific values that aren't media metadata (indexer, origin app, ...)
+    """
+    source: Source
+    status: Union[Status, str]
+    title: str
+    file_path: Optional[str] = None
+    error: Optional[str] = None
+    metadata: Optional[MediaInfo] = None
+    details: Optional[dict] = None
+
+class Ignored(NamedTuple):
+    """Returned by an adapter when a webhook is valid but produces no notification"""
+    message: str
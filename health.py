@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+# Get logger for this module
+logger = logging.getLogger('health')
+
+class SendStats:
+    """
+    Rolling counts of notification send outcomes.
+
+    Outcomes are aggregated into fixed time buckets so recording is O(1) and
+    computing the recent error rate only touches a handful of counters.
+    """
+    def __init__(self, window_seconds=300, bucket_seconds=10):
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = max(1, window_seconds // bucket_seconds)
+        # Each bucket is [bucket_id, sent, failed]
+        self._buckets = [[-1, 0, 0] for _ in range(self.num_buckets)]
+        self._lock = threading.Lock()
+        self.last_success = None
+        self.last_failure = None
+        self.consecutive_failures = 0
+
+    def record(self, ok):
+        now = time.time()
+        bucket_id = int(now // self.bucket_seconds)
+        with self._lock:
+            bucket = self._buckets[bucket_id % self.num_buckets]
+            if bucket[0] != bucket_id:
+                bucket[0], bucket[1], bucket[2] = bucket_id, 0, 0
+            bucket[1] += 1
+            if ok:
+                self.last_success = now
+                self.consecutive_failures = 0
+            else:
+                bucket[2] += 1
+                self.last_failure = now
+                self.consecutive_failures += 1
+
+    def totals(self):
+        """Return (sent, failed) over the rolling window"""
+        oldest = int(time.time() // self.bucket_seconds) - self.num_buckets + 1
+        sent = failed = 0
+        with self._lock:
+            for bucket_id, bucket_sent, bucket_failed in self._buckets:
+                if bucket_id >= oldest:
+                    sent += bucket_sent
+                    failed += bucket_failed
+        return sent, failed
+
+    def error_rate(self):
+        sent, failed = self.totals()
+        return failed / sent if sent else 0.0
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag by scheduling a periodic sleep and recording how late it wakes up.
+    """
+    def __init__(self, interval=0.5, history=120):
+        self.interval = interval
+        self.current_ms = 0.0
+        self._samples = deque(maxlen=history)
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def max_recent_ms(self):
+        return max(self._samples, default=0.0)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            self.current_ms = lag_ms
+            self._samples.append(lag_ms)
+
+class NtfyProbe:
+    """
+    Periodically checks that the ntfy server is reachable and caches the result,
+    so health requests never trigger outbound traffic themselves.
+    """
+    def __init__(self, notifier, interval=30, timeout=5):
+        self.notifier = notifier
+        self.interval = interval
+        self.timeout = timeout
+        self.reachable = None  # Unknown until the first probe completes
+        self.latency_ms = None
+        self.checked_at = None
+        self.error = None
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def probe_once(self):
+        """Run a single blocking probe against the ntfy health endpoint"""
+        url = f"{self.notifier.config.server}/v1/health"
+        started = time.perf_counter()
+        try:
+            response = self.notifier.get_session().get(url, timeout=self.timeout)
+            reachable = response.status_code == 200
+            self.error = None if reachable else f"HTTP {response.status_code}"
+        except Exception as e:
+            reachable = False
+            self.error = str(e)
+        self.latency_ms = (time.perf_counter() - started) * 1000
+        self.checked_at = time.time()
+        if reachable != self.reachable:
+            if reachable:
+                logger.info(f"ntfy server reachable ({self.latency_ms:.0f} ms)")
+            else:
+                logger.warning(f"ntfy server unreachable: {self.error}")
+        self.reachable = reachable
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await loop.run_in_executor(None, self.probe_once)
+            await asyncio.sleep(self.interval)
+
+    def as_dict(self):
+        return {
+            "reachable": self.reachable,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "checked_at": self.checked_at,
+            "error": self.error
+        }
+
+def systemd_notify(message):
+    """
+    Send a state notification (e.g. "READY=1", "WATCHDOG=1") to systemd.
+    No-op when not running under systemd with NOTIFY_SOCKET set.
+    """
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address.startswith("@"):
+        address = "\0" + address[1:]  # Abstract namespace socket
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(message.encode(), address)
+        return True
+    except OSError as e:
+        logger.debug(f"systemd notify failed: {e}")
+        return False
+
+def watchdog_interval():
+    """Seconds between watchdog pings requested by systemd (WatchdogSec), or None if disabled"""
+    usec = os.environ.get("WATCHDOG_USEC")
+    if not usec or not usec.isdigit():
+        return None
+    # Ping at half the timeout as recommended by sd_watchdog_enabled(3)
+    return int(usec) / 1_000_000 / 2
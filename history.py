@@ -0,0 +1,188 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from database import connect
+
+# Get logger for this module
+logger = logging.getLogger('history')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    topic TEXT NOT NULL,
+    source TEXT,
+    title TEXT,
+    message TEXT,
+    priority TEXT,
+    delivered INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_created ON history (created);
+CREATE INDEX IF NOT EXISTS history_topic ON history (topic, id);
+CREATE INDEX IF NOT EXISTS history_source ON history (source, id);
+"""
+
+# Full-text index over title and message, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(title, message, content='history', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts (rowid, title, message) VALUES (new.id, new.title, new.message);
+END;
+CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts (history_fts, rowid, title, message) VALUES ('delete', old.id, old.title, old.message);
+END;
+"""
+
+INSERT = ("INSERT INTO history (created, topic, source, title, message, priority, delivered) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+class History:
+    """
+    Append-only store of every notification sent, queryable through the admin API.
+
+    Recording only puts a tuple on an in-memory queue; a writer thread inserts them
+    in batches (one transaction per batch) and prunes rows older than the retention
+    period, so the delivery path never waits on the database.
+    """
+    def __init__(self, database_url, retention_days=30, batch_size=500, flush_interval=1.0, max_pending=10000):
+        self.database_url = database_url
+        self.retention_seconds = retention_days * 86400
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.full_text = False
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._reader = None
+        self._reader_lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def start(self):
+        """Start the writer thread (idempotent)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Flush pending rows and stop the writer thread"""
+        if self._thread is not None:
+            self._pending.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def record(self, request, delivered):
+        """
+        Queue a sent notification for storage
+
+        Args:
+            request: NtfyRequest that was sent
+            delivered: Whether ntfy accepted it
+        """
+        try:
+            self._pending.put_nowait((time.time(), request.topic, request.source, request.title,
+                                      request.message, request.priority, int(delivered)))
+        except queue.Full:
+            # Never block delivery on the history store
+            self.dropped += 1
+
+    def _open(self):
+        conn = connect(self.database_url)
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite FTS5 not available, history title search will scan rows: {e}")
+        return conn
+
+    def _run(self):
+        conn = self._open()
+        self._ready.set()
+        last_prune = 0.0
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                item = self._pending.get(timeout=self.flush_interval)
+                while item is not None:
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    item = self._pending.get_nowait()
+                stopping = item is None
+            except queue.Empty:
+                pass
+            try:
+                if batch:
+                    with conn:
+                        conn.executemany(INSERT, batch)
+                now = time.monotonic()
+                if self.retention_seconds and now - last_prune > 3600:
+                    last_prune = now
+                    self._prune(conn)
+            except Exception as e:
+                logger.exception(f"Could not write notification history: {e}")
+        conn.close()
+
+    def _prune(self, conn):
+        cutoff = time.time() - self.retention_seconds
+        with conn:
+            deleted = conn.execute("DELETE FROM history WHERE created < ?", (cutoff,)).rowcount
+        if deleted:
+            logger.info(f"Pruned {deleted} history rows older than {self.retention_seconds // 86400} days")
+
+    def query(self, q=None, source=None, topic=None, since=None, until=None, delivered=None, cursor=None, limit=50):
+        """
+        Query stored notifications, newest first
+
+        Args:
+            q: Text to search for in the title or message
+            source, topic: Exact filters
+            since, until: Unix timestamp range
+            delivered: Only delivered (True) or failed (False) notifications
+            cursor: next_cursor from the previous page
+            limit: Page size
+
+        Returns:
+            Dict with "entries" and "next_cursor" (None on the last page)
+        """
+        if not self._ready.wait(5):
+            raise RuntimeError("History store is not available")
+        clauses, params = [], []
+        if q:
+            if self.full_text:
+                clauses.append("h.id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?)")
+                params.append('"' + q.replace('"', '""') + '"')
+            else:
+                clauses.append("(h.title LIKE ? OR h.message LIKE ?)")
+                params.extend([f"%{q}%"] * 2)
+        for column, value in (("source", source and source.lower()), ("topic", topic)):
+            if value:
+                clauses.append(f"h.{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("h.created >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("h.created < ?")
+            params.append(until)
+        if delivered is not None:
+            clauses.append("h.delivered = ?")
+            params.append(int(delivered))
+        if cursor is not None:
+            clauses.append("h.id < ?")
+            params.append(cursor)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+
+        with self._reader_lock:
+            if self._reader is None:
+                self._reader = connect(self.database_url)
+            rows = self._reader.execute(
+                f"SELECT h.* FROM history h{where} ORDER BY h.id DESC LIMIT ?", params + [limit]
+            ).fetchall()
+        entries = [{**dict(row), "delivered": bool(row["delivered"])} for row in rows]
+        next_cursor = entries[-1]["id"] if len(entries) == limit else None
+        return {"entries": entries, "next_cursor": next_cursor}
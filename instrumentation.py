@@ -0,0 +1,181 @@
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+# Get logger for this module
+logger = logging.getLogger('instrumentation')
+
+# Histogram bucket upper bounds in seconds (Prometheus style, +Inf implied)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def endpoint_for_source(webhook_source):
+    """Map a Notifier webhook_source to the endpoint that received it"""
+    return f"/webhook/{webhook_source.lower()}" if webhook_source else "/notify"
+
+class DurationStats:
+    """Count, sum, max and a fixed-bucket histogram of durations"""
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def quantile(self, q):
+        """Approximate quantile: the upper bound of the bucket containing it"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 2),
+            "p50_ms": round(self.quantile(0.5) * 1000, 2),
+            "p95_ms": round(self.quantile(0.95) * 1000, 2),
+            "p99_ms": round(self.quantile(0.99) * 1000, 2)
+        }
+
+class PhaseTimings:
+    """
+    Per-endpoint handler durations split into phases:
+        parse  - time spent on the event loop decoding and handling the request
+        format - building the notification (topic, title, headers) on a delivery worker
+        send   - the HTTP request to ntfy
+    """
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, phase, seconds):
+        key = (endpoint, phase)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = DurationStats()
+            stats.add(seconds)
+
+    def items(self):
+        with self._lock:
+            return sorted(self._stats.items())
+
+    def as_dict(self):
+        result = {}
+        for (endpoint, phase), stats in self.items():
+            result.setdefault(endpoint, {})[phase] = stats.as_dict()
+        return result
+
+class BlockedLoopDetector:
+    """
+    Watches the event loop from a separate thread and logs the loop thread's stack
+    when it stops responding for longer than the threshold.
+
+    The loop updates a heartbeat on every tick; the watcher thread only reads it,
+    so the overhead on the loop is one timer callback per interval.
+    """
+    def __init__(self, threshold_ms=200, sample_interval=60, history=20):
+        self.threshold = threshold_ms / 1000
+        self.sample_interval = sample_interval
+        self.check_interval = max(self.threshold / 4, 0.01)
+        self.blocked_count = 0
+        self.current_request = None  # Path of the request being handled on the loop, if any
+        self.samples = deque(maxlen=history)
+        self._heartbeat = time.monotonic()
+        self._loop = None
+        self._loop_thread_id = None
+        self._last_sample = 0.0
+        self._stopped = threading.Event()
+
+    def start(self, loop):
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._schedule_heartbeat()
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _schedule_heartbeat(self):
+        self._heartbeat = time.monotonic()
+        if not self._stopped.is_set():
+            self._loop.call_later(self.check_interval, self._schedule_heartbeat)
+
+    def _watch(self):
+        stalled_since = None
+        while not self._stopped.wait(self.check_interval):
+            stall = time.monotonic() - self._heartbeat - self.check_interval
+            if stall < self.threshold:
+                stalled_since = None
+                continue
+            if stalled_since == self._heartbeat:
+                continue  # Already counted this stall
+            stalled_since = self._heartbeat
+            self.blocked_count += 1
+            self._sample_stack(stall)
+
+    def _sample_stack(self, stall):
+        now = time.time()
+        if now - self._last_sample < self.sample_interval:
+            return
+        self._last_sample = now
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>"
+        request = self.current_request
+        self.samples.append({
+            "timestamp": now,
+            "blocked_ms": round(stall * 1000, 1),
+            "request": request,
+            "stack": stack
+        })
+        logger.warning(f"Event loop blocked for {stall * 1000:.0f} ms "
+                       f"(request: {request or 'none'}), loop thread stack:\n{stack}")
+
+# Shared timings recorded by the HTTP middleware and the Notifier
+timings = PhaseTimings()
+
+def render_prometheus(metrics):
+    """
+    Render phase timings and extra metrics in the Prometheus text exposition format
+
+    Args:
+        metrics: Dict of metric name -> (help text, value); names ending in _total are
+                 counters (only ever increase), the rest gauges
+    """
+    lines = [
+        "# HELP mns_phase_duration_seconds Handler duration by endpoint and phase",
+        "# TYPE mns_phase_duration_seconds histogram"
+    ]
+    for (endpoint, phase), stats in timings.items():
+        labels = f'endpoint="{endpoint}",phase="{phase}"'
+        cumulative = 0
+        for bound, n in zip(BUCKETS, stats.buckets):
+            cumulative += n
+            lines.append(f'mns_phase_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'mns_phase_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+        lines.append(f"mns_phase_duration_seconds_sum{{{labels}}} {stats.total}")
+        lines.append(f"mns_phase_duration_seconds_count{{{labels}}} {stats.count}")
+    for name, (help_text, value) in metrics.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
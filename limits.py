@@ -0,0 +1,83 @@
+import logging
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+# Get logger for this module
+logger = logging.getLogger('limits')
+
+class BodyLimits:
+    """Maximum request body size per path, with a default for everything else"""
+    def __init__(self, default, per_source=""):
+        self.configure(default, per_source)
+
+    def configure(self, default, per_source=""):
+        self.apply(self.parse(default, per_source))
+
+    @staticmethod
+    def parse(default, per_source=""):
+        """
+        Args:
+            default: Maximum body size in bytes (0 for no limit)
+            per_source: Comma-separated webhook source overrides, e.g. "plex=10485760"
+
+        Returns:
+            Limits table for apply(); raises ValueError on an invalid rule
+        """
+        paths = {}
+        for rule in filter(None, (r.strip() for r in per_source.split(","))):
+            source, sep, size = rule.partition("=")
+            if not sep or not size.strip().isdigit():
+                raise ValueError(f"Invalid body size limit '{rule}', expected source=bytes")
+            paths[f"/webhook/{source.strip().lower()}"] = int(size)
+        return (default, paths)
+
+    def apply(self, limits):
+        """Swap in a table from parse(); one assignment, so a reload is atomic for requests in flight"""
+        self._limits = limits
+
+    def for_path(self, path):
+        default, paths = self._limits
+        return paths.get(path, default)
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware rejecting request bodies over the configured size with 413.
+
+    A declared Content-Length over the limit is rejected before any of the body is
+    read; otherwise the body is counted as it streams in and the request fails as
+    soon as the limit is crossed, so an oversized body is never buffered whole.
+    """
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            return await self.app(scope, receive, send)
+        path = scope["path"]
+        limit = self.limits.for_path(path)
+        if not limit:
+            return await self.app(scope, receive, send)
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > limit:
+                    logger.warning(f"Rejected {path} request with Content-Length {int(value)} (limit {limit})")
+                    response = JSONResponse(status_code=413, content={"detail": f"Request body exceeds {limit} bytes"})
+                    return await response(scope, receive, send)
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    logger.warning(f"Rejected {path} request, body exceeded {limit} bytes while streaming")
+                    raise HTTPException(status_code=413, detail=f"Request body exceeds {limit} bytes")
+            return message
+
+        await self.app(scope, limited_receive, send)
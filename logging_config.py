@@ -1,15 +1,180 @@
+import atexit
+import glob
+import gzip
 import logging
 import os
+import queue
+import re
+import shutil
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
 
-def configure_logging(log_level=None, log_file=None):
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread without ever waiting.
+    If the queue is full the record is dropped and counted; a warning with the
+    count is queued as soon as there is room again.
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            if self.dropped:
+                self.queue.put_nowait(logging.LogRecord(
+                    "logging", logging.WARNING, __file__, 0,
+                    f"{self.dropped} log records dropped, the logging queue was full", None, None
+                ))
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class _LogMaintenance:
+    """Background thread that compresses rotated log files and deletes expired ones"""
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._thread = None
+
+    def submit(self, fn, *args):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-maintenance", daemon=True)
+            self._thread.start()
+        self._jobs.put((fn, args))
+
+    def _run(self):
+        while True:
+            fn, args = self._jobs.get()
+            try:
+                fn(*args)
+            except Exception as e:
+                # Logging from here could recurse into the handler that scheduled the job
+                print(f"Log maintenance failed: {e}", file=sys.stderr)
+
+_maintenance = _LogMaintenance()
+
+class RedactTokenFilter(logging.Filter):
+    """
+    Masks the value of `token` query parameters in access log records, so webhook secrets
+    passed in the URL (?token=<secret>) aren't written to the log.
+    uvicorn's access records carry the request path with its query string as an argument.
+    """
+    _TOKEN = re.compile(r"([?&]token=)[^&\s]*", re.IGNORECASE)
+
+    def filter(self, record):
+        if isinstance(record.args, tuple) and any(isinstance(a, str) and "token=" in a.lower() for a in record.args):
+            record.args = tuple(self._TOKEN.sub(r"\1***", a) if isinstance(a, str) else a for a in record.args)
+        return True
+
+def redact_access_log_tokens(logger_name="uvicorn.access"):
+    """Install RedactTokenFilter on the access logger (once; safe to call again)"""
+    access_logger = logging.getLogger(logger_name)
+    if not any(isinstance(f, RedactTokenFilter) for f in access_logger.filters):
+        access_logger.addFilter(RedactTokenFilter())
+
+class RotatingLogFileHandler(logging.FileHandler):
+    """
+    Log file rotated by size and/or time, with rotated files gzipped and pruned in the background.
+
+    Rotated files are renamed to "<file>.<YYYYmmdd-HHMMSS>" (so nothing needs to be renumbered),
+    then compressed to "<file>.<timestamp>.gz" and pruned to `backup_count` files and
+    `retention_days` days by the log maintenance thread. Only the rename happens in emit().
+    """
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, rotate_hours=24, backup_count=10,
+                 retention_days=30, compress=True):
+        super().__init__(filename, encoding="utf-8")
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_hours * 3600
+        self.backup_count = backup_count
+        self.retention_days = retention_days
+        self.compress = compress
+        # A file left over from an earlier period is rotated by the first record
+        self._rollover_at = self._next_rollover(os.path.getmtime(self.baseFilename))
+        # Finish compressing/pruning whatever a previous run left behind
+        _maintenance.submit(self._maintain, None)
+
+    def _next_rollover(self, after):
+        """End of the rotation period containing `after` (periods are aligned to local midnight)"""
+        if not self.rotate_seconds:
+            return float("inf")
+        local = time.localtime(after)
+        midnight = time.mktime((local.tm_year, local.tm_mon, local.tm_mday, 0, 0, 0, 0, 0, -1))
+        periods = int((after - midnight) // self.rotate_seconds) + 1
+        return midnight + periods * self.rotate_seconds
+
+    def emit(self, record):
+        try:
+            if self.stream is not None and (
+                time.time() >= self._rollover_at
+                or (self.max_bytes and self.stream.tell() >= self.max_bytes)
+            ):
+                self.do_rollover()
+        except Exception:
+            self.handleError(record)
+        super().emit(record)
+
+    def do_rollover(self):
+        self.stream.close()
+        self.stream = None
+        now = time.time()
+        stamp = f"{self.baseFilename}.{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}"
+        rotated, suffix = stamp, 1
+        while os.path.exists(rotated) or os.path.exists(rotated + ".gz"):
+            rotated = f"{stamp}-{suffix}"
+            suffix += 1
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+            os.replace(self.baseFilename, rotated)
+            _maintenance.submit(self._maintain, rotated)
+        self.stream = self._open()
+        self._rollover_at = self._next_rollover(now)
+
+    def _rotated_files(self):
+        return [path for path in glob.glob(glob.escape(self.baseFilename) + ".*")
+                if not path.endswith(".tmp")]
+
+    def _maintain(self, rotated):
+        if self.compress:
+            pending = [rotated] if rotated else [p for p in self._rotated_files() if not p.endswith(".gz")]
+            for path in pending:
+                _gzip(path)
+
+        files = sorted(self._rotated_files(), key=os.path.getmtime, reverse=True)
+        cutoff = time.time() - self.retention_days * 86400 if self.retention_days else None
+        for i, path in enumerate(files):
+            if (self.backup_count and i >= self.backup_count) or (cutoff and os.path.getmtime(path) < cutoff):
+                os.remove(path)
+
+def _gzip(path):
+    """Compress a rotated file to path.gz (written under a temporary name, then renamed)"""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as source, gzip.open(path + ".gz.tmp", "wb", compresslevel=6) as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+    # Keep the original timestamp so retention counts from when the file was rotated
+    stat = os.stat(path)
+    os.utime(path + ".gz.tmp", (stat.st_atime, stat.st_mtime))
+    os.replace(path + ".gz.tmp", path + ".gz")
+    os.remove(path)
+
+def configure_logging(log_level=None, log_file=None, max_bytes=10 * 1024 * 1024, rotate_hours=24,
+                      backup_count=10, retention_days=30, compress=True):
     """
     Configure application-wide logging
     
+    Records are put on a queue and written (and files rotated) by a background thread,
+    so logging calls never wait on disk or stdout.
+    
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: Path to log file. If None, logs will only go to stdout
+        max_bytes: Rotate the log file when it reaches this size (0 disables)
+        rotate_hours: Rotate the log file every this many hours (0 disables)
+        backup_count: Rotated files to keep (0 keeps all within the retention period)
+        retention_days: Delete rotated files older than this (0 keeps them)
+        compress: Gzip rotated files
     """
     # Convert string log level to logging constant
     numeric_level = getattr(logging, (log_level or 'INFO').upper(), None)
@@ -25,6 +190,7 @@ def configure_logging(log_level=None, log_file=None):
     # Clear existing handlers to avoid duplicate logging
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
+    _stop_listener()
     
     # Create formatters
     verbose_formatter = logging.Formatter(
@@ -38,7 +204,7 @@ def configure_logging(log_level=None, log_file=None):
     # Create console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(simple_formatter)
-    root_logger.addHandler(console_handler)
+    handlers = [console_handler]
     
     # Create file handler if log_file is specified
     if log_file:
@@ -47,16 +213,23 @@ def configure_logging(log_level=None, log_file=None):
             log_dir = os.path.dirname(log_file)
             if log_dir and not os.path.exists(log_dir):
                 os.makedirs(log_dir)
-                
-            # Create rotating file handler (10MB max size, keep 5 backups)
-            file_handler = RotatingFileHandler(
-                log_file, maxBytes=10*1024*1024, backupCount=5
+            
+            file_handler = RotatingLogFileHandler(
+                log_file, max_bytes=max_bytes, rotate_hours=rotate_hours, backup_count=backup_count,
+                retention_days=retention_days, compress=compress
             )
             file_handler.setFormatter(verbose_formatter)
-            root_logger.addHandler(file_handler)
+            handlers.append(file_handler)
         except Exception as e:
             print(f"Error setting up file logging: {e}")
     
+    # Write records on a background thread
+    global _listener
+    log_queue = queue.Queue(maxsize=100000)
+    root_logger.addHandler(_NonBlockingQueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    
     # Create module loggers
     loggers = {
         'main': logging.getLogger('main'),
@@ -67,5 +240,18 @@ def configure_logging(log_level=None, log_file=None):
     root_logger.info(f"Logging configured with level: {logging.getLevelName(numeric_level)}")
     if log_file:
         root_logger.info(f"Log file: {log_file}")
-        
+    
     return loggers
+
+_listener = None
+
+def _stop_listener():
+    """Write out queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(_stop_listener)
@@ -1,606 +1,764 @@
-from fastapi import FastAPI, Request, HTTPException
+import time
+_process_started = time.perf_counter()
+
+from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-import json
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+import asyncio
+import dataclasses
+import hmac
+import queue
+import re
+import signal
+import threading
 import uvicorn
+from contextlib import asynccontextmanager
 from typing import Optional
 import logging
 
-from notifier import Notifier
-from config import HOST, PORT, ENABLE_TDARR, ENABLE_TAPEARR, LOG_LEVEL, LOG_FILE
-from logging_config import configure_logging
+# Storage-backed subsystems (outbox, history, event_log, state, artwork) and the admin-only
+# profiler are imported where they are created or first used, not here
+from notifier import Notifier, NotifierConfig, SHUTDOWN_ERROR
+from policy import PRIORITY_LEVELS
+from delivery import DeliveryQueue
+from pipeline import Pipeline
+from limits import BodyLimits, BodySizeLimitMiddleware
+from security import WebhookAuth, RateLimiter
+from suppression import StormSuppressor
+from progress import ProgressTracker
+from health import LoopLagMonitor, NtfyProbe, systemd_notify, watchdog_interval
+from instrumentation import BlockedLoopDetector, timings, render_prometheus
+from config import HOST, PORT, LOG_LEVEL, LOG_FILE, RELOAD, Settings, load_settings, settings as startup_settings
+from logging_config import configure_logging, redact_access_log_tokens
+
+logger = logging.getLogger('main')
+logging_configured = False
 
-# Configure logging
-loggers = configure_logging(LOG_LEVEL, LOG_FILE)
-logger = loggers['main']
+def _configure_logging():
+    """Configure logging once per process (at startup, or before uvicorn.run when run as a script)"""
+    global logging_configured
+    if not logging_configured:
+        configure_logging(LOG_LEVEL, LOG_FILE, startup_settings.log_max_bytes, startup_settings.log_rotate_hours,
+                          startup_settings.log_backup_count, startup_settings.log_retention_days,
+                          startup_settings.log_compress)
+        logging_configured = True
+
+@asynccontextmanager
+async def lifespan(app):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
 
 # Initialize the app
-app = FastAPI(title="Media Processing Notification System")
-notifier = Notifier()
+app = FastAPI(title="Media Processing Notification System", lifespan=lifespan)
+lag_monitor = LoopLagMonitor()
+loop_detector = BlockedLoopDetector(startup_settings.slow_handler_threshold_ms,
+                                    startup_settings.slow_handler_sample_interval)
 
-logger.info("Media Processing Notification System starting up")
+# Created by _build_components() at startup, so importing the app opens no SQLite database,
+# event log segment or state backend connection
+notifier = delivery = ntfy_probe = None
+outbox = history = event_log = None
+state = suppressor = artwork = pipeline = None
+# Shared profiler, imported by the first /admin/profile request
+profiler = None
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Configure CORS (webhook senders are servers and don't need it; only listed browser origins get access)
+cors_origins = [origin.strip() for origin in startup_settings.cors_allow_origins.split(",") if origin.strip()]
+if cors_origins:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info(f"Service configuration - Tdarr: {'enabled' if ENABLE_TDARR else 'disabled'}, "
-                f"Tapearr: {'enabled' if ENABLE_TAPEARR else 'disabled'}")
+# Webhook secrets and per-client rate limit, checked before a request body is parsed
+webhook_auth = WebhookAuth(startup_settings.webhook_secret, startup_settings.webhook_secrets)
+rate_limiter = RateLimiter(startup_settings.webhook_rate_limit, startup_settings.webhook_rate_window)
+auth_failures = 0
 
-# Health check endpoint
-@app.get("/health")
-def health_check():
-    logger.debug("Health check requested")
-    return {"status": "healthy", "tdarr_enabled": ENABLE_TDARR, "tapearr_enabled": ENABLE_TAPEARR}
+# Reject oversized request bodies while they stream in
+body_limits = BodyLimits(startup_settings.max_body_bytes, startup_settings.max_body_bytes_per_source)
+app.add_middleware(BodySizeLimitMiddleware, limits=body_limits)
 
-# Prowlarr webhook endpoint
-@app.post("/webhook/prowlarr")
-async def prowlarr_webhook(request: Request):
+@app.middleware("http")
+async def time_handlers(request: Request, call_next):
+    """Record on-loop handler time per endpoint (the "parse" phase; format/send happen on delivery workers)"""
+    path = request.url.path
+    loop_detector.current_request = path
+    started = time.perf_counter()
     try:
-        data = await request.json()
-        
-        # Log the entire webhook structure (with sensitive data redacted)
-        debug_data = str(data)
-        if len(debug_data) > 1000:
-            debug_data = debug_data[:1000] + "... [truncated]"
-        logger.debug(f"Prowlarr webhook raw data: {debug_data}")
-        
-        # Check if this is a test event
-        if data.get("eventType") == "Test":
-            logger.info("Prowlarr test webhook received")
-            return {"status": "success", "message": "Test webhook received"}
-        
-        # Extract relevant information based on Prowlarr's actual webhook structure
-        # First try to locate the title, categories, and indexer
-        title = "Unknown"
-        download_type = "torrent"
-        source = data.get("source", "unknown")  # Extract the source (Sonarr, Radarr, Lidarr)
-        
-        # Check if this is a release grab event
-        if "release" in data and "releaseTitle" in data["release"]:
-            # Extract title from the releaseTitle field (correct field name)
-            title = data["release"]["releaseTitle"]
-        elif "download" in data and "title" in data["download"]:
-            # Fallback to download.title if present
-            title = data["download"]["title"]
-        
-        # Extract the download type (indexer)
-        if "release" in data and "indexer" in data["release"]:
-            download_type = data["release"]["indexer"]
-        elif "indexer" in data:
-            download_type = data["indexer"]
-        
-        logger.info(f"Prowlarr webhook received for: {title}")
-        logger.debug(f"Prowlarr data: download={download_type}, source={source}")
-        
-        # Send notification directly with the source information
-        notifier.notify_prowlarr_found(title, download_type, source)
-        
-        return {"status": "success", "message": "Prowlarr webhook processed"}
-    except Exception as e:
-        logger.exception(f"Error processing Prowlarr webhook: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing webhook: {str(e)}")
+        response = await call_next(request)
+    finally:
+        loop_detector.current_request = None
+    # Skip unknown paths so scanners can't grow the timing table
+    if (path.startswith("/webhook/") or path == "/notify") and response.status_code != 404:
+        timings.record(path, "parse", time.perf_counter() - started)
+        if profiler is not None and profiler.active:
+            profiler.count_request()
+    return response
 
-# Sonarr webhook endpoint
-@app.post("/webhook/sonarr")
-async def sonarr_webhook(request: Request):
-    try:
-        data = await request.json()
-        
-        # Extract relevant information
-        event_type = data.get("eventType", "")
-        series_title = data.get("series", {}).get("title", "Unknown")
-        
-        logger.info(f"Sonarr webhook received: {event_type} for {series_title}")
-        
-        if event_type == "Grab":
-            # Extract episode details if available
-            episodes = data.get("episodes", [])
-            episode_title = ""
-            season_num = None
-            episode_num = None
-            
-            if episodes and len(episodes) > 0:
-                episode = episodes[0]
-                episode_title = episode.get("title", "")
-                season_num = episode.get("seasonNumber")
-                episode_num = episode.get("episodeNumber")
-            
-            title = f"{series_title} - {episode_title}" if episode_title else series_title
-            
-            # Create metadata dict
-            metadata = {
-                "media_type": "series",
-                "season": season_num,
-                "episode": episode_num,
-                "series_title": series_title,
-                "episode_title": episode_title
-            }
-            
-            # Get download details
-            download_id = data.get("downloadId", "Unknown")
-            download_title = data.get("downloadTitle", title)
-            
-            logger.debug(f"Sonarr grab detected for {title} (Download ID: {download_id})")
-            
-            # Send notification directly
-            notifier.notify_arr_status("sonarr", title, "download_started", None, metadata)
-            
-        elif event_type == "Download":
-            # Extract episode details
-            episodes = data.get("episodes", [{}])
-            episode = episodes[0] if episodes else {}
-            episode_title = episode.get("title", "")
-            season_num = episode.get("seasonNumber")
-            episode_num = episode.get("episodeNumber")
-            
-            # Fix: Assign the full title correctly using series_title, not title
-            title = f"{series_title} - {episode_title}" if episode_title else series_title
-            file_path = data.get("episodeFile", {}).get("path", None)
-            
-            # Create metadata dict
-            metadata = {
-                "media_type": "series",
-                "season": season_num,
-                "episode": episode_num,
-                "series_title": series_title,
-                "episode_title": episode_title
-            }
-            
-            # Check if manual interaction is needed
-            if data.get("manualInteraction", False):
-                status = "manual_interaction"
-                logger.info(f"Manual interaction required for {title}")
-            # Map event to our status
-            elif data.get("isUpgrade", False):
-                status = "download_complete"
-                logger.debug(f"Sonarr event is an upgrade for {title}")
-            else:
-                status = "import_complete"
-                logger.debug(f"Sonarr import complete for {title}")
-            
-            logger.debug(f"File path: {file_path}")
-            
-            # Send notification directly
-            notifier.notify_arr_status("sonarr", title, status, file_path, metadata)
-            
-        # Add handling for ManualInteractionRequired event type
-        elif event_type == "ManualInteractionRequired":
-            # Extract episode details if available
-            episodes = data.get("episodes", [])
-            if episodes and len(episodes) > 0:
-                episode_title = episodes[0].get("title", "")
-                # Fix: Use series_title here instead of title
-                title = f"{series_title} - {episode_title}" if episode_title else series_title
-            else:
-                title = series_title
-            
-            # Get download details
-            download_id = data.get("downloadId", "Unknown")
-            download_title = data.get("downloadTitle", title)
-            
-            logger.info(f"Manual interaction required for {title} (Download ID: {download_id})")
-            
-            # Send notification directly
-            notifier.notify_arr_status("sonarr", title, "manual_interaction", None, None)
-            
-        # Handle both EpisodeFileDelete and EpisodeFileDeleted events
-        elif event_type in ["EpisodeFileDelete", "EpisodeFileDeleted"]:
-            delete_reason = data.get("deleteReason", "Unknown")
-            episode_title = data.get("episodeFile", {}).get("relativePath", "Unknown Episode")
-            # Fix: Use series_title here instead of title
-            title = f"{series_title} - {episode_title}"
-            file_path = data.get("episodeFile", {}).get("path", None)
-            
-            logger.info(f"File deletion detected for {title}, reason: {delete_reason}")
-            
-            # Send notification directly
-            if delete_reason == "Manual":
-                notifier.notify_arr_status("sonarr", title, "manual_interaction", file_path, None)
+# Settings snapshot currently in effect (replaced on reload)
+current_settings = startup_settings
+_reload_lock = threading.Lock()
+
+# Settings a reload applies: passed to configure()/reload() below, or read from current_settings
+# when used. Everything else is only read at startup, so changing it needs a restart.
+LIVE_SETTINGS = frozenset((
+    # Notifier.reload (NotifierConfig.from_settings)
+    "ntfy_server", "ntfy_topic", "ntfy_token", "ntfy_user", "ntfy_pass", "ntfy_use_separate_topics",
+    "ntfy_tv_topic", "ntfy_movie_topic", "ntfy_music_topic", "subscriptions_file", "enable_tdarr",
+    "enable_tapearr", "enable_artwork", "quiet_hours", "quiet_hours_min_priority", "quiet_hours_topics",
+    "ntfy_publish_mode", "ntfy_timeout", "ntfy_max_concurrent_sends",
+    # configure() of the other components
+    "log_level", "progress_step_percent", "progress_min_interval", "max_body_bytes", "max_body_bytes_per_source",
+    "webhook_secret", "webhook_secrets", "webhook_rate_limit", "webhook_rate_window", "storm_threshold",
+    "storm_window_seconds", "storm_summary_interval",
+    # Read from current_settings
+    "admin_token", "outbox_resend_rate", "event_log_snapshot_events", "shutdown_drain_seconds",
+    "health_max_error_rate", "health_max_loop_lag_ms",
+))
+RESTART_SETTINGS = tuple(field.name for field in dataclasses.fields(Settings) if field.name not in LIVE_SETTINGS)
+
+def reload_configuration():
+    """
+    Re-read .env/environment and swap the new snapshot into the running components.
+    Settings outside LIVE_SETTINGS (host, port, log file, database, workers, ...) still require a restart.
+    
+    Everything is parsed and validated before anything is applied: if any setting is invalid
+    this raises ValueError and the running configuration is left exactly as it was.
+    
+    Returns:
+        (new NotifierConfig, names of changed settings that need a restart to take effect)
+    """
+    global current_settings
+    with _reload_lock:
+        # Validate: load_settings checks the numeric ranges, the rest fail while being parsed
+        settings = load_settings(reload_env=True)
+        notifier_config = NotifierConfig.from_settings(settings)
+        secrets = WebhookAuth.parse(settings.webhook_secret, settings.webhook_secrets)
+        limits = BodyLimits.parse(settings.max_body_bytes, settings.max_body_bytes_per_source)
+        
+        # Compared with the startup values, which are the ones still in effect
+        restart_required = [name for name in RESTART_SETTINGS
+                            if getattr(settings, name) != getattr(startup_settings, name)]
+        for name in restart_required:
+            logger.warning(f"Configuration change to {name} requires a restart to take effect")
+        
+        # Apply: nothing below can fail
+        # Log level can be applied in place
+        if settings.log_level != current_settings.log_level:
+            numeric_level = getattr(logging, settings.log_level.upper(), None)
+            if isinstance(numeric_level, int):
+                logging.getLogger().setLevel(numeric_level)
+                logger.info(f"Log level changed to {settings.log_level.upper()}")
             else:
-                notifier.notify_arr_status("sonarr", title, "file_deleted", file_path, None)
-            
-        elif event_type == "Test":
-            logger.info("Sonarr test webhook received")
-            return {"status": "success", "message": "Test webhook received"}
-        else:
-            # Handle other event types
-            logger.debug(f"Unhandled Sonarr event type: {event_type}")
-            return {"status": "success", "message": f"Event {event_type} not processed"}
-        
-        return {"status": "success", "message": "Sonarr webhook processed"}
-    except Exception as e:
-        logger.exception(f"Error processing Sonarr webhook: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing webhook: {str(e)}")
+                logger.warning(f"Invalid log level on reload: {settings.log_level}, keeping current level")
+        
+        progress.configure(settings.progress_step_percent, settings.progress_min_interval)
+        body_limits.apply(limits)
+        webhook_auth.apply(secrets)
+        rate_limiter.configure(settings.webhook_rate_limit, settings.webhook_rate_window)
+        suppressor.configure(settings.storm_threshold, settings.storm_window_seconds,
+                             settings.storm_summary_interval)
+        notifier.reload(settings, notifier_config)
+        current_settings = settings
+        return notifier_config, restart_required
+
+def require_admin(request: Request):
+    """Reject admin requests without the configured bearer token (no-op when ADMIN_TOKEN is unset)"""
+    admin_token = current_settings.admin_token
+    if not admin_token:
+        return
+    supplied = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(supplied.encode(), f"Bearer {admin_token}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def check_rate_limit(request):
+    """Count a request against its client's rate limit; raises 429 when the client is over it"""
+    client = request.client.host if request.client else "unknown"
+    if not rate_limiter.allow(client):
+        raise HTTPException(status_code=429, detail="Too many requests",
+                            headers={"Retry-After": str(int(rate_limiter.window))})
+    return client
 
-# Similar webhook endpoints for Radarr and Lidarr - simplify using same pattern
-@app.post("/webhook/radarr")
-async def radarr_webhook(request: Request):
+async def authorize_webhook(source, request):
+    """
+    Rate limit the client, then check the source's shared secret, before anything parses the body.
+    Raises 429/401; only an HMAC signature needs the raw body, which stays cached for the parser.
+    """
+    await authenticate_webhook(source, request, check_rate_limit(request))
+
+async def authenticate_webhook(source, request, client):
+    """Check the source's shared secret (the client has already been rate limited); raises 401"""
+    global auth_failures
+    secret = webhook_auth.secret_for(source)
+    if secret is None:
+        return
+    signature = webhook_auth.signature_header(request.headers)
+    if signature is not None:
+        ok = webhook_auth.verify_signature(secret, await request.body(), signature)
+    else:
+        ok = webhook_auth.verify_token(secret, request.headers, request.query_params)
+    if not ok:
+        auth_failures += 1
+        logger.debug(f"Rejected unauthenticated {source} request from {client}")
+        raise HTTPException(status_code=401, detail="Invalid or missing webhook secret")
+
+def _handle_sighup():
+    logger.info("SIGHUP received, reloading configuration")
+    loop = asyncio.get_running_loop()
+    # Reading .env touches the disk, keep it off the event loop
+    future = loop.run_in_executor(None, reload_configuration)
+    future.add_done_callback(_log_reload_result)
+
+def _log_reload_result(future):
+    if future.exception():
+        logger.error(f"Configuration reload failed: {future.exception()}")
+
+# Set once startup has finished warming up the delivery path
+ready = False
+
+def _warm_up():
+    """Create the outbound HTTP session so the first webhook doesn't pay for it"""
+    global ready
+    started = time.perf_counter()
+    notifier.get_session()
+    ready = True
+    systemd_notify("READY=1")
+    logger.info(f"Service ready ({(time.perf_counter() - started) * 1000:.0f} ms warm-up, "
+                f"{(time.perf_counter() - _process_started) * 1000:.0f} ms since import)")
+
+def _replay_undelivered():
+    """Send the notifications the previous run persisted at shutdown"""
+    from outbox import OutboxBusy
     try:
-        data = await request.json()
-        
-        # Extract relevant information
-        event_type = data.get("eventType", "")
-        movie = data.get("movie", {})
-        title = movie.get("title", "Unknown")
-        year = movie.get("year")
-        
-        logger.info(f"Radarr webhook received: {event_type} for {title}")
-        
-        # Create metadata dict
-        metadata = {
-            "media_type": "movie",
-            "year": year,
-            "imdbId": movie.get("imdbId"),
-            "tmdbId": movie.get("tmdbId")
-        }
-        
-        if event_type == "Grab":
-            # Get download details
-            download_id = data.get("downloadId", "Unknown")
-            download_title = data.get("downloadTitle", title)
-            
-            logger.debug(f"Radarr grab detected for {title} (Download ID: {download_id})")
-            
-            # Send notification directly
-            notifier.notify_arr_status("radarr", title, "download_started", None, metadata)
-            
-        elif event_type == "Download":
-            file_path = data.get("movieFile", {}).get("path", None)
-            
-            # Check if manual interaction is needed
-            if data.get("manualInteraction", False):
-                status = "manual_interaction"
-                logger.info(f"Manual interaction required for {title}")
-            # Map event to our status
-            elif data.get("isUpgrade", False):
-                status = "download_complete"
-                logger.debug(f"Radarr event is an upgrade for {title}")
-            else:
-                status = "import_complete"
-                logger.debug(f"Radarr import complete for {title}")
-            
-            logger.debug(f"File path: {file_path}")
-            
-            # Send notification directly
-            notifier.notify_arr_status("radarr", title, status, file_path, metadata)
-            
-        # Add handling for ManualInteractionRequired event type
-        elif event_type == "ManualInteractionRequired":
-            # Get download details
-            download_id = data.get("downloadId", "Unknown")
-            download_title = data.get("downloadTitle", title)
-            
-            logger.info(f"Manual interaction required for {title} (Download ID: {download_id})")
-            
-            # Send notification directly
-            notifier.notify_arr_status("radarr", title, "manual_interaction", None, None)
-            
-        # Handle both MovieFileDelete and MovieFileDeleted events
-        elif event_type in ["MovieFileDelete", "MovieFileDeleted"]:
-            delete_reason = data.get("deleteReason", "Unknown")
-            file_path = data.get("movieFile", {}).get("path", None)
-            
-            logger.info(f"File deletion detected for {title}, reason: {delete_reason}")
-            
-            # Send notification directly
-            if delete_reason == "Manual":
-                notifier.notify_arr_status("radarr", title, "manual_interaction", file_path, None)
-            else:
-                notifier.notify_arr_status("radarr", title, "file_deleted", file_path, None)
-            
-        elif event_type == "Test":
-            logger.info("Radarr test webhook received")
-            return {"status": "success", "message": "Test webhook received"}
+        result = outbox.resend(notifier.resend, limit=outbox.max_entries,
+                               rate=current_settings.outbox_resend_rate, error=SHUTDOWN_ERROR)
+    except OutboxBusy:
+        return
+    if result["sent"] or result["failed"]:
+        logger.info(f"Replayed notifications left undelivered at last shutdown: {result['sent']} sent, "
+                    f"{result['failed']} failed")
+
+async def _recover_state():
+    """Rebuild in-memory state from the latest event log snapshot plus the events logged after it"""
+    from event_log import decode_event
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    snapshot, tail = await loop.run_in_executor(None, event_log.recover)
+    if snapshot is not None:
+        progress.restore(snapshot.get("progress", []))
+    for timestamp, record in tail:
+        try:
+            pipeline.replay(decode_event(record), timestamp)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Skipping unreadable event log record: {e}")
+    logger.info(f"Recovered state from the event log in {(time.perf_counter() - started) * 1000:.0f} ms "
+                f"({len(tail)} events replayed, {progress.tracked()} files with progress)")
+
+async def _snapshot_state():
+    """Write a snapshot of the state as of the last logged event, then compact the log"""
+    # Captured on the event loop, where events are logged and applied, so the two match
+    seq, state = event_log.last_seq, {"progress": progress.snapshot()}
+    await asyncio.get_running_loop().run_in_executor(None, event_log.write_snapshot, seq, state)
+
+async def _event_log_loop():
+    """Flush the event log to disk every second and take a snapshot every EVENT_LOG_SNAPSHOT_EVENTS events"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(1)
+        try:
+            await loop.run_in_executor(None, event_log.flush)
+            if event_log.pending() >= current_settings.event_log_snapshot_events:
+                await _snapshot_state()
+        except OSError as e:
+            logger.error(f"Event log maintenance failed: {e}")
+
+def _build_components():
+    """Create the notifier, delivery queue and the components backed by SQLite, the event log or the state backend"""
+    global notifier, delivery, ntfy_probe, outbox, history, event_log, state, suppressor, artwork, pipeline
+    settings = startup_settings
+    if settings.outbox_enabled:
+        from outbox import Outbox
+        outbox = Outbox(settings.database_url, settings.outbox_max_entries)
+    if settings.history_enabled:
+        from history import History
+        history = History(settings.database_url, settings.history_retention_days)
+    if settings.event_log_enabled:
+        from event_log import EventLog
+        event_log = EventLog(settings.event_log_dir, settings.event_log_segment_bytes)
+    from state import create_state
+    from artwork import ArtworkCache
+    
+    notifier = Notifier(outbox=outbox, history=history)
+    delivery = DeliveryQueue(settings.delivery_workers, settings.delivery_queue_size)
+    ntfy_probe = NtfyProbe(notifier, interval=settings.ntfy_probe_interval)
+    state = create_state(settings.state_backend, settings.state_url)
+    suppressor = StormSuppressor(notifier, dispatch, state, settings.storm_threshold,
+                                 settings.storm_window_seconds, settings.storm_summary_interval)
+    artwork = ArtworkCache(settings.artwork_cache_size, settings.artwork_cache_ttl)
+    pipeline = Pipeline(notifier, dispatch, suppressor, progress, artwork, event_log)
+
+async def startup():
+    _configure_logging()
+    # uvicorn has configured its loggers by now; keep ?token= secrets out of the access log
+    redact_access_log_tokens()
+    logger.info("Media Processing Notification System starting up")
+    _build_components()
+    config = notifier.config
+    logger.info(f"Service configuration - Tdarr: {'enabled' if config.enable_tdarr else 'disabled'}, "
+                f"Tapearr: {'enabled' if config.enable_tapearr else 'disabled'}")
+    
+    # Reload configuration on SIGHUP (e.g. systemctl reload) where supported
+    if hasattr(signal, "SIGHUP"):
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, _handle_sighup)
+        except (NotImplementedError, RuntimeError) as e:
+            logger.debug(f"SIGHUP reload not available: {e}")
+    
+    if event_log is not None:
+        # Before the first webhook is accepted, so replayed state isn't mixed with new events
+        await _recover_state()
+        asyncio.get_running_loop().create_task(_event_log_loop())
+    
+    delivery.start()
+    if history is not None:
+        history.start()
+    suppressor.start()
+    lag_monitor.start()
+    ntfy_probe.start()
+    loop_detector.start(asyncio.get_running_loop())
+    
+    # Ping the systemd watchdog (WatchdogSec=) while the service is healthy
+    interval = watchdog_interval()
+    if interval:
+        asyncio.get_running_loop().create_task(_watchdog_loop(interval))
+    
+    asyncio.get_running_loop().create_task(_deferred_flush_loop())
+    
+    # Warm up in the background so the server starts accepting connections right away
+    asyncio.get_running_loop().run_in_executor(None, _warm_up)
+    if outbox is not None:
+        asyncio.get_running_loop().run_in_executor(None, _replay_undelivered)
+
+async def shutdown():
+    """
+    Drain before exiting: uvicorn has already stopped accepting connections and waited for
+    in-flight handlers; queued sends get SHUTDOWN_DRAIN_SECONDS to finish, and whatever is
+    still undelivered after that is stored in the outbox for replay at the next startup.
+    """
+    global ready
+    ready = False
+    loop = asyncio.get_running_loop()
+    logger.info(f"Shutting down, draining {delivery.depth()} queued notifications")
+    
+    suppressor.stop()
+    leftovers = await loop.run_in_executor(None, delivery.stop, current_settings.shutdown_drain_seconds)
+    persisted = await loop.run_in_executor(None, notifier.persist_undelivered, leftovers)
+    if persisted:
+        logger.warning(f"Stored {persisted} undelivered notifications in the outbox for replay at startup")
+    
+    lag_monitor.stop()
+    ntfy_probe.stop()
+    loop_detector.stop()
+    if history is not None:
+        # Write out history rows still waiting for the next batch
+        await loop.run_in_executor(None, history.stop)
+    if event_log is not None:
+        # A final snapshot so the next startup has nothing to replay
+        await _snapshot_state()
+        await loop.run_in_executor(None, event_log.close)
+    state.close()
+
+async def _deferred_flush_loop():
+    """Release notifications held during quiet hours once the window ends"""
+    while True:
+        await asyncio.sleep(60)
+        if notifier.deferred.pending():
+            try:
+                dispatch(notifier.flush_deferred)
+            except HTTPException:
+                pass  # Queue full, try again on the next tick
+
+async def _watchdog_loop(interval):
+    while True:
+        await asyncio.sleep(interval)
+        if evaluate_health()["live"]:
+            systemd_notify("WATCHDOG=1")
         else:
-            # Handle other event types
-            logger.debug(f"Unhandled Radarr event type: {event_type}")
-            return {"status": "success", "message": f"Event {event_type} not processed"}
-        
-        return {"status": "success", "message": "Radarr webhook processed"}
-    except Exception as e:
-        logger.exception(f"Error processing Radarr webhook: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing webhook: {str(e)}")
+            logger.warning("Skipping systemd watchdog ping, service is not live")
 
-@app.post("/webhook/lidarr")
-async def lidarr_webhook(request: Request):
+def dispatch(fn, *args, **kwargs):
+    """
+    Queue a notify call for background delivery.
+    Raises 503 when the delivery queue is full so the sender retries later.
+    """
+    if profiler is not None and profiler.active:
+        fn = profiler.wrap(fn)
     try:
-        data = await request.json()
-        
-        # Extract relevant information
-        event_type = data.get("eventType", "")
-        artist = data.get("artist", {})
-        artist_name = artist.get("name", "Unknown")
-        albums = data.get("albums", [{}])
-        album = albums[0] if albums else {}
-        album_title = album.get("title", "Unknown")
-        title = f"{artist_name} - {album_title}"
-        
-        # Create metadata dict
-        metadata = {
-            "media_type": "music",
-            "artist": artist_name,
-            "album": album_title,
-            "albumType": album.get("albumType"),
-            "releaseDate": album.get("releaseDate")
+        return delivery.submit(fn, *args, **kwargs)
+    except queue.Full:
+        logger.error(f"Delivery queue full ({delivery.max_size}), rejecting webhook")
+        raise HTTPException(status_code=503, detail="Notification queue is full, retry later",
+                            headers={"Retry-After": "30"})
+
+progress = ProgressTracker(startup_settings.progress_step_percent, startup_settings.progress_min_interval)
+
+def evaluate_health():
+    """
+    Build the health report from cached signals only (no outbound I/O)
+    
+    Returns:
+        Dict with overall "live"/"ready" flags, failing checks and the raw measurements
+    """
+    settings = current_settings
+    sent, failed = notifier.stats.totals()
+    error_rate = failed / sent if sent else 0.0
+    depth = delivery.depth()
+    
+    problems = []
+    if not ready:
+        problems.append("starting")
+    if ntfy_probe.reachable is False:
+        problems.append("ntfy_unreachable")
+    if depth >= delivery.max_size * 0.9:
+        problems.append("queue_saturated")
+    # Require a few samples before judging the error rate
+    if sent >= 5 and error_rate > settings.health_max_error_rate:
+        problems.append("send_error_rate")
+    if lag_monitor.max_recent_ms > settings.health_max_loop_lag_ms:
+        problems.append("event_loop_lag")
+    
+    return {
+        # A blocked loop can't be fixed by waiting, everything else can
+        "live": lag_monitor.current_ms <= settings.health_max_loop_lag_ms * 10,
+        "ready": not problems,
+        "problems": problems,
+        "ntfy": ntfy_probe.as_dict(),
+        "queue": {"depth": depth, "max_size": delivery.max_size, "workers": delivery.workers,
+                  "max_concurrent_sends": notifier.limiter.max_concurrent, "sends_in_flight": notifier.limiter.active()},
+        "sends": {
+            "window_seconds": notifier.stats.num_buckets * notifier.stats.bucket_seconds,
+            "sent": sent,
+            "failed": failed,
+            "error_rate": round(error_rate, 3),
+            "consecutive_failures": notifier.stats.consecutive_failures,
+            "last_success": notifier.stats.last_success,
+            "last_failure": notifier.stats.last_failure
+        },
+        "event_loop_lag_ms": {
+            "current": round(lag_monitor.current_ms, 1),
+            "max_recent": round(lag_monitor.max_recent_ms, 1)
         }
-        
-        logger.info(f"Lidarr webhook received: {event_type} for {title}")
-        
-        if event_type == "Grab":
-            # Get download details
-            download_id = data.get("downloadId", "Unknown")
-            download_title = data.get("downloadTitle", title)
-            
-            logger.debug(f"Lidarr grab detected for {title} (Download ID: {download_id})")
-            
-            # Send notification directly
-            notifier.notify_arr_status("lidarr", title, "download_started", None, metadata)
-            
-        elif event_type == "Download":
-            file_path = data.get("trackFiles", [{}])[0].get("path", None) if data.get("trackFiles") else None
-            
-            # Check if manual interaction is needed
-            if data.get("manualInteraction", False):
-                status = "manual_interaction"
-                logger.info(f"Manual interaction required for {title}")
-            # Map event to our status
-            elif data.get("isUpgrade", False):
-                status = "download_complete"
-                logger.debug(f"Lidarr event is an upgrade for {title}")
-            else:
-                status = "import_complete"
-                logger.debug(f"Lidarr import complete for {title}")
-            
-            # Send notification directly
-            notifier.notify_arr_status("lidarr", title, status, file_path, metadata)
-            
-        # Add handling for ManualInteractionRequired event type
-        elif event_type == "ManualInteractionRequired":
-            # Get download details
-            download_id = data.get("downloadId", "Unknown")
-            download_title = data.get("downloadTitle", title)
-            
-            logger.info(f"Manual interaction required for {title} (Download ID: {download_id})")
-            
-            # Send notification directly
-            notifier.notify_arr_status("lidarr", title, "manual_interaction", None, None)
-            
-        # Handle both TrackFileDelete and TrackFileDeleted events
-        elif event_type in ["TrackFileDelete", "TrackFileDeleted"]:
-            delete_reason = data.get("deleteReason", "Unknown")
-            file_path = data.get("trackFile", {}).get("path", None)
-            
-            logger.info(f"File deletion detected for {title}, reason: {delete_reason}")
-            
-            # Send notification directly
-            if delete_reason == "Manual":
-                notifier.notify_arr_status("lidarr", title, "manual_interaction", file_path, None)
-            else:
-                notifier.notify_arr_status("lidarr", title, "file_deleted", file_path, None)
-            
-        # Add handling for download failure events
-        elif event_type == "DownloadFailed":
-            # Get details about the failed download
-            download_id = data.get("downloadId", "Unknown")
-            download_title = data.get("downloadTitle", title)
-            error_message = data.get("message", "Unknown error")
-            
-            logger.info(f"Lidarr download failed for {title} (Download ID: {download_id}): {error_message}")
-            
-            # Send notification directly
-            notifier.notify_arr_status("lidarr", title, "download_failed", None, None)
-            
-        # Add handling for import failure events
-        elif event_type == "ImportFailed":
-            # Get details about the failed import
-            error_message = data.get("message", "Unknown import error")
-            file_path = None
-            if "trackFiles" in data and data["trackFiles"]:
-                file_path = data["trackFiles"][0].get("path", None)
-            
-            logger.info(f"Lidarr import failed for {title}: {error_message}")
-            
-            # Send notification directly
-            notifier.notify_arr_status("lidarr", title, "import_failed", file_path, None)
-            
-        elif event_type == "Test":
-            logger.info("Lidarr test webhook received")
-            return {"status": "success", "message": "Test webhook received"}
-        else:
-            # Handle other event types
-            logger.debug(f"Unhandled Lidarr event type: {event_type}")
-            return {"status": "success", "message": f"Event {event_type} not processed"}
-        
-        return {"status": "success", "message": "Lidarr webhook processed"}
-    except Exception as e:
-        logger.exception(f"Error processing Lidarr webhook: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing webhook: {str(e)}")
+    }
+
+# Health check endpoint
+@app.get("/health")
+def health_check():
+    logger.debug("Health check requested")
+    config = notifier.config
+    return {"status": "healthy", "tdarr_enabled": config.enable_tdarr, "tapearr_enabled": config.enable_tapearr}
+
+# Liveness: the process is up and its event loop is responsive
+@app.get("/health/live")
+async def health_live():
+    report = evaluate_health()
+    content = {"status": "alive" if report["live"] else "stalled",
+               "event_loop_lag_ms": report["event_loop_lag_ms"]}
+    return JSONResponse(status_code=200 if report["live"] else 503, content=content)
+
+# Readiness: startup has completed and the delivery pipeline is healthy
+@app.get("/health/ready")
+async def health_ready():
+    report = evaluate_health()
+    if not report["ready"]:
+        status = "starting" if not ready else "degraded"
+        return JSONResponse(status_code=503, content={"status": status, **report})
+    return {"status": "ready", **report}
+
+# Prometheus metrics (a plain def: Starlette runs it in the threadpool, so the outbox's
+# SQLite count never blocks the event loop the lag gauges measure)
+@app.get("/metrics")
+def metrics():
+    sent, failed = notifier.stats.totals()
+    gauges = {
+        "mns_event_loop_lag_seconds": ("Most recent event loop lag", lag_monitor.current_ms / 1000),
+        "mns_event_loop_lag_max_seconds": ("Maximum recent event loop lag", lag_monitor.max_recent_ms / 1000),
+        "mns_event_loop_blocked_total": ("Times the event loop was blocked past the threshold", loop_detector.blocked_count),
+        "mns_delivery_queue_depth": ("Notifications queued or being sent", delivery.depth()),
+        "mns_ntfy_sends_in_flight": ("Requests to ntfy in progress", sum(notifier.limiter.active().values())),
+        "mns_notifications_sent_recent": ("Notifications sent in the rolling window", sent),
+        "mns_notifications_failed_recent": ("Notifications failed in the rolling window", failed),
+        "mns_notifications_deferred": ("Notifications held until quiet hours end", notifier.deferred.pending()),
+        "mns_artwork_cache_entries": ("Poster URLs cached for enrichment", artwork.size()),
+        "mns_progress_files_tracked": ("Files with progress updates being tracked", progress.tracked()),
+        "mns_notifications_suppressed_total": ("Repeated events dropped by storm suppression", suppressor.suppressed_total),
+        "mns_webhook_auth_failures_total": ("Webhook requests rejected for a missing or wrong secret", auth_failures),
+        "mns_webhook_rate_limited_total": ("Webhook requests rejected by the per-client rate limit", rate_limiter.rejected_total),
+        "mns_ntfy_reachable": ("Whether the last ntfy probe succeeded", int(bool(ntfy_probe.reachable)))
+    }
+    if notifier.config.subscriptions is not None:
+        gauges["mns_subscription_rules"] = ("Subscription rules in effect", notifier.config.subscriptions.rule_count)
+    if event_log is not None:
+        gauges["mns_event_log_pending_events"] = ("Events logged since the last state snapshot", event_log.pending())
+    if outbox is not None:
+        gauges["mns_outbox_entries"] = ("Undelivered notifications stored in the outbox", outbox.count())
+    return PlainTextResponse(render_prometheus(gauges), media_type="text/plain; version=0.0.4")
 
-# Tdarr webhook endpoint
-@app.post("/webhook/tdarr")
-async def tdarr_webhook(request: Request):
-    if not ENABLE_TDARR:
-        return {"status": "disabled", "message": "Tdarr integration is disabled"}
+# Handler timings, event loop lag and stack samples of slow handlers
+@app.get("/admin/instrumentation", dependencies=[Depends(require_admin)])
+async def admin_instrumentation():
+    return {
+        "timings": timings.as_dict(),
+        "event_loop": {
+            "lag_ms": round(lag_monitor.current_ms, 1),
+            "max_recent_lag_ms": round(lag_monitor.max_recent_ms, 1),
+            "blocked_count": loop_detector.blocked_count,
+            "blocked_threshold_ms": loop_detector.threshold * 1000
+        },
+        "slow_samples": list(loop_detector.samples)
+    }
+
+# On-demand profiling of the webhook handlers and delivery workers
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def admin_profile(mode: str = "sampling", seconds: float = 10, requests: int = 0, output: str = "text"):
+    global profiler
+    from profiling import profiler as shared_profiler, ProfilerBusy
+    profiler = shared_profiler
+    seconds = min(max(seconds, 0.1), 300)
+    try:
+        profiler.start(mode, max_requests=requests)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     
     try:
-        data = await request.json()
-        
-        # Extract relevant information
-        status = data.get("status", "")
-        title = data.get("title", "Unknown")
-        file_path = data.get("file_path", None)
-        error = data.get("error", None)
-        
-        # Extract media type for topic routing
-        media_type = data.get("media_type", "unknown")
-        
-        # Create metadata dict for notification routing
-        metadata = {
-            "media_type": media_type
-        }
-        
-        logger.info(f"Tdarr webhook received: {status} for {title} (type: {media_type})")
-        
-        # Send notification directly with metadata
-        notifier.notify_parallel_process("tdarr", title, status, error, file_path, metadata)
-        
-        return {"status": "success", "message": "Tdarr webhook processed"}
-    except Exception as e:
-        logger.exception(f"Error processing Tdarr webhook: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing webhook: {str(e)}")
+        await profiler.wait(seconds)
+    finally:
+        artifact = profiler.stop(output)
+    
+    if isinstance(artifact, bytes):
+        return Response(artifact, media_type="application/octet-stream",
+                        headers={"Content-Disposition": 'attachment; filename="webhooks.pstats"'})
+    return PlainTextResponse(artifact)
 
-# Plex webhook endpoint
-@app.post("/webhook/plex")
-async def plex_webhook(request: Request):
+# Configuration reload endpoint
+@app.post("/admin/reload", dependencies=[Depends(require_admin)])
+def admin_reload():
+    logger.info("Configuration reload requested")
     try:
-        form = await request.form()
-        payload = form.get("payload", "{}")
-        
-        # Log the raw payload (truncate if too large)
-        # debug_payload = payload
-        # try:
-        #     # Format the JSON with indentation for better readability in logs
-        #     formatted_payload = json.dumps(json.loads(debug_payload), indent=2)
-        #     logger.debug(f"Plex webhook raw payload:\n{formatted_payload}")
-        # except:
-        #     # Fall back to raw payload if JSON parsing fails
-        #     logger.debug(f"Plex webhook raw payload: {debug_payload}")
-        
-        data = json.loads(payload)
-        event = data.get("event", "")
-        
-        logger.info(f"Plex webhook received: {event}")
-        
-        if event == "library.new":
-            metadata = data.get("Metadata", {})
-            
-            # Extract common fields
-            title = metadata.get("title", "Unknown")
-            # TODO - this might do better using "librarySectionType" to determine media type
-            media_type = metadata.get("type", "unknown") 
-            
-            # Extract structured metadata based on media type
-            if media_type == "movie":
-                # For movies
-                formatted_title = title
-                extracted_metadata = {
-                    "media_type": "movie",
-                    "year": metadata.get("year"),
-                    "studio": metadata.get("studio"),
-                    "contentRating": metadata.get("contentRating"),
-                    "summary": metadata.get("summary", "")[:100] if metadata.get("summary") else None
-                }
-            
-            elif media_type == "episode":
-                # For TV episodes
-                series_title = metadata.get("grandparentTitle", "Unknown Series")
-                season_num = metadata.get("parentIndex")  # Season number
-                episode_num = metadata.get("index")       # Episode number
-                formatted_title = f"{series_title} - {title}"
-                
-                extracted_metadata = {
-                    "media_type": "series",
-                    "series_title": series_title,
-                    "season": season_num,
-                    "episode": episode_num,
-                    "episode_title": title
-                }
-            
-            elif media_type == "track":
-                # For music
-                artist = metadata.get("grandparentTitle", "Unknown Artist")
-                album = metadata.get("parentTitle", "Unknown Album")
-                formatted_title = f"{artist} - {album} - {title}"
-                
-                extracted_metadata = {
-                    "media_type": "music",
-                    "artist": artist,
-                    "album": album,
-                    "track": title
-                }
-            
-            else:
-                # Fallback for other types
-                formatted_title = title
-                extracted_metadata = {
-                    "media_type": media_type
-                }
-            
-            # Extract file path
-            file_path = None
-            media_parts = []
-            
-            if "Media" in metadata:
-                for media_item in metadata.get("Media", []):
-                    for part in media_item.get("Part", []):
-                        if "file" in part:
-                            media_parts.append(part)
-            
-            if media_parts:
-                file_path = media_parts[0].get("file")
-            
-            logger.debug(f"Plex new library item: {formatted_title}, file path: {file_path}")
-            logger.debug(f"Extracted metadata: {extracted_metadata}")
-            
-            # Send notification directly
-            notifier.notify_parallel_process("plex", formatted_title, "added", None, file_path, extracted_metadata)
-        
-        return {"status": "success", "message": "Plex webhook processed"}
+        config, restart_required = reload_configuration()
+    except ValueError as e:
+        # Invalid settings: nothing was applied, the previous configuration stays in effect
+        logger.error(f"Configuration reload rejected: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Invalid configuration, nothing was changed: {str(e)}")
     except Exception as e:
-        logger.exception(f"Error processing Plex webhook: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing webhook: {str(e)}")
+        logger.exception(f"Configuration reload failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Configuration reload failed: {str(e)}")
+    
+    return {
+        "status": "success",
+        "message": "Configuration reloaded",
+        "restart_required": restart_required,
+        "separate_topics": config.use_separate_topics,
+        "process_stages": list(config.process_stages),
+        "tdarr_enabled": config.enable_tdarr,
+        "tapearr_enabled": config.enable_tapearr
+    }
+
+def _outbox_filters(ids, topic, source, since, until):
+    if outbox is None:
+        raise HTTPException(status_code=404, detail="Outbox is disabled")
+    try:
+        id_list = [int(i) for i in ids.split(",")] if ids else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    return {"ids": id_list, "topic": topic, "source": source, "since": since, "until": until}
+
+# Notifications that could not be delivered, newest first
+@app.get("/admin/outbox", dependencies=[Depends(require_admin)])
+def admin_outbox_list(
+    topic: Optional[str] = None,
+    source: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    ids: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: int = 50
+):
+    filters = _outbox_filters(ids, topic, source, since, until)
+    return outbox.list(limit=min(max(limit, 1), 500), cursor=cursor, **filters)
+
+# Re-send stored notifications (oldest first, rate limited)
+@app.post("/admin/outbox/resend", dependencies=[Depends(require_admin)])
+def admin_outbox_resend(
+    topic: Optional[str] = None,
+    source: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    ids: Optional[str] = None,
+    limit: int = 100,
+    rate: Optional[float] = None
+):
+    from outbox import OutboxBusy
+    filters = _outbox_filters(ids, topic, source, since, until)
+    rate = current_settings.outbox_resend_rate if rate is None else rate
+    try:
+        result = outbox.resend(notifier.resend, limit=max(limit, 1), rate=rate, **filters)
+    except OutboxBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "success", **result}
+
+# Delete stored notifications (all of them if no filter is given)
+@app.delete("/admin/outbox", dependencies=[Depends(require_admin)])
+def admin_outbox_purge(
+    topic: Optional[str] = None,
+    source: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    ids: Optional[str] = None
+):
+    filters = _outbox_filters(ids, topic, source, since, until)
+    return {"status": "success", "deleted": outbox.purge(**filters)}
 
-# Tapearr webhook endpoint
-@app.post("/webhook/tapearr")
-async def tapearr_webhook(request: Request):
-    if not ENABLE_TAPEARR:
-        return {"status": "disabled", "message": "Tapearr integration is disabled"}
+# Sent notifications, newest first
+@app.get("/admin/history", dependencies=[Depends(require_admin)])
+def admin_history(
+    q: Optional[str] = None,
+    source: Optional[str] = None,
+    topic: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    delivered: Optional[bool] = None,
+    cursor: Optional[int] = None,
+    limit: int = 50
+):
+    if history is None:
+        raise HTTPException(status_code=404, detail="History is disabled")
+    return history.query(q=q, source=source, topic=topic, since=since, until=until, delivered=delivered,
+                         cursor=cursor, limit=min(max(limit, 1), 500))
+
+# Webhook endpoint for all sources (prowlarr, sonarr, radarr, lidarr, plex, tdarr, tapearr)
+@app.post("/webhook/{source}")
+async def webhook(source: str, request: Request):
+    # Counted before the source is looked up, so probes of unknown /webhook/ paths are limited too
+    client = check_rate_limit(request)
+    adapter = pipeline.get_adapter(source)
+    if adapter is None:
+        raise HTTPException(status_code=404, detail=f"Unknown webhook source: {source}")
+    await authenticate_webhook(source, request, client)
     
     try:
-        data = await request.json()
-        
-        # Extract relevant information
-        status = data.get("status", "")
-        title = data.get("title", "Unknown")
-        file_path = data.get("file_path", None)
-        error = data.get("error", None)
-        
-        # Extract media type for topic routing
-        media_type = data.get("media_type", "unknown")
-        
-        # Create metadata dict for notification routing
-        metadata = {
-            "media_type": media_type
-        }
-        
-        logger.info(f"Tapearr webhook received: {status} for {title} (type: {media_type})")
-        
-        # Send notification directly with metadata
-        notifier.notify_parallel_process("tapearr", title, status, error, file_path, metadata)
-        
-        return {"status": "success", "message": "Tapearr webhook processed"}
+        return await pipeline.handle(source, request)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.exception(f"Error processing Tapearr webhook: {str(e)}")
+        logger.exception(f"Error processing {adapter.name} webhook: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing webhook: {str(e)}")
 
-# Manual notification endpoint for testing
+# Most notifications accepted in one /notify call
+MAX_NOTIFY_BATCH = 100
+# ntfy topic names (also keeps the topic from changing the publish URL)
+TOPIC_PATTERN = re.compile(r"^[-_A-Za-z0-9]{1,64}$")
+
+def _parse_manual_notifications(data):
+    """
+    Validate a /notify JSON body: {"notifications": [...]}, a list, or a single notification.
+    Each notification has title and message, and optionally topic, priority and tags.
+    
+    Returns:
+        List of dicts with title, message, topic, priority and tags
+    """
+    if isinstance(data, dict) and "notifications" in data:
+        data = data["notifications"]
+    items = data if isinstance(data, list) else [data]
+    if not items:
+        raise HTTPException(status_code=422, detail="No notifications given")
+    if len(items) > MAX_NOTIFY_BATCH:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_NOTIFY_BATCH} notifications per request")
+    
+    notifications = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise HTTPException(status_code=422, detail=f"Notification {i}: expected an object")
+        title, message = item.get("title"), item.get("message")
+        if not isinstance(title, str) or not isinstance(message, str):
+            raise HTTPException(status_code=422, detail=f"Notification {i}: title and message are required strings")
+        topic = item.get("topic")
+        if topic is not None and (not isinstance(topic, str) or not TOPIC_PATTERN.match(topic)):
+            raise HTTPException(status_code=422, detail=f"Notification {i}: invalid topic")
+        priority = item.get("priority", "default")
+        if priority not in PRIORITY_LEVELS:
+            raise HTTPException(status_code=422, detail=f"Notification {i}: priority must be one of {', '.join(PRIORITY_LEVELS)}")
+        tags = item.get("tags") or []
+        if isinstance(tags, str):
+            tags = tags.split(",")
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            raise HTTPException(status_code=422, detail=f"Notification {i}: tags must be a list of strings")
+        notifications.append({"title": title, "message": message, "topic": topic, "priority": priority, "tags": tags})
+    return notifications
+
+async def _send_batch(notifications):
+    """Queue every notification at once, then wait for all of them; returns one result per notification"""
+    futures = []
+    for n in notifications:
+        try:
+            futures.append(dispatch(notifier.send_notification, n["title"], n["message"], n["priority"], n["tags"],
+                                    topic=n["topic"]))
+        except HTTPException as e:
+            futures.append(e)
+    
+    results = []
+    for i, (n, future) in enumerate(zip(notifications, futures)):
+        result = {"index": i, "topic": n["topic"] or notifier.config.default_topic, "title": n["title"]}
+        if isinstance(future, HTTPException):
+            result.update(status="rejected", error=future.detail)
+        else:
+            try:
+                sent = await asyncio.wrap_future(future)
+            except Exception as e:
+                sent, result["error"] = False, str(e)
+            result["status"] = "sent" if sent else "failed"
+        results.append(result)
+    return results
+
+# Manual notifications: query parameters for a single one, or a JSON body with a batch
 @app.post("/notify")
 async def send_notification(
-    title: str, 
-    message: str, 
+    request: Request,
+    title: Optional[str] = None, 
+    message: Optional[str] = None, 
     priority: str = "default", 
     tags: Optional[str] = None
 ):
+    await authorize_webhook("notify", request)
+    if title is None and message is None:
+        try:
+            data = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Expected title and message query parameters or a JSON body")
+        notifications = _parse_manual_notifications(data)
+        logger.info(f"Manual notification batch requested: {len(notifications)} notifications")
+        results = await _send_batch(notifications)
+        sent = sum(1 for result in results if result["status"] == "sent")
+        content = {"status": "success" if sent == len(results) else "partial", "sent": sent,
+                   "failed": len(results) - sent, "results": results}
+        # 207 Multi-Status when some notifications were not sent; the results say which
+        return JSONResponse(status_code=200 if sent == len(results) else 207, content=content)
+    
+    if title is None or message is None:
+        raise HTTPException(status_code=422, detail="Both title and message are required")
+    if priority not in PRIORITY_LEVELS:
+        raise HTTPException(status_code=422, detail=f"priority must be one of {', '.join(PRIORITY_LEVELS)}")
     logger.info(f"Manual notification requested: {title}")
     tag_list = tags.split(",") if tags else []
-    success = notifier.send_notification(title, message, priority, tag_list)
+    success = await asyncio.wrap_future(dispatch(notifier.send_notification, title, message, priority, tag_list))
     
     if not success:
         logger.error("Failed to send manual notification")
@@ -609,5 +767,11 @@ async def send_notification(
     return {"status": "success", "message": "Notification sent"}
 
 if __name__ == "__main__":
+    _configure_logging()
     logger.info(f"Starting server on {HOST}:{PORT}")
-    uvicorn.run("main:app", host=HOST, port=PORT, reload=True, log_level=LOG_LEVEL.lower())
+    if RELOAD:
+        # Auto-reload needs an import string and runs the app in a watched subprocess
+        uvicorn.run("main:app", host=HOST, port=PORT, reload=True, log_level=LOG_LEVEL.lower())
+    else:
+        # Pass the already-imported app so it isn't imported (and initialized) a second time
+        uvicorn.run(app, host=HOST, port=PORT, log_level=LOG_LEVEL.lower())
@@ -1,151 +1,374 @@
-import requests
 import json
 import logging
-import re
-from config import (
-    NTFY_SERVER, NTFY_TOPIC, NTFY_USER, NTFY_PASS, NTFY_TOKEN, 
-    ENABLE_TDARR, ENABLE_TAPEARR, NTFY_USE_SEPARATE_TOPICS,
-    NTFY_TV_TOPIC, NTFY_MOVIE_TOPIC, NTFY_MUSIC_TOPIC
-)
+import threading
+import time
+from dataclasses import dataclass
+from typing import NamedTuple
+from config import settings as startup_settings
+from health import SendStats
+from instrumentation import timings, endpoint_for_source
+from delivery import SendLimiter
+from policy import PRIORITY_LEVELS, QuietHours, DeferredNotifications
+from subscriptions import SubscriptionMatcher, title_keys
+from events import Source, Stage, Status, MediaType, MediaInfo, SOURCE_MEDIA_TYPES
+from release_parser import parse_release
 
 # Get logger for this module
 logger = logging.getLogger('notifier')
 
-class Notifier:
-    def __init__(self):
-        self.server = NTFY_SERVER
-        self.default_topic = NTFY_TOPIC
-        self.use_separate_topics = NTFY_USE_SEPARATE_TOPICS
-        self.tv_topic = NTFY_TV_TOPIC
-        self.movie_topic = NTFY_MOVIE_TOPIC
-        self.music_topic = NTFY_MUSIC_TOPIC
-        
-        self.auth = None
-        self.auth_header = {}
+# Full process flow; optional stages are removed when their service is disabled
+PROCESS_STAGES = (Stage.SEARCH, Stage.DOWNLOAD, Stage.IMPORT, Stage.LIBRARY, Stage.TRANSCODE, Stage.BACKUP)
+
+# Use emoji to visually indicate progress - these will be put in message body, not headers
+STAGE_EMOJI = {
+    Stage.SEARCH: "🔍",     # Magnifying glass
+    Stage.DOWNLOAD: "⬇️",   # Down arrow
+    Stage.IMPORT: "📥",     # Inbox tray
+    Stage.LIBRARY: "📚",    # Books
+    Stage.TRANSCODE: "🔄",  # Arrows in circle
+    Stage.BACKUP: "💾"      # Floppy disk
+}
+
+UNKNOWN_STAGE_INFO = {"index": -1, "emoji": "⚠️", "progress": "[?/?]"}
+
+# Concise status descriptions for *arr notifications
+ARR_STATUS_DESCRIPTIONS = {
+    Status.MANUAL_INTERACTION: "needs manual interaction",
+    Status.DOWNLOAD_STARTED: "downloading",
+    Status.DOWNLOAD_COMPLETE: "downloaded",
+    Status.IMPORT_COMPLETE: "imported",
+    Status.DOWNLOAD_FAILED: "download failed",
+    Status.IMPORT_FAILED: "import failed",
+    Status.FILE_DELETED: "file deleted"
+}
+
+ARR_STATUS_PRIORITIES = {
+    Status.MANUAL_INTERACTION: "high",
+    Status.DOWNLOAD_STARTED: "low",
+    Status.DOWNLOAD_COMPLETE: "default",
+    Status.IMPORT_COMPLETE: "default",
+    Status.DOWNLOAD_FAILED: "high",
+    Status.IMPORT_FAILED: "high",
+    Status.FILE_DELETED: "default"
+}
+
+# Map *arr status to process flow stage
+ARR_STATUS_STAGES = {
+    Status.MANUAL_INTERACTION: Stage.DOWNLOAD,  # Still in download phase but needs help
+    Status.DOWNLOAD_STARTED: Stage.DOWNLOAD,
+    Status.DOWNLOAD_COMPLETE: Stage.DOWNLOAD,
+    Status.IMPORT_COMPLETE: Stage.IMPORT,
+    Status.DOWNLOAD_FAILED: Stage.DOWNLOAD,
+    Status.IMPORT_FAILED: Stage.IMPORT,
+    Status.FILE_DELETED: Stage.DELETED  # Special stage for deleted files (step 0)
+}
+
+PROCESS_STATUS_PRIORITIES = {
+    Status.STARTED: "low",
+    Status.COMPLETE: "default",
+    Status.ERROR: "high"
+}
+
+# Outbox error recorded for notifications persisted at shutdown (replayed automatically at startup)
+SHUTDOWN_ERROR = "Undelivered at shutdown"
+
+# Map parallel process to stage
+PROCESS_STAGE_MAPPING = {
+    Source.PLEX: Stage.LIBRARY,
+    Source.TDARR: Stage.TRANSCODE,
+    Source.TAPEARR: Stage.BACKUP
+}
+
+class RequestTemplate(NamedTuple):
+    """Prebuilt per-topic request parts: target URL, static headers and JSON body prefix"""
+    url: str
+    headers: dict
+    json_prefix: str
+
+class NtfyRequest(NamedTuple):
+    """A fully built ntfy publish request, ready to be posted"""
+    topic: str
+    url: str
+    body: bytes
+    headers: dict
+    title: str
+    message: str
+    priority: str
+    source: str
+    tags: tuple = ()
+
+@dataclass(frozen=True)
+class NotifierConfig:
+    """
+    Immutable routing/auth snapshot used by the Notifier.
+
+    A new snapshot is built on every reload and swapped in with a single
+    attribute assignment, so in-flight sends keep using the snapshot they started with.
+    Topic and stage lookups are precomputed here so sends only do dict lookups.
+    """
+    server: str
+    default_topic: str
+    use_separate_topics: bool
+    tv_topic: str
+    movie_topic: str
+    music_topic: str
+    auth: tuple
+    auth_header: dict
+    process_stages: tuple
+    total_stages: int
+    enable_tdarr: bool
+    enable_tapearr: bool
+    enable_artwork: bool
+    timeout: float
+    publish_json: bool
+    max_concurrent_sends: int
+    source_topics: dict
+    media_type_topics: dict
+    stage_info: dict
+    templates: dict
+    quiet_hours: object  # QuietHours, or None when not configured
+    subscriptions: object  # SubscriptionMatcher, or None when not configured
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Build a snapshot from a config.Settings instance"""
+        auth = None
+        auth_header = {}
         
         # Use token-based auth if available (preferred)
-        if NTFY_TOKEN:
-            logger.info(f"Using token-based authentication for ntfy server {self.server}")
-            self.auth_header = {"Authorization": f"Bearer {NTFY_TOKEN}"}
+        if settings.ntfy_token:
+            auth_header = {"Authorization": f"Bearer {settings.ntfy_token}"}
         # Fall back to basic auth if no token but username/password provided
-        elif NTFY_USER and NTFY_PASS:
-            logger.info(f"Using username/password authentication for ntfy server {self.server}")
-            self.auth = (NTFY_USER, NTFY_PASS)
+        elif settings.ntfy_user and settings.ntfy_pass:
+            auth = (settings.ntfy_user, settings.ntfy_pass)
+        
+        # Adjust stages based on enabled services
+        process_stages = tuple(
+            stage for stage in PROCESS_STAGES
+            if (stage != Stage.TRANSCODE or settings.enable_tdarr)
+            and (stage != Stage.BACKUP or settings.enable_tapearr)
+        )
+        total_stages = len(process_stages)
+        
+        stage_info = {
+            stage: {"index": i, "emoji": STAGE_EMOJI[stage], "progress": f"[{i + 1}/{total_stages}]"}
+            for i, stage in enumerate(process_stages)
+        }
+        # Special stage that doesn't fit into the normal flow
+        stage_info[Stage.DELETED] = {"index": -1, "emoji": "🗑️", "progress": f"[0/{total_stages}]"}
+        
+        tv, movie, music = settings.ntfy_tv_topic, settings.ntfy_movie_topic, settings.ntfy_music_topic
+        publish_json = settings.ntfy_publish_mode.lower() == "json"
+        
+        subscriptions = (SubscriptionMatcher.load(settings.subscriptions_file)
+                         if settings.subscriptions_file else None)
+        
+        templates = {}
+        configured = (settings.ntfy_topic, tv, movie, music) + (subscriptions.topics if subscriptions else ())
+        for topic in configured:
+            if topic not in templates:
+                templates[topic] = cls.build_template(settings.ntfy_server, topic, auth_header, publish_json)
+        
+        return cls(
+            server=settings.ntfy_server,
+            default_topic=settings.ntfy_topic,
+            use_separate_topics=settings.ntfy_use_separate_topics,
+            tv_topic=tv,
+            movie_topic=movie,
+            music_topic=music,
+            auth=auth,
+            auth_header=auth_header,
+            process_stages=process_stages,
+            total_stages=total_stages,
+            enable_tdarr=settings.enable_tdarr,
+            enable_tapearr=settings.enable_tapearr,
+            enable_artwork=settings.enable_artwork,
+            timeout=settings.ntfy_timeout,
+            publish_json=publish_json,
+            max_concurrent_sends=settings.ntfy_max_concurrent_sends,
+            # Direct mapping for *arr services
+            source_topics={Source.SONARR: tv, Source.RADARR: movie, Source.LIDARR: music},
+            # Plex and our standardized media types
+            media_type_topics={
+                "episode": tv, "show": tv, "series": tv,
+                "movie": movie,
+                "track": music, "music": music, "album": music
+            },
+            stage_info=stage_info,
+            templates=templates,
+            quiet_hours=QuietHours.compile(settings.quiet_hours, settings.quiet_hours_min_priority,
+                                           settings.quiet_hours_topics),
+            subscriptions=subscriptions,
+        )
+    
+    @staticmethod
+    def build_template(server, topic, auth_header, publish_json):
+        """Prebuild the static parts of a publish request for a topic"""
+        if publish_json:
+            # The JSON API publishes to the server root with the topic in the body
+            headers = {"Content-Type": "application/json", **auth_header}
+            return RequestTemplate(server, headers, '{"topic":' + json.dumps(topic) + ",")
+        return RequestTemplate(f"{server}/{topic}", dict(auth_header), "")
+    
+    def template_for(self, topic):
+        """
+        Return the request template for a topic: prebuilt for configured topics, built per call
+        for others (ad-hoc /notify topics aren't cached, so clients can't grow the snapshot)
+        """
+        template = self.templates.get(topic)
+        if template is None:
+            template = self.build_template(self.server, topic, self.auth_header, self.publish_json)
+        return template
+
+class Notifier:
+    """
+    Builds and sends notifications. One instance is shared by every request and all
+    delivery/resend threads: configuration is an immutable snapshot swapped on reload,
+    shared counters and queues have their own locks, and sends to each ntfy server are
+    bounded by a SendLimiter.
+    """
+    def __init__(self, settings=None, outbox=None, history=None, session=None):
+        # The HTTP session (and the requests import behind it) is created on first use
+        # so constructing a Notifier stays cheap at startup. Anything with a requests-style
+        # post() can be passed instead, e.g. a fake transport that records what would be sent.
+        self._session = session
+        self._session_lock = threading.Lock()
+        
+        # Recent send outcomes, used by the readiness check
+        self.stats = SendStats()
+        
+        # Failed sends are persisted here (if set) so they can be inspected and re-sent
+        self.outbox = outbox
+        # Every send is recorded here (if set) for the history query API
+        self.history = history
+        
+        # Notifications held during quiet hours
+        self.deferred = DeferredNotifications()
+        
+        # Requests being posted right now, and whether sends are diverted to the outbox (shutdown)
+        self._sending = {}
+        self._sending_lock = threading.Lock()
+        self._persist_only = False
+        
+        self.config = NotifierConfig.from_settings(settings or startup_settings)
+        # Caps simultaneous requests per ntfy server
+        self.limiter = SendLimiter(self.config.max_concurrent_sends)
+        self._log_config(self.config)
+    
+    def get_session(self):
+        """Return the shared HTTP session, creating it on first use"""
+        session = self._session
+        if session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    # Keep a reusable keep-alive connection for every send the limiter lets through
+                    adapter = HTTPAdapter(pool_maxsize=max(10, self.config.max_concurrent_sends))
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+                session = self._session
+        return session
+    
+    def reload(self, settings, config=None):
+        """
+        Atomically swap in a new configuration snapshot
+        
+        Args:
+            settings: config.Settings instance to build the new snapshot from
+            config: NotifierConfig already built from settings (built here if not given)
+            
+        Returns:
+            The new NotifierConfig
+        """
+        new_config = config or NotifierConfig.from_settings(settings)
+        old_config = self.config
+        self.config = new_config
+        self.limiter.configure(new_config.max_concurrent_sends)
+        
+        if new_config != old_config:
+            logger.info("Notifier configuration reloaded")
+            self._log_config(new_config)
+        else:
+            logger.info("Notifier configuration reloaded (no changes)")
+        return new_config
+    
+    def _log_config(self, config):
+        if config.auth_header:
+            logger.info(f"Using token-based authentication for ntfy server {config.server}")
+        elif config.auth:
+            logger.info(f"Using username/password authentication for ntfy server {config.server}")
         else:
-            logger.info(f"No authentication configured for ntfy server {self.server}")
+            logger.info(f"No authentication configured for ntfy server {config.server}")
         
         # Log topic configuration
-        if self.use_separate_topics:
+        if config.use_separate_topics:
             logger.info("Using separate ntfy topics based on media type:")
-            logger.info(f"TV Shows: {self.tv_topic}")
-            logger.info(f"Movies: {self.movie_topic}")
-            logger.info(f"Music: {self.music_topic}")
+            logger.info(f"TV Shows: {config.tv_topic}")
+            logger.info(f"Movies: {config.movie_topic}")
+            logger.info(f"Music: {config.music_topic}")
         else:
-            logger.info(f"Using single ntfy topic for all notifications: {self.default_topic}")
-        
-        # Define the process flow stages
-        self.process_stages = [
-            "search",      # Prowlarr found the media
-            "download",    # *arr service is downloading
-            "import",      # *arr service has imported
-            "library",     # Plex has added to library
-            "transcode",   # Tdarr is processing (optional)
-            "backup"       # Tapearr is backing up (optional)
-        ]
-        
-        # Special stages that don't fit into the normal flow
-        self.special_stages = {
-            "deleted": {
-                "emoji": "🗑️",  # Trash can emoji
-                "progress": "[0/{total}]"  # Will be formatted with total stages
-            }
-        }
+            logger.info(f"Using single ntfy topic for all notifications: {config.default_topic}")
+        if config.subscriptions is not None:
+            logger.info(f"Also sending to subscribed topics ({config.subscriptions.rule_count} subscription rules)")
         
-        # Adjust stages based on enabled services
-        if not ENABLE_TDARR:
-            self.process_stages.remove("transcode")
-        if not ENABLE_TAPEARR:  
-            self.process_stages.remove("backup")
-            
-        self.total_stages = len(self.process_stages)
-        logger.debug(f"Process flow stages: {self.process_stages} (total: {self.total_stages})")
+        logger.debug(f"Process flow stages: {list(config.process_stages)} (total: {config.total_stages})")
+    
+    # Read-only views of the current snapshot
+    @property
+    def server(self):
+        return self.config.server
+    
+    @property
+    def default_topic(self):
+        return self.config.default_topic
+    
+    @property
+    def process_stages(self):
+        return self.config.process_stages
     
-    def get_topic_for_media_type(self, metadata=None, webhook_source=None):
+    @property
+    def total_stages(self):
+        return self.config.total_stages
+    
+    def get_topic_for_media_type(self, metadata=None, webhook_source=None, config=None):
         """
         Determine which topic to use based on media type in metadata and webhook source
         
         Args:
-            metadata: Dict with media information including media_type
+            metadata: MediaInfo with media information including media_type
             webhook_source: Source of the webhook (sonarr, radarr, lidarr, plex, tdarr, tapearr)
+            config: NotifierConfig snapshot to use (defaults to the current one)
             
         Returns:
             Topic name to use for notification
         """
-        if not self.use_separate_topics:
-            return self.default_topic
+        config = config or self.config
+        if not config.use_separate_topics:
+            return config.default_topic
         
         # Direct mapping for *arr services
         if webhook_source:
-            webhook_source = webhook_source.lower()
-            if webhook_source == "sonarr":
-                return self.tv_topic
-            elif webhook_source == "radarr":
-                return self.movie_topic
-            elif webhook_source == "lidarr":
-                return self.music_topic
+            topic = config.source_topics.get(webhook_source.lower())
+            if topic:
+                return topic
         
         # For tdarr, tapearr, plex, and other services, use metadata
-        if metadata and "media_type" in metadata:
-            media_type = metadata.get("media_type").lower()
-            
-            # Map Plex media types to our standardized types
-            if media_type == "episode" or media_type == "show" or media_type == "series":
-                return self.tv_topic
-            elif media_type == "movie":
-                return self.movie_topic
-            elif media_type == "track" or media_type == "music" or media_type == "album":
-                return self.music_topic
+        if metadata is not None and metadata.media_type:
+            topic = config.media_type_topics.get(metadata.media_type.lower())
+            if topic:
+                return topic
         
         # Default to the general topic if we can't determine media type
-        logger.debug(f"Using default topic due to unknown media type: {metadata.get('media_type') if metadata else 'None'} from source {webhook_source}")
-        return self.default_topic
+        logger.debug(f"Using default topic due to unknown media type: {metadata.media_type if metadata else 'None'} from source {webhook_source}")
+        return config.default_topic
     
-    def get_stage_info(self, stage_name):
+    def get_stage_info(self, stage_name, config=None):
         """Get stage number and emoji for a given stage name"""
-        # Check if this is a special stage outside the normal flow
-        if stage_name in self.special_stages:
-            special_stage = self.special_stages[stage_name]
-            # Format the progress string with the total number of stages
-            progress = special_stage["progress"].format(total=self.total_stages)
-            return {
-                "index": -1,  # Special index for deleted files
-                "emoji": special_stage["emoji"],
-                "progress": progress
-            }
-            
-        try:
-            stage_index = self.process_stages.index(stage_name)
-            # Use emoji to visually indicate progress - these will be put in message body, not headers
-            stage_emoji = {
-                "search": "🔍",    # Magnifying glass
-                "download": "⬇️",   # Down arrow
-                "import": "📥",     # Inbox tray
-                "library": "📚",    # Books
-                "transcode": "🔄",  # Arrows in circle
-                "backup": "💾"      # Floppy disk
-            }.get(stage_name, "⚙️")  # Gear as default
-            
-            return {
-                "index": stage_index,
-                "emoji": stage_emoji,
-                "progress": f"[{stage_index + 1}/{self.total_stages}]"
-            }
-        except ValueError:
-            return {
-                "index": -1, 
-                "emoji": "⚠️", 
-                "progress": "[?/?]"
-            }
+        config = config or self.config
+        return config.stage_info.get(stage_name, UNKNOWN_STAGE_INFO)
     
     def format_media_title(self, title, metadata=None, max_length=60): # was 60
         """
@@ -153,20 +376,21 @@ class Notifier:
         
         Args:
             title: The base media title
-            metadata: Dict with additional metadata (year, season, episode, etc.)
+            metadata: MediaInfo with additional metadata (year, season, episode, etc.)
             max_length: Maximum length for the formatted title
             
         Returns:
             Formatted title suitable for mobile display
         """
-        if not metadata:
+        if metadata is None:
             # Fall back to simple truncation if no metadata
             return title[:max_length-3] + "..." if len(title) > max_length else title
         
         # Format based on media type
-        if metadata.get("media_type") == "movie":
+        media_type = metadata.media_type
+        if media_type == MediaType.MOVIE:
             # For movies: "Title (Year)" or just "Title" if no year
-            year = metadata.get("year")
+            year = metadata.year
             if year:
                 # Always preserve the year, shortening the title if necessary
                 # Reserve 7 chars for " (YYYY)"
@@ -176,10 +400,10 @@ class Notifier:
                 return f"{base_title} ({year})"
             return title[:max_length-3] + "..." if len(title) > max_length else title
             
-        elif metadata.get("media_type") == "series":
+        elif media_type == MediaType.SERIES:
             # For TV: "Title S01E01" or just "Title" if no season/episode
-            season = metadata.get("season")
-            episode = metadata.get("episode")
+            season = metadata.season
+            episode = metadata.episode
             
             # Debug logging to track what values we're receiving
             logger.debug(f"Season: {season} ({type(season)}), Episode: {episode} ({type(episode)})")
@@ -224,10 +448,10 @@ class Notifier:
             
             return title[:max_length-3] + "..." if len(title) > max_length else title
             
-        elif metadata.get("media_type") == "music":
+        elif media_type == MediaType.MUSIC:
             # For music tracks: Ensure we include at least artist info
-            artist = metadata.get("artist")
-            album = metadata.get("album")
+            artist = metadata.artist
+            album = metadata.album
             
             if artist and album:
                 # Check if the title already contains the artist and album info
@@ -254,34 +478,66 @@ class Notifier:
         # Default case for unknown media types
         return title[:max_length-3] + "..." if len(title) > max_length else title
     
-    def send_notification(self, title, message, priority="default", tags=None, file_path=None, stage=None, metadata=None, webhook_source=None):
+    def send_notification(self, title, message, priority="default", tags=None, file_path=None, stage=None, metadata=None, webhook_source=None, sequence_id=None, topic=None, status=None, media_title=None):
         """
         Send notification through ntfy
         
         Priority levels: min, low, default, high, urgent
         Stage: current processing stage (for progress indication)
+        Sequence ID: notifications sharing one replace each other on the phone instead of stacking
+        Topic: publish to this topic instead of the one chosen from the media type/source
+        Status, media title: what subscription rules match on besides source, media type, stage and priority
+        
+        Besides its own topic, the notification is sent to every topic subscribed to it
+        (unless a topic was given explicitly). Returns True if every send succeeded.
         """
+        started = time.perf_counter()
+        endpoint = endpoint_for_source(webhook_source)
+        
+        # Use one configuration snapshot for the whole send, even if a reload happens meanwhile
+        config = self.config
+        request = self.build_request(title, message, priority, tags, file_path, stage, metadata, webhook_source, config,
+                                     sequence_id, topic)
+        requests = [request]
+        if config.subscriptions is not None and topic is None:
+            subscribed = config.subscriptions.match(
+                webhook_source, metadata.media_type if metadata is not None else None, stage, status, priority,
+                title_keys(media_title, metadata)
+            )
+            for subscriber_topic in subscribed:
+                if subscriber_topic != request.topic:
+                    requests.append(self.build_request(title, message, priority, tags, file_path, stage, metadata,
+                                                       webhook_source, config, sequence_id, subscriber_topic))
+        
+        timings.record(endpoint, "format", time.perf_counter() - started)
+        ok = True
+        for request in requests:
+            if config.quiet_hours is not None and config.quiet_hours.holds(request.topic, priority):
+                logger.debug(f"Quiet hours, holding notification for {request.topic}: {title}")
+                self.deferred.add(request)
+                continue
+            ok = self.post_request(request, config, endpoint) and ok
+        return ok
+    
+    def build_request(self, title, message, priority="default", tags=None, file_path=None, stage=None, metadata=None, webhook_source=None, config=None, sequence_id=None, topic=None):
+        """
+        Build the ntfy publish request for a notification without sending it
+        
+        Returns:
+            NtfyRequest
+        """
+        config = config or self.config
+        
         # Determine which topic to use
-        topic = self.get_topic_for_media_type(metadata, webhook_source)
-        url = f"{self.server}/{topic}"
+        topic = topic or self.get_topic_for_media_type(metadata, webhook_source, config=config)
         
         # Get stage information if provided
         stage_info = None
         if stage:
-            stage_info = self.get_stage_info(stage)
+            stage_info = self.get_stage_info(stage, config=config)
             # Only add ASCII progress to title in headers (no emoji)
             title = f"{stage_info['progress']} {title}"
         
-        headers = {
-            "Title": title,
-            "Priority": priority,
-            "Tags": ",".join(tags) if tags else ""
-        }
-        
-        # Add authorization header if using token auth
-        if self.auth_header:
-            headers.update(self.auth_header)
-        
         # Remove file path from notification - we no longer include it in the headers
         # This keeps user's file paths private
         if file_path:
@@ -298,23 +554,178 @@ class Notifier:
             if isinstance(message, str):
                 message = self.format_media_title(message, metadata)
             message = f"{stage_info['emoji']} {message}"
-            
+        
+        # Poster and link added by the pipeline's artwork enrichment
+        attach = click = None
+        if config.enable_artwork and metadata is not None:
+            attach, click = metadata.poster_url, metadata.link_url
+        
+        source = webhook_source.lower() if webhook_source else None
+        return self._encode_request(config, topic, title, message, priority, tags, source, sequence_id, attach, click)
+    
+    def _encode_request(self, config, topic, title, message, priority, tags, source, sequence_id=None, attach=None, click=None):
+        template = config.template_for(topic)
+        if config.publish_json:
+            # Title, tags and priority travel in one compact JSON body; headers are fully static
+            payload = {"title": title, "message": message, "priority": PRIORITY_LEVELS.get(priority, 3)}
+            if tags:
+                payload["tags"] = list(tags)
+            if sequence_id:
+                payload["sequence_id"] = sequence_id
+            if attach:
+                payload["attach"] = attach
+            if click:
+                payload["click"] = click
+            body = template.json_prefix + json.dumps(payload, ensure_ascii=False, separators=(",", ":"))[1:]
+            headers = template.headers
+        else:
+            body = message
+            # Authorization header (token auth) is prebuilt in the template
+            headers = {
+                "Title": title,
+                "Priority": priority,
+                "Tags": ",".join(tags) if tags else "",
+                **template.headers
+            }
+            if sequence_id:
+                headers["X-Sequence-ID"] = sequence_id
+            # Header values must be ASCII; URLs that aren't are left out rather than failing the send
+            if attach and attach.isascii():
+                headers["Attach"] = attach
+            if click and click.isascii():
+                headers["Click"] = click
+        
+        return NtfyRequest(topic, template.url, body.encode("utf-8"), headers, title, message, priority, source,
+                           tuple(tags) if tags else ())
+    
+    def flush_deferred(self, force=False):
+        """
+        Send one summary per topic of the notifications held during quiet hours that have now ended
+        (or of all of them when forced)
+        
+        Returns:
+            Number of held notifications released
+        """
+        config = self.config
+        released = 0
+        quiet_hours = None if force else config.quiet_hours
+        for topic, (held, dropped, priority, tags) in self.deferred.take_released(quiet_hours).items():
+            lines = [f"{title}: {message}" for title, message in held]
+            # Keep the summary well under ntfy's message size limit
+            body, shown = "", 0
+            for line in lines:
+                if len(body) + len(line) > 3500:
+                    break
+                body += line + "\n"
+                shown += 1
+            total = len(held) + dropped
+            if total > shown:
+                body += f"... and {total - shown} more"
+            # As urgent as the most urgent notification held, tagged with every tag they had
+            request = self._encode_request(config, topic, f"Quiet Hours Summary ({total} notifications)",
+                                           body.rstrip("\n"), priority, ["quiet_hours", *tags], None)
+            logger.info(f"Quiet hours ended for {topic}, releasing {total} held notifications")
+            self.post_request(request, config)
+            released += total
+        return released
+    
+    def post_request(self, request, config=None, endpoint=None):
+        """
+        Post a built request to ntfy, storing it in the outbox if it fails
+        
+        Returns:
+            True if ntfy accepted the notification
+        """
+        config = config or self.config
+        if self._persist_only:
+            # Shutting down: store for replay at the next startup instead of sending
+            if self.outbox is not None:
+                self.outbox.add(request, SHUTDOWN_ERROR)
+            return False
+        
+        send_started = time.perf_counter()
+        with self._sending_lock:
+            self._sending[id(request)] = request
+        try:
+            error = self._post(request.url, request.body, request.headers, config)
+        finally:
+            with self._sending_lock:
+                self._sending.pop(id(request), None)
+            if endpoint:
+                timings.record(endpoint, "send", time.perf_counter() - send_started)
+        
+        if self.history is not None:
+            self.history.record(request, error is None)
+        if error is None:
+            logger.debug(f"Notification sent successfully to {request.topic}")
+            return True
+        if self.outbox is not None:
+            self.outbox.add(request, error)
+        return False
+    
+    def persist_undelivered(self, calls):
+        """
+        Store everything not yet delivered in the outbox at shutdown: queued notify calls that
+        never started, notifications held for quiet hours, and sends still in flight (which may
+        then be delivered twice rather than lost)
+        
+        Args:
+            calls: (fn, args, kwargs) calls left in the delivery queue
+        
+        Returns:
+            Number of notifications persisted
+        """
+        if self.outbox is None:
+            if calls:
+                logger.error(f"Outbox is disabled, {len(calls)} queued notifications are lost at shutdown")
+            return 0
+        
+        before = self.outbox.count()
+        self._persist_only = True
+        for fn, args, kwargs in calls:
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                logger.exception(f"Could not persist queued notification: {e}")
+        self.flush_deferred(force=True)
+        with self._sending_lock:
+            in_flight = list(self._sending.values())
+        for request in in_flight:
+            self.outbox.add(request, SHUTDOWN_ERROR)
+        return self.outbox.count() - before
+    
+    def resend(self, url, body, headers):
+        """
+        Re-send a request stored in the outbox using the current credentials
+        
+        Returns:
+            True if ntfy accepted the notification
+        """
+        config = self.config
+        return self._post(url, body, {**headers, **config.auth_header}, config) is None
+    
+    def _post(self, url, body, headers, config):
+        """Post to ntfy and record the outcome; returns None on success or a description of the failure"""
         try:
-            response = requests.post(
+            response = self.limiter.run(
+                url,
+                self.get_session().post,
                 url,
-                data=message,
+                data=body,
                 headers=headers,
-                auth=self.auth
+                auth=config.auth,
+                timeout=config.timeout
             )
-            if response.status_code == 200:
-                logger.debug(f"Notification sent successfully to {topic}")
-                return True
-            else:
-                logger.error(f"Notification failed with status {response.status_code}: {response.text}")
-                return False
         except Exception as e:
             logger.exception(f"Error sending notification: {e}")
-            return False
+            self.stats.record(False)
+            return str(e)
+        if response.status_code == 200:
+            self.stats.record(True)
+            return None
+        logger.error(f"Notification failed with status {response.status_code}: {response.text}")
+        self.stats.record(False)
+        return f"HTTP {response.status_code}: {response.text[:200]}"
     
     def notify_prowlarr_found(self, title, download_type, source="unknown"):
         """
@@ -327,38 +738,27 @@ class Notifier:
         """
         logger.info(f"Notifying: Prowlarr found {title} (source: {source})")
         
-        # Determine media type based on the source application
-        media_type = "unknown"
-        
-        # Set media type based on source application
-        if source.lower() == "sonarr":
-            media_type = "series"
-        elif source.lower() == "radarr":
-            media_type = "movie"
-        elif source.lower() == "lidarr":
-            media_type = "music"
-        else:
-            # Log that we couldn't determine media type from source
-            logger.debug(f"Unknown source '{source}', trying to determine media type from title patterns")
-            
-            # If source doesn't match known apps, fall back to title pattern matching
-            if any(x in title.lower() for x in ["s01e", "season", "episode"]):
-                media_type = "series"
-            elif any(x in title.lower() for x in ["1080p", "720p", "2160p", "bluray", "web-dl"]) and not any(x in title.lower() for x in ["s01e", "season", "episode"]):
-                media_type = "movie"
-            elif any(x in title.lower() for x in ["mp3", "flac", "album", "discography"]):
-                media_type = "music"
+        # The release name carries season/episode/year whatever the source; the
+        # source application, when known, is more reliable for the media type
+        release = parse_release(title)
+        media_type = SOURCE_MEDIA_TYPES.get(source.lower())
+        if media_type is None:
+            logger.debug(f"Unknown source '{source}', using the media type from the release name")
+            media_type = release.media_type
         
-        metadata = {"media_type": media_type}
+        metadata = MediaInfo(media_type=media_type, year=release.year,
+                             season=release.season, episode=release.episode)
         
         return self.send_notification(
             "Media Found",
-            self.format_media_title(title, metadata),
+            title,  # build_request formats it with the metadata
             tags=["search", "prowlarr", download_type, media_type],
             priority="low",
-            stage="search",
+            stage=Stage.SEARCH,
             metadata=metadata,
-            webhook_source="prowlarr"
+            webhook_source=Source.PROWLARR,
+            status=Status.FOUND,
+            media_title=title
         )
     
     def notify_arr_status(self, service, title, status, file_path=None, metadata=None):
@@ -370,58 +770,20 @@ class Notifier:
             title: Media title
             status: Current status
             file_path: Path to the media file (optional)
-            metadata: Additional metadata about the media (optional)
+            metadata: MediaInfo about the media (optional)
         """
-        # Define more concise messages
-        status_descriptions = {
-            "manual_interaction": "needs manual interaction",
-            "download_started": "downloading",
-            "download_complete": "downloaded",
-            "import_complete": "imported",
-            "download_failed": "download failed",
-            "import_failed": "import failed",
-            "file_deleted": "file deleted"
-        }
-        
         # Get the appropriate status description
-        status_desc = status_descriptions.get(status, status.replace('_', ' '))
-        
-        # Set priorities
-        priorities = {
-            "manual_interaction": "high",
-            "download_started": "low",
-            "download_complete": "default",
-            "import_complete": "default",
-            "download_failed": "high",
-            "import_failed": "high",
-            "file_deleted": "default"
-        }
-        
-        # Map status to process flow stage
-        stage_mapping = {
-            "manual_interaction": "download",  # Still in download phase but needs help
-            "download_started": "download",
-            "download_complete": "download",
-            "import_complete": "import",
-            "download_failed": "download",
-            "import_failed": "import",
-            "file_deleted": "deleted"  # Special stage for deleted files (step 0)
-        }
+        status_desc = ARR_STATUS_DESCRIPTIONS.get(status) or status.replace('_', ' ')
         
         # Create a formatted title using available metadata
         formatted_title = self.format_media_title(title, metadata)
         
         # Determine media type from service if not specified in metadata
+        default_media_type = SOURCE_MEDIA_TYPES.get(service)
         if metadata is None:
-            metadata = {}
-        
-        if "media_type" not in metadata:
-            if service == "sonarr":
-                metadata["media_type"] = "series"
-            elif service == "radarr":
-                metadata["media_type"] = "movie"
-            elif service == "lidarr":
-                metadata["media_type"] = "music"
+            metadata = MediaInfo(media_type=default_media_type or MediaType.UNKNOWN)
+        elif metadata.media_type == MediaType.UNKNOWN and default_media_type:
+            metadata = metadata._replace(media_type=default_media_type)
         
         tags = [service, status]
         
@@ -429,15 +791,17 @@ class Notifier:
         return self.send_notification(
             f"{service.capitalize()} {status_desc.title()}",
             formatted_title,
-            priority=priorities.get(status, "default"),
+            priority=ARR_STATUS_PRIORITIES.get(status, "default"),
             tags=tags,
             file_path=file_path,
-            stage=stage_mapping.get(status),
+            stage=ARR_STATUS_STAGES.get(status),
             metadata=metadata,
-            webhook_source=service
+            webhook_source=service,
+            status=status,
+            media_title=title
         )
     
-    def notify_parallel_process(self, process, title, status, error=None, file_path=None, metadata=None):
+    def notify_parallel_process(self, process, title, status, error=None, file_path=None, metadata=None, sequence_id=None):
         """
         Notify about parallel processes
         
@@ -447,42 +811,29 @@ class Notifier:
             status: Current status
             error: Error message if applicable
             file_path: Path to the media file
-            metadata: Additional metadata about the media (optional)
+            metadata: MediaInfo about the media (optional)
+            sequence_id: ntfy sequence ID of an earlier progress notification this one replaces
         """
         # Determine priority
-        if status == "started":
-            priority = "low"
-        elif status == "complete":
-            priority = "default"
-        elif status == "error":
-            priority = "high"
-        else:
-            priority = "default"
+        priority = PROCESS_STATUS_PRIORITIES.get(status, "default")
         
         # Format title with metadata if available
-        if metadata:
-            formatted_message = self.format_media_title(title, metadata)
-        else:
-            formatted_message = self.format_media_title(title)
+        formatted_message = self.format_media_title(title, metadata)
         
         if error:
             # Even shorter for error messages to make room for the error text
-            short_title = self.format_media_title(title, metadata, max_length=40) if metadata else self.format_media_title(title, max_length=40)
+            short_title = self.format_media_title(title, metadata, max_length=40)
             formatted_message = f"{short_title} - Error: {error}"
         
         # Map process to stage
-        process_stage = {
-            "plex": "library",
-            "tdarr": "transcode",
-            "tapearr": "backup"
-        }.get(process.lower())
+        process_stage = PROCESS_STAGE_MAPPING.get(process.lower())
 
         # Create tags list with process and status
         tags = [process, status]
         
         # Add media type to tags if available
-        if metadata and "media_type" in metadata:
-            tags.append(metadata["media_type"])
+        if metadata is not None:
+            tags.append(metadata.media_type)
         
         logger.info(f"Notifying: {process} status {status} for {title}")
         return self.send_notification(
@@ -493,7 +844,46 @@ class Notifier:
             file_path=file_path,
             stage=process_stage,
             metadata=metadata,
-            webhook_source=process
+            webhook_source=process,
+            sequence_id=sequence_id,
+            status=status,
+            media_title=title
+        )
+    
+    def notify_progress(self, process, title, percent, sequence_id, file_path=None, metadata=None):
+        """
+        Notify about the progress of a long-running process (Tdarr transcode, Tapearr backup)
+        
+        Args:
+            process: Process name (tdarr, tapearr)
+            title: Media title
+            percent: Progress percentage (0-100)
+            sequence_id: Stable ntfy sequence ID, so each update replaces the previous one
+            file_path: Path to the media file
+            metadata: MediaInfo about the media (optional)
+        """
+        # ASCII only: in headers mode the title travels in an HTTP header
+        filled = int(percent // 10)
+        bar = "[" + "#" * filled + "-" * (10 - filled) + "]"
+        formatted_message = self.format_media_title(title, metadata)
+        
+        tags = [process, Status.PROGRESS]
+        if metadata is not None:
+            tags.append(metadata.media_type)
+        
+        logger.debug(f"Notifying: {process} progress {percent:.0f}% for {title}")
+        return self.send_notification(
+            f"{process.capitalize()} {bar} {percent:.0f}%",
+            formatted_message,
+            priority="min",
+            tags=tags,
+            file_path=file_path,
+            stage=PROCESS_STAGE_MAPPING.get(process.lower()),
+            metadata=metadata,
+            webhook_source=process,
+            sequence_id=sequence_id,
+            status=Status.PROGRESS,
+            media_title=title
         )
     
     def notify_processing_complete(self, title, file_path=None, metadata=None, webhook_source=None):
@@ -511,7 +901,9 @@ class Notifier:
             file_path=file_path,
             stage=last_stage,
             metadata=metadata,
-            webhook_source=webhook_source
+            webhook_source=webhook_source,
+            status=Status.COMPLETE,
+            media_title=title
         )
     
     def notify_error(self, title, error_message, file_path=None, stage=None, metadata=None, webhook_source=None):
@@ -525,7 +917,9 @@ class Notifier:
             file_path=file_path,
             stage=stage,
             metadata=metadata,
-            webhook_source=webhook_source
+            webhook_source=webhook_source,
+            status=Status.ERROR,
+            media_title=title
         )
     
     def notify_companion_file_update(self, file_type, parent_title, file_path, status, service, error=None):
@@ -0,0 +1,221 @@
+import json
+import logging
+import threading
+import time
+
+from database import connect
+
+# Get logger for this module
+logger = logging.getLogger('outbox')
+
+# Headers that carry credentials are never persisted; they are re-added from the current configuration on resend
+SECRET_HEADERS = ("Authorization",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    topic TEXT NOT NULL,
+    source TEXT,
+    title TEXT,
+    priority TEXT,
+    url TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    last_attempt REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_topic ON outbox (topic, id);
+CREATE INDEX IF NOT EXISTS outbox_source ON outbox (source, id);
+CREATE INDEX IF NOT EXISTS outbox_created ON outbox (created);
+"""
+
+class OutboxBusy(Exception):
+    """Raised when a bulk resend is requested while another one is running"""
+
+class Outbox:
+    """
+    Persisted store of notifications that could not be delivered to ntfy.
+
+    Failed sends are written here by the Notifier; the admin API lists, re-sends
+    or purges them. The SQLite database is opened on first use so startup stays cheap.
+    """
+    def __init__(self, database_url, max_entries=10000):
+        self.database_url = database_url
+        self.max_entries = max_entries
+        self._conn = None
+        self._lock = threading.Lock()
+        self._resend_lock = threading.Lock()
+
+    def _db(self):
+        # Called with self._lock held
+        if self._conn is None:
+            self._conn = connect(self.database_url)
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def add(self, request, error):
+        """
+        Persist a failed request
+
+        Args:
+            request: NtfyRequest that failed
+            error: Description of the failure
+        """
+        headers = {k: v for k, v in request.headers.items() if k not in SECRET_HEADERS}
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._db()
+                with db:
+                    db.execute(
+                        "INSERT INTO outbox (created, topic, source, title, priority, url, headers, body, error, last_attempt) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (now, request.topic, request.source, request.title, request.priority, request.url,
+                         json.dumps(headers), request.body, error, now)
+                    )
+                    # Keep the outbox bounded during long outages by dropping the oldest entries
+                    db.execute(
+                        "DELETE FROM outbox WHERE id <= (SELECT id FROM outbox ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                        (self.max_entries,)
+                    )
+        except Exception as e:
+            logger.exception(f"Could not store failed notification in outbox: {e}")
+
+    @staticmethod
+    def _where(ids=None, topic=None, source=None, since=None, until=None, error=None, before=None):
+        clauses, params = [], []
+        if ids:
+            clauses.append(f"id IN ({','.join('?' * len(ids))})")
+            params.extend(ids)
+        if topic:
+            clauses.append("topic = ?")
+            params.append(topic)
+        if source:
+            clauses.append("source = ?")
+            params.append(source.lower())
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created < ?")
+            params.append(until)
+        if error is not None:
+            clauses.append("error = ?")
+            params.append(error)
+        if before is not None:
+            clauses.append("id < ?")
+            params.append(before)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def list(self, limit=50, cursor=None, **filters):
+        """
+        List stored notifications, newest first
+
+        Args:
+            limit: Maximum number of entries to return
+            cursor: next_cursor from the previous page
+            **filters: ids, topic, source, since, until (unix timestamps), error
+
+        Returns:
+            Dict with "entries", "total" (matching the filters) and "next_cursor" (None on the last page)
+        """
+        where, params = self._where(**filters)
+        page_where, page_params = self._where(before=cursor, **filters)
+        with self._lock:
+            db = self._db()
+            total = db.execute(f"SELECT COUNT(*) FROM outbox{where}", params).fetchone()[0]
+            rows = db.execute(
+                f"SELECT * FROM outbox{page_where} ORDER BY id DESC LIMIT ?", page_params + [limit]
+            ).fetchall()
+        entries = [self._entry(row) for row in rows]
+        next_cursor = entries[-1]["id"] if len(entries) == limit else None
+        return {"entries": entries, "total": total, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _entry(row):
+        return {
+            "id": row["id"],
+            "created": row["created"],
+            "topic": row["topic"],
+            "source": row["source"],
+            "title": row["title"],
+            "priority": row["priority"],
+            "body": bytes(row["body"]).decode("utf-8", errors="replace"),
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "last_attempt": row["last_attempt"]
+        }
+
+    def purge(self, **filters):
+        """Delete stored notifications matching the filters (all of them if none are given)"""
+        where, params = self._where(**filters)
+        with self._lock:
+            db = self._db()
+            with db:
+                deleted = db.execute(f"DELETE FROM outbox{where}", params).rowcount
+        logger.info(f"Purged {deleted} notifications from the outbox")
+        return deleted
+
+    def resend(self, send, limit=100, rate=5.0, max_failures=3, **filters):
+        """
+        Re-send stored notifications, oldest first, at most `rate` per second.
+        Delivered entries are removed; failed ones stay with their attempt count increased.
+        Stops early after `max_failures` consecutive failures (ntfy still down).
+
+        Args:
+            send: Callable(url, body, headers) -> bool that posts one stored request
+            limit: Maximum number of entries to re-send
+            rate: Maximum sends per second
+            **filters: ids, topic, source, since, until, error
+
+        Returns:
+            Dict with counts of sent, failed and remaining entries
+
+        Raises:
+            OutboxBusy: If another resend is running
+        """
+        if not self._resend_lock.acquire(blocking=False):
+            raise OutboxBusy("An outbox resend is already running")
+        try:
+            where, params = self._where(**filters)
+            with self._lock:
+                rows = self._db().execute(
+                    f"SELECT id, url, headers, body FROM outbox{where} ORDER BY id LIMIT ?", params + [limit]
+                ).fetchall()
+
+            interval = 1.0 / rate if rate > 0 else 0.0
+            sent = failed = consecutive_failures = 0
+            for row in rows:
+                started = time.monotonic()
+                ok = send(row["url"], bytes(row["body"]), json.loads(row["headers"]))
+                with self._lock:
+                    db = self._db()
+                    with db:
+                        if ok:
+                            db.execute("DELETE FROM outbox WHERE id = ?", (row["id"],))
+                        else:
+                            db.execute("UPDATE outbox SET attempts = attempts + 1, last_attempt = ? WHERE id = ?",
+                                       (time.time(), row["id"]))
+                if ok:
+                    sent += 1
+                    consecutive_failures = 0
+                else:
+                    failed += 1
+                    consecutive_failures += 1
+                    if consecutive_failures >= max_failures:
+                        logger.warning(f"Stopping outbox resend after {consecutive_failures} consecutive failures")
+                        break
+                remaining_interval = interval - (time.monotonic() - started)
+                if remaining_interval > 0:
+                    time.sleep(remaining_interval)
+        finally:
+            self._resend_lock.release()
+
+        logger.info(f"Outbox resend finished: {sent} sent, {failed} failed")
+        return {"sent": sent, "failed": failed, "remaining": self.count()}
+
+    def count(self):
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
@@ -0,0 +1,161 @@
+import logging
+import time
+
+from adapters import ADAPTERS
+from events import Ignored, MediaInfo, Status, SOURCE_MEDIA_TYPES
+from progress import ProgressTracker
+
+# Get logger for this module
+logger = logging.getLogger('pipeline')
+
+class Pipeline:
+    """
+    Staged webhook event pipeline shared by all sources:
+
+        decode -> normalize -> enrich -> route -> deliver
+
+    Decoding and normalization are done by the per-source adapters registered in
+    adapters.ADAPTERS; everything after normalization operates on Event records
+    and is identical for every source.
+    """
+    def __init__(self, notifier, dispatch, suppressor=None, progress=None, artwork=None, event_log=None):
+        """
+        Args:
+            notifier: Notifier instance that builds and sends notifications
+            dispatch: Callable(fn, *args) that queues a notify call for delivery
+            suppressor: Optional StormSuppressor that drops repeated events
+            progress: ProgressTracker that throttles progress updates (a default one if not given)
+            artwork: ArtworkCache used to add posters and links (a default one if not given)
+            event_log: Optional EventLog that records routed events, so state can be rebuilt after a restart
+        """
+        self.notifier = notifier
+        self.dispatch = dispatch
+        self.suppressor = suppressor
+        self.event_log = event_log
+        if event_log is not None:
+            # Imported only when events are logged, like the default artwork cache below
+            from event_log import encode_event
+            self.encode_event = encode_event
+        self.progress = progress if progress is not None else ProgressTracker()
+        if artwork is None:
+            from artwork import ArtworkCache
+            artwork = ArtworkCache()
+        self.artwork = artwork
+        self.routes = {
+            "search": self.route_search,
+            "arr": self.route_arr,
+            "process": self.route_process
+        }
+
+    def get_adapter(self, source):
+        """Return the adapter registered for a source, or None"""
+        return ADAPTERS.get(source)
+
+    async def handle(self, source, request):
+        """
+        Run a webhook request through the pipeline
+
+        Args:
+            source: Webhook source name (the /webhook/<source> path segment)
+            request: Incoming request
+
+        Returns:
+            Response body dict
+        """
+        adapter = ADAPTERS[source]
+        if adapter.requires and not getattr(self.notifier.config, adapter.requires):
+            return {"status": "disabled", "message": f"{adapter.name} integration is disabled"}
+
+        data = await adapter.decode(request)
+        result = adapter.normalize(data)
+        if isinstance(result, Ignored):
+            return {"status": "success", "message": result.message}
+
+        event = self.enrich(result)
+        # Progress updates repeat by design and are throttled by the route stage instead
+        if (self.suppressor is not None and event.status != Status.PROGRESS
+                and not await self.suppressor.allow(event)):
+            return {"status": "success", "message": f"{adapter.name} webhook suppressed (repeated event)"}
+
+        routed = self.routes[adapter.route](event)
+        if routed is not None:
+            fn, args = routed
+            # Raises HTTPException (503) when the delivery queue is full; the event is then neither
+            # logged nor applied, so the sender's retry finds the same progress step still due
+            self.dispatch(fn, *args)
+
+        # Logged and applied right after routing (no await in between), so a snapshot of the
+        # routed state always covers exactly the events logged so far
+        if self.event_log is not None:
+            self.event_log.append(self.encode_event(event))
+        if adapter.route == "process":
+            self.apply(event, notified=routed is not None)
+        if routed is None:
+            return {"status": "success", "message": f"{adapter.name} progress recorded"}
+        return {"status": "success", "message": f"{adapter.name} webhook processed"}
+
+    def replay(self, event, timestamp):
+        """
+        Re-apply a logged event to the in-memory state after a restart, without notifying
+
+        Args:
+            event: Event read back from the event log
+            timestamp: time.time() the event was logged at
+        """
+        adapter = ADAPTERS.get(event.source)
+        if adapter is None or adapter.route != "process":
+            return
+        if event.status == Status.PROGRESS:
+            now = time.monotonic() - max(0.0, time.time() - timestamp)
+            self.progress.update(event, event.details["progress"], now=now)
+        else:
+            self.progress.finish(event)
+
+    def apply(self, event, notified):
+        """
+        Apply a routed process event to the progress state, once its notification has been queued
+
+        Args:
+            event: Event that was routed
+            notified: Whether a notification was queued for it
+        """
+        if event.status != Status.PROGRESS:
+            self.progress.finish(event)
+        elif notified:
+            self.progress.sent(event, event.details["progress"])
+
+    def enrich(self, event):
+        """Fill in values that can be derived from the event itself"""
+        if event.metadata is None and event.source in SOURCE_MEDIA_TYPES:
+            event = event._replace(metadata=MediaInfo(media_type=SOURCE_MEDIA_TYPES[event.source]))
+        if event.metadata is not None:
+            metadata = self.artwork.enrich(event.metadata)
+            if metadata is not event.metadata:
+                event = event._replace(metadata=metadata)
+        return event
+
+    # Route stage: map an event to the Notifier call that delivers it (None if nothing is sent now).
+    # Routing only reads the progress state; apply() updates it once the call has been queued.
+
+    def route_search(self, event):
+        details = event.details or {}
+        return self.notifier.notify_prowlarr_found, (event.title, details.get("download_type", "torrent"),
+                                                     details.get("origin", "unknown"))
+
+    def route_arr(self, event):
+        return self.notifier.notify_arr_status, (event.source, event.title, event.status,
+                                                 event.file_path, event.metadata)
+
+    def route_process(self, event):
+        if event.status == Status.PROGRESS:
+            percent = event.details["progress"]
+            sequence_id = self.progress.due(event, percent)
+            if sequence_id is None:
+                return None
+            return self.notifier.notify_progress, (event.source, event.title, percent, sequence_id,
+                                                   event.file_path, event.metadata)
+        # A status update for a file with progress notifications replaces the last of them
+        sequence_id = self.progress.sequence_id(event)
+        return self.notifier.notify_parallel_process, (event.source, event.title, event.status,
+                                                       event.error, event.file_path, event.metadata,
+                                                       sequence_id)
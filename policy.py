@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+
+# Get logger for this module
+logger = logging.getLogger('policy')
+
+# ntfy priority names -> numeric levels (also used by the JSON publish API)
+PRIORITY_LEVELS = {"min": 1, "low": 2, "default": 3, "high": 4, "urgent": 5}
+PRIORITY_NAMES = {level: name for name, level in PRIORITY_LEVELS.items()}
+
+MINUTES_PER_DAY = 24 * 60
+
+def parse_window(text):
+    """
+    Parse a "HH:MM-HH:MM" time window (may wrap past midnight)
+
+    Returns:
+        (start_minute, end_minute) of the day
+    """
+    try:
+        start, end = text.split("-")
+        minutes = []
+        for part in (start, end):
+            hours, mins = part.strip().split(":")
+            minute = int(hours) * 60 + int(mins)
+            if not 0 <= minute < MINUTES_PER_DAY:
+                raise ValueError
+            minutes.append(minute)
+    except ValueError:
+        raise ValueError(f"Invalid quiet hours window '{text}', expected HH:MM-HH:MM")
+    return minutes[0], minutes[1]
+
+def _priority_level(name):
+    level = PRIORITY_LEVELS.get(name.strip().lower())
+    if level is None:
+        raise ValueError(f"Invalid priority '{name}', expected one of: {', '.join(PRIORITY_LEVELS)}")
+    return level
+
+def _compile_table(window, min_level):
+    """
+    Build a minute-of-day table: each byte is the lowest priority level delivered
+    immediately during that minute (0 when quiet hours are not in effect)
+    """
+    start, end = parse_window(window)
+    table = bytearray(MINUTES_PER_DAY)
+    minute = start
+    while minute != end:
+        table[minute] = min_level
+        minute = (minute + 1) % MINUTES_PER_DAY
+    return bytes(table)
+
+class QuietHours:
+    """
+    Quiet hours compiled at config load into per-topic minute-of-day lookup tables,
+    so deciding whether to hold a notification is a dict lookup and an index.
+    """
+    __slots__ = ("default", "topics")
+
+    def __init__(self, default, topics):
+        self.default = default  # Table for topics without their own rule (None: no quiet hours)
+        self.topics = topics    # topic -> table (None: topic is never held)
+
+    @classmethod
+    def compile(cls, window, min_priority, topic_rules=""):
+        """
+        Args:
+            window: Default quiet window "HH:MM-HH:MM" ("" for none)
+            min_priority: Lowest priority still delivered during quiet hours
+            topic_rules: Comma-separated per-topic overrides: topic=HH:MM-HH:MM[@priority] or topic=off
+
+        Returns:
+            QuietHours, or None if no quiet hours are configured
+        """
+        default_level = _priority_level(min_priority)
+        default = _compile_table(window, default_level) if window.strip() else None
+
+        topics = {}
+        for rule in filter(None, (r.strip() for r in topic_rules.split(","))):
+            topic, sep, spec = rule.partition("=")
+            if not sep:
+                raise ValueError(f"Invalid quiet hours topic rule '{rule}', expected topic=HH:MM-HH:MM[@priority]")
+            spec = spec.strip()
+            if spec.lower() == "off":
+                topics[topic.strip()] = None
+                continue
+            window_spec, _, priority = spec.partition("@")
+            level = _priority_level(priority) if priority else default_level
+            topics[topic.strip()] = _compile_table(window_spec, level)
+
+        if default is None and not any(topics.values()):
+            return None
+        return cls(default, topics)
+
+    def _table(self, topic):
+        return self.topics[topic] if topic in self.topics else self.default
+
+    @staticmethod
+    def _minute(now=None):
+        t = time.localtime(now)
+        return t.tm_hour * 60 + t.tm_min
+
+    def holds(self, topic, priority, now=None):
+        """Whether a notification should be held until quiet hours end"""
+        table = self._table(topic)
+        if table is None:
+            return False
+        return table[self._minute(now)] > PRIORITY_LEVELS.get(priority, 3)
+
+    def is_quiet(self, topic, now=None):
+        """Whether quiet hours are currently in effect for a topic"""
+        table = self._table(topic)
+        return table is not None and table[self._minute(now)] != 0
+
+class _HeldTopic:
+    __slots__ = ("notifications", "dropped", "level", "tags")
+
+    def __init__(self):
+        self.notifications = []  # (title, message) pairs
+        self.dropped = 0         # Held past max_per_topic, only counted
+        self.level = 0           # Highest priority level held
+        self.tags = {}           # Tags of every held notification, in first-seen order
+
+class DeferredNotifications:
+    """
+    Notifications held during quiet hours, stored per topic as (title, message) pairs along
+    with the highest priority and all the tags held, and released as one summary per topic
+    when quiet hours end.
+    """
+    def __init__(self, max_per_topic=1000):
+        self.max_per_topic = max_per_topic
+        self._held = {}
+        self._lock = threading.Lock()
+
+    def add(self, request):
+        with self._lock:
+            held = self._held.get(request.topic)
+            if held is None:
+                held = self._held[request.topic] = _HeldTopic()
+            if len(held.notifications) < self.max_per_topic:
+                held.notifications.append((request.title, request.message))
+            else:
+                held.dropped += 1
+            held.level = max(held.level, PRIORITY_LEVELS.get(request.priority, 3))
+            held.tags.update(dict.fromkeys(request.tags))
+
+    def pending(self):
+        """Number of held notifications"""
+        with self._lock:
+            return sum(len(held.notifications) + held.dropped for held in self._held.values())
+
+    def take_released(self, quiet_hours, now=None):
+        """
+        Remove and return held notifications for topics whose quiet hours have ended
+
+        Returns:
+            Dict of topic -> (list of (title, message), number dropped because the topic was full,
+            highest priority name held, list of tags held)
+        """
+        released = {}
+        with self._lock:
+            for topic in list(self._held):
+                if quiet_hours is not None and quiet_hours.is_quiet(topic, now):
+                    continue
+                held = self._held.pop(topic)
+                released[topic] = (held.notifications, held.dropped, PRIORITY_NAMES[held.level], list(held.tags))
+        return released
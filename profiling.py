@@ -0,0 +1,177 @@
+import asyncio
+import cProfile
+import io
+import logging
+import marshal
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+# Get logger for this module
+logger = logging.getLogger('profiling')
+
+class ProfilerBusy(Exception):
+    """Raised when a profiling session is requested while another one is running"""
+
+class Profiler:
+    """
+    On-demand profiler for the webhook hot path.
+
+    Modes:
+        cprofile - deterministic profiling of the event loop thread plus every queued
+                   delivery (Notifier methods), merged into one pstats result (on Python
+                   3.12+ the event loop's profile sees all threads by itself)
+        sampling - a background thread samples the stacks of the event loop and delivery
+                   threads at a fixed interval and produces collapsed stacks for flame graphs
+
+    When no session is running the only cost on the hot path is checking `active`.
+    """
+    MODES = ("cprofile", "sampling")
+
+    def __init__(self):
+        self.active = False
+        self.mode = None
+        self.requests_seen = 0
+        self._max_requests = 0
+        self._done = None
+        self._lock = threading.Lock()
+        self._loop_profile = None
+        self._stats = None
+        self._samples = None
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+
+    def start(self, mode, max_requests=0, sample_interval=0.005):
+        """
+        Start a profiling session. Must be called from the event loop thread.
+
+        Args:
+            mode: "cprofile" or "sampling"
+            max_requests: Stop after this many webhook requests (0 for no limit)
+            sample_interval: Seconds between stack samples in sampling mode
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        with self._lock:
+            if self.active:
+                raise ProfilerBusy("A profiling session is already running")
+            self.active = True
+        self.mode = mode
+        self.requests_seen = 0
+        self._max_requests = max_requests
+        self._done = asyncio.Event()
+        self._stats = None
+
+        if mode == "cprofile":
+            self._loop_profile = cProfile.Profile()
+            self._loop_profile.enable()
+        else:
+            self._samples = Counter()
+            self._stop_sampling.clear()
+            self._sampler = threading.Thread(
+                target=self._sample, args=(threading.get_ident(), sample_interval),
+                name="profiler-sampler", daemon=True
+            )
+            self._sampler.start()
+        logger.info(f"Profiling started ({mode}, max requests: {max_requests or 'unlimited'})")
+
+    def count_request(self):
+        """Count a profiled webhook request and end the session once the limit is reached"""
+        self.requests_seen += 1
+        if self._max_requests and self.requests_seen >= self._max_requests:
+            self._done.set()
+
+    async def wait(self, seconds):
+        """Wait until the time limit or request limit is reached"""
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def stop(self, output="text"):
+        """
+        End the session and return the profiling artifact. Must be called from the event loop thread.
+
+        Args:
+            output: For cprofile, "pstats" (binary, loadable with pstats.Stats) or "text"
+
+        Returns:
+            bytes (pstats) or str (text report or collapsed stacks)
+        """
+        try:
+            if self.mode == "cprofile":
+                self._loop_profile.disable()
+                self._add_profile(self._loop_profile)
+                self._loop_profile = None
+                return self._render_stats(output)
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+            return "".join(f"{stack} {count}\n" for stack, count in self._samples.most_common())
+        finally:
+            logger.info(f"Profiling stopped after {self.requests_seen} webhook requests")
+            self.active = False
+
+    def wrap(self, fn):
+        """Wrap a delivery call so it is profiled on its worker thread (cprofile mode only)"""
+        # From Python 3.12 cProfile is built on sys.monitoring: the event loop's profile already
+        # covers every thread, and a second one can't be enabled
+        if self.mode != "cprofile" or sys.version_info >= (3, 12):
+            return fn
+
+        def profiled(*args, **kwargs):
+            if not self.active:
+                return fn(*args, **kwargs)
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is active; never let profiling cost a delivery
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                self._add_profile(profile)
+        return profiled
+
+    def _add_profile(self, profile):
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+
+    def _render_stats(self, output):
+        if self._stats is None:
+            return b"" if output == "pstats" else "No samples collected\n"
+        if output == "pstats":
+            # Same format as pstats.Stats.dump_stats()
+            return marshal.dumps(self._stats.stats)
+        stream = io.StringIO()
+        self._stats.stream = stream
+        self._stats.sort_stats("cumulative").print_stats(60)
+        return stream.getvalue()
+
+    def _sample(self, loop_thread_id, interval):
+        own_id = threading.get_ident()
+        while not self._stop_sampling.wait(interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                name = "event-loop" if thread_id == loop_thread_id else names.get(thread_id, "")
+                if name != "event-loop" and not name.startswith("delivery-"):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(name)
+                self._samples[";".join(reversed(stack))] += 1
+
+# Shared profiler used by the HTTP middleware and the delivery dispatcher
+profiler = Profiler()
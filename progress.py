@@ -0,0 +1,133 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+
+from events import Source
+
+# Get logger for this module
+logger = logging.getLogger('progress')
+
+def sequence_id_for(source, subject):
+    """Stable ntfy sequence ID for one file's notifications (the same across restarts)"""
+    digest = hashlib.sha1(f"{source}:{subject}".encode("utf-8")).hexdigest()[:16]
+    return f"{source}-{digest}"
+
+class _Progress:
+    __slots__ = ("percent", "sent_step", "sent_percent", "sent_at", "sequence_id")
+
+    def __init__(self, sequence_id):
+        self.percent = 0.0
+        self.sent_step = -1
+        self.sent_percent = None
+        self.sent_at = 0.0
+        self.sequence_id = sequence_id
+
+class ProgressTracker:
+    """
+    Latest progress per file for long-running processes, throttled before it reaches ntfy.
+
+    Every progress event only updates the file's entry; a notification is due when the
+    progress crosses the next step (e.g. every 25%) or, if it has changed, once the
+    minimum interval has passed since the last one sent. All notifications for a file share
+    one ntfy sequence ID, so the phone shows a single notification that keeps updating.
+
+    Only used from the event loop thread, so no locking is needed.
+    """
+    def __init__(self, step_percent=25, min_interval=300, max_files=10000):
+        self.max_files = max_files
+        self._files = OrderedDict()
+        self.configure(step_percent, min_interval)
+
+    def configure(self, step_percent, min_interval):
+        self.step = step_percent
+        self.min_interval = min_interval
+
+    def tracked(self):
+        """Number of files with progress being tracked"""
+        return len(self._files)
+
+    def due(self, event, percent, now=None):
+        """
+        Record a progress event and decide whether to notify about it, without counting
+        the notification as sent (see sent())
+
+        Args:
+            event: Progress event
+            percent: Reported progress
+            now: time.monotonic() value the event happened at (replayed events are in the past)
+
+        Returns:
+            The sequence ID to notify with if an update should be sent now, otherwise None
+        """
+        key = (event.source, event.file_path or event.title)
+        entry = self._files.get(key)
+        if entry is None:
+            entry = self._files[key] = _Progress(sequence_id_for(*key))
+            # Bounded: forget the files that haven't reported for the longest time
+            while len(self._files) > self.max_files:
+                self._files.popitem(last=False)
+        else:
+            self._files.move_to_end(key)
+        entry.percent = percent
+
+        now = time.monotonic() if now is None else now
+        step = int(percent // self.step) if self.step else 0
+        due = step > entry.sent_step or (
+            percent != entry.sent_percent and now - entry.sent_at >= self.min_interval
+        )
+        return entry.sequence_id if due else None
+
+    def sent(self, event, percent, now=None):
+        """Count the update for `percent` as sent, so the next one is throttled from here"""
+        entry = self._files.get((event.source, event.file_path or event.title))
+        if entry is None:
+            return
+        step = int(percent // self.step) if self.step else 0
+        entry.sent_step = max(step, entry.sent_step)
+        entry.sent_percent = percent
+        entry.sent_at = time.monotonic() if now is None else now
+
+    def update(self, event, percent, now=None):
+        """
+        Record a progress event and count the update as sent if one is due
+
+        Returns:
+            The sequence ID to notify with if an update should be sent now, otherwise None
+        """
+        sequence_id = self.due(event, percent, now)
+        if sequence_id is not None:
+            self.sent(event, percent, now)
+        return sequence_id
+
+    def sequence_id(self, event):
+        """The sequence ID of a file's progress notifications, or None if none were sent"""
+        entry = self._files.get((event.source, event.file_path or event.title))
+        return entry.sequence_id if entry is not None and entry.sent_percent is not None else None
+
+    def finish(self, event):
+        """
+        Forget a file whose process has ended
+
+        Returns:
+            The sequence ID used for its progress notifications, or None if none were sent
+        """
+        entry = self._files.pop((event.source, event.file_path or event.title), None)
+        return entry.sequence_id if entry is not None and entry.sent_percent is not None else None
+
+    def snapshot(self):
+        """Tracked files as JSON-serializable rows, least recently updated first"""
+        now = time.monotonic()
+        return [[source, subject, entry.percent, entry.sent_step, entry.sent_percent, now - entry.sent_at,
+                 entry.sequence_id] for (source, subject), entry in self._files.items()]
+
+    def restore(self, rows):
+        """Replace the tracked files with rows from snapshot() (taken by this or an earlier process)"""
+        now = time.monotonic()
+        self._files.clear()
+        for source, subject, percent, sent_step, sent_percent, sent_age, sequence_id in rows[-self.max_files:]:
+            entry = self._files[(Source.parse(source), subject)] = _Progress(sequence_id)
+            entry.percent = percent
+            entry.sent_step = sent_step
+            entry.sent_percent = sent_percent
+            entry.sent_at = now - sent_age
@@ -0,0 +1,82 @@
+import re
+from typing import NamedTuple, Optional
+
+from events import MediaType
+
+# Every token the classifier cares about, as one alternation compiled once. Each outer
+# group names the token kind (match.lastgroup); inner groups capture numbers.
+# Tokens must stand alone between separators (". _-[]()" etc.), never inside a word.
+# The name is lowercased once before matching; a case-sensitive pattern is faster than IGNORECASE.
+_TOKENS = r"""
+(?<![a-z0-9])
+(?:
+    (?P<episode>s(?P<ep_season>\d{1,2})[ ._-]?e(?P<ep_episode>\d{1,3})(?:[-_]?e\d{1,3})*)
+  | (?P<cross>(?P<x_season>\d{1,2})x(?P<x_episode>\d{2,3}))
+  | (?P<daily>(?:19|20)\d\d[._-](?:0[1-9]|1[0-2])[._-](?:0[1-9]|[12]\d|3[01]))
+  | (?P<season>s(?P<s_season>\d{1,2})|season[ ._-]?(?P<w_season>\d{1,2})|complete[ ._-]series|miniseries)
+  | (?P<episode_word>(?:episode|ep)[ ._-]?(?P<w_episode>\d{1,3}))
+  | (?P<year>19[2-9]\d|20\d\d)
+  | (?P<resolution>480p|576p|720p|1080[pi]|2160p|4k|uhd)
+  | (?P<video_source>blu-?ray|bd-?rip|br-?rip|bd-?remux|remux|web-?dl|web-?rip|hdtv|pdtv|dvd-?rip|dvd[59r]?|hd-?rip|hdcam|telesync|amzn|nf|dsnp|hmax|atvp)
+  | (?P<codec>x26[45]|h[ .]?26[45]|hevc|avc|xvid|divx|av1|10bit|hdr(?:10)?|dovi)
+  | (?P<video_audio>dts(?:-?hd)?(?:[ .-]?ma)?|truehd|atmos|e?ac3|ddp?(?:[ .]?[257][ .]?[01])?)
+  | (?P<music>flac|mp3|alac|ogg|opus|wav|ape|m4a|lossless|(?:16|24)[ -]?bit|(?:16|24)-(?:44|48|96|192)|320(?:kbps)?|v0|v2|vinyl|discography|album|single|ost|soundtrack|cd[1-9]?|ep)
+)
+(?![a-z0-9])
+"""
+TOKEN_PATTERN = re.compile(_TOKENS, re.VERBOSE)
+
+SERIES_TOKENS = frozenset(("episode", "cross", "daily", "season", "episode_word"))
+VIDEO_TOKENS = frozenset(("resolution", "video_source", "codec", "video_audio"))
+
+class ReleaseInfo(NamedTuple):
+    """What a release name says about the media"""
+    media_type: MediaType
+    season: Optional[int] = None
+    episode: Optional[int] = None
+    year: Optional[int] = None
+    resolution: Optional[str] = None
+
+def parse_release(name):
+    """
+    Classify a release name and extract season/episode/year in a single scan
+
+    Series markers (S01E02, 1x02, season packs, daily dates) win over video quality
+    tokens, which win over audio format tokens (FLAC, MP3, 24bit, ...). A name with
+    none of them is UNKNOWN, even if it contains a year.
+
+    Returns:
+        ReleaseInfo
+    """
+    season = episode = year = resolution = None
+    series = video = music = False
+    for match in TOKEN_PATTERN.finditer(name.lower()):
+        kind = match.lastgroup
+        if kind in SERIES_TOKENS:
+            series = True
+            if season is None:
+                value = (match.group("ep_season") or match.group("x_season")
+                         or match.group("s_season") or match.group("w_season"))
+                season = int(value) if value else None
+            if episode is None:
+                value = match.group("ep_episode") or match.group("x_episode") or match.group("w_episode")
+                episode = int(value) if value else None
+        elif kind == "year":
+            # The last year wins: titles can contain years ("Blade.Runner.2049.2017.1080p")
+            year = int(match.group(kind))
+        elif kind in VIDEO_TOKENS:
+            video = True
+            if kind == "resolution" and resolution is None:
+                resolution = match.group(kind)
+        elif kind == "music":
+            music = True
+
+    if series:
+        media_type = MediaType.SERIES
+    elif video:
+        media_type = MediaType.MOVIE
+    elif music:
+        media_type = MediaType.MUSIC
+    else:
+        media_type = MediaType.UNKNOWN
+    return ReleaseInfo(media_type, season, episode, year, resolution)
@@ -0,0 +1,149 @@
+import base64
+import hashlib
+import hmac
+import logging
+import time
+from array import array
+
+# Get logger for this module
+logger = logging.getLogger('security')
+
+class WebhookAuth:
+    """
+    Shared secrets for webhook sources, checked before a request body is parsed.
+
+    A request proves it knows its source's secret in any of these ways (whichever the
+    sending application supports):
+
+        X-Webhook-Secret: <secret>
+        Authorization: Bearer <secret>
+        Authorization: Basic ...      (any username, the secret as password; *arr webhook settings)
+        ?token=<secret>               (for senders that only take a URL, e.g. Plex)
+        X-Signature-256: sha256=<hex> (HMAC-SHA256 of the raw body with the secret as key)
+
+    All comparisons are constant-time.
+    """
+    def __init__(self, default_secret="", per_source=""):
+        self.configure(default_secret, per_source)
+
+    def configure(self, default_secret="", per_source=""):
+        self.apply(self.parse(default_secret, per_source))
+
+    @staticmethod
+    def parse(default_secret="", per_source=""):
+        """
+        Args:
+            default_secret: Secret for every source without its own (empty: no authentication)
+            per_source: Comma-separated overrides, e.g. "plex=abc,sonarr=def"
+
+        Returns:
+            Secrets table for apply(); raises ValueError on an invalid rule
+        """
+        secrets = {}
+        for rule in filter(None, (r.strip() for r in per_source.split(","))):
+            source, sep, secret = rule.partition("=")
+            if not sep or not secret.strip():
+                raise ValueError(f"Invalid webhook secret '{source.strip()}=...', expected source=secret")
+            secrets[source.strip().lower()] = secret.strip().encode()
+        return (default_secret.encode() or None, secrets)
+
+    def apply(self, secrets):
+        """Swap in a table from parse(); one assignment, so a reload is atomic for requests in flight"""
+        self._secrets = secrets
+
+    def secret_for(self, source):
+        """The secret a source must present, or None if it needs none"""
+        default, secrets = self._secrets
+        return secrets.get(source, default)
+
+    @staticmethod
+    def signature_header(headers):
+        return headers.get("x-signature-256")
+
+    @staticmethod
+    def verify_token(secret, headers, query_params):
+        """Check the secret given in a header or the token query parameter"""
+        candidates = [headers.get("x-webhook-secret"), query_params.get("token")]
+        authorization = headers.get("authorization", "")
+        scheme, _, value = authorization.partition(" ")
+        if scheme.lower() == "bearer":
+            candidates.append(value.strip())
+        elif scheme.lower() == "basic":
+            try:
+                candidates.append(base64.b64decode(value.strip(), validate=True).decode().partition(":")[2])
+            except ValueError:
+                pass
+        ok = False
+        # Check every candidate so the time taken doesn't depend on which one matched
+        for candidate in candidates:
+            if candidate is not None:
+                ok |= hmac.compare_digest(candidate.encode(), secret)
+        return ok
+
+    @staticmethod
+    def verify_signature(secret, body, signature):
+        """Check an X-Signature-256 header ("sha256=<hex>") against the raw body"""
+        expected = "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature.strip().lower().encode(), expected.encode())
+
+class RateLimiter:
+    """
+    Per-client request limit over a sliding window, in fixed memory however many clients there are.
+
+    Request counts are kept in a count-min sketch: two rows of `width` counters for the
+    current window and two for the previous one (64 KB at the default width). A client's
+    count is the smaller of its two counters, weighted across the window boundary like the
+    storm suppression counters. Collisions can only make a client look busier than it is,
+    and need a heavy sender in both of its counters, which the width keeps unlikely; the
+    hash is salted per process, so they can't be planned.
+
+    Only used from the event loop thread, so no locking is needed.
+    """
+    def __init__(self, limit=600, window_seconds=60, width=4096):
+        if width & (width - 1):
+            raise ValueError("width must be a power of two")
+        self.width = width
+        self._mask = width - 1
+        self._window_id = None
+        self._current = self._previous = array("I", bytes(8 * width))
+        self.rejected_total = 0
+        self.configure(limit, window_seconds)
+
+    def configure(self, limit, window_seconds):
+        """
+        Args:
+            limit: Requests allowed per client per window (0 disables the limit)
+            window_seconds: Window length (must be positive)
+        """
+        if not window_seconds > 0:
+            raise ValueError(f"Rate limit window must be positive, got {window_seconds}")
+        self.limit = limit
+        self.window = window_seconds
+
+    def allow(self, client, now=None):
+        """Count a request from `client` (an IP address); False if it is over the limit"""
+        if not self.limit:
+            return True
+        now = time.time() if now is None else now
+        window_id = int(now // self.window)
+        if window_id != self._window_id:
+            self._previous = self._current if window_id == (self._window_id or 0) + 1 else array("I", bytes(8 * self.width))
+            self._current = array("I", bytes(8 * self.width))
+            self._window_id = window_id
+
+        h = hash(client)
+        first, second = h & self._mask, self.width + ((h >> 24) & self._mask)
+        current, previous = self._current, self._previous
+        weight = 1.0 - (now - window_id * self.window) / self.window
+        estimate = min(current[first] + previous[first] * weight, current[second] + previous[second] * weight)
+        if estimate >= self.limit:
+            self.rejected_total += 1
+            return False
+
+        # Conservative update: raise only the counters that are at the minimum
+        count = min(current[first], current[second]) + 1
+        if current[first] < count:
+            current[first] = count
+        if current[second] < count:
+            current[second] = count
+        return True
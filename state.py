@@ -0,0 +1,230 @@
+import logging
+import threading
+import time
+
+from database import connect
+
+# Get logger for this module
+logger = logging.getLogger('state')
+
+class StateBackend:
+    """
+    Key/value state shared by everything that needs to agree across instances
+    (storm suppression counters). Every implementation has the same semantics:
+
+        incr(key, amount, ttl) -> new integer value; a new key starts at 0 and expires after ttl seconds
+        get(key)               -> integer value, or 0 if missing/expired
+        pop(key)               -> integer value (0 if missing), atomically removing the key
+
+    Values are integers. TTLs are set when a key is created and not extended by later writes.
+
+    `in_process` is True when operations never block on I/O, so callers on the event loop
+    can call them directly instead of going through an executor.
+    """
+    in_process = False
+
+    def incr(self, key, amount=1, ttl=None):
+        raise NotImplementedError
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def pop(self, key):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class MemoryState(StateBackend):
+    """State held in this process only (the default; a single instance needs nothing else)"""
+    in_process = True
+
+    def __init__(self, purge_every=10000):
+        self._data = {}  # key -> [value, expires_at or None]
+        self._lock = threading.Lock()
+        self._ops = 0
+        self._purge_every = purge_every
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def _maybe_purge(self, now):
+        # Expired keys are dropped when touched, and swept periodically so idle ones don't pile up
+        self._ops += 1
+        if self._ops >= self._purge_every:
+            self._ops = 0
+            expired = [k for k, (_, expires) in self._data.items() if expires is not None and expires <= now]
+            for key in expired:
+                del self._data[key]
+
+    def incr(self, key, amount=1, ttl=None):
+        now = time.time()
+        with self._lock:
+            self._maybe_purge(now)
+            entry = self._live(key, now)
+            if entry is None:
+                entry = self._data[key] = [0, now + ttl if ttl else None]
+            entry[0] += amount
+            return entry[0]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time.time())
+            return entry[0] if entry is not None else 0
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._live(key, time.time())
+            if entry is None:
+                return 0
+            del self._data[key]
+            return entry[0]
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL,
+    expires REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS state_expires ON state (expires);
+"""
+
+class SQLiteState(StateBackend):
+    """
+    State in a SQLite file, shared by instances on the same host.
+    Each operation is one immediate transaction, so concurrent processes see consistent values.
+    """
+    def __init__(self, database_url, purge_every=10000):
+        self._conn = connect(database_url)
+        self._conn.isolation_level = None  # Transactions are managed explicitly below
+        self._conn.executescript(SQLITE_SCHEMA)
+        self._lock = threading.Lock()
+        self._ops = 0
+        self._purge_every = purge_every
+
+    def _transaction(self, fn):
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                self._ops += 1
+                if self._ops >= self._purge_every:
+                    self._ops = 0
+                    conn.execute("DELETE FROM state WHERE expires <= ?", (now,))
+                result = fn(conn, now)
+                conn.execute("COMMIT")
+                return result
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _live_value(conn, key, now):
+        row = conn.execute("SELECT value, expires FROM state WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= now:
+            conn.execute("DELETE FROM state WHERE key = ?", (key,))
+            return None
+        return row[0]
+
+    def incr(self, key, amount=1, ttl=None):
+        def op(conn, now):
+            value = self._live_value(conn, key, now)
+            if value is None:
+                value = amount
+                conn.execute("INSERT INTO state (key, value, expires) VALUES (?, ?, ?)",
+                             (key, value, now + ttl if ttl else None))
+            else:
+                value += amount
+                conn.execute("UPDATE state SET value = ? WHERE key = ?", (value, key))
+            return value
+        return self._transaction(op)
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM state WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return 0
+        return row[0]
+
+    def pop(self, key):
+        def op(conn, now):
+            value = self._live_value(conn, key, now)
+            if value is None:
+                return 0
+            conn.execute("DELETE FROM state WHERE key = ?", (key,))
+            return value
+        return self._transaction(op)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class RedisState(StateBackend):
+    """
+    State in Redis (or any server speaking the Redis protocol), shared by instances on any host.
+    Requires the optional `redis` package (4.2 or later) and Redis 7 or later.
+    """
+    def __init__(self, url, prefix="mns:", client=None):
+        """
+        Args:
+            url: redis:// URL of the server
+            prefix: Prepended to every key
+            client: Client to use instead of connecting to url (anything with the redis-py API)
+        """
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("STATE_BACKEND=redis requires the redis package (pip install redis)")
+            client = redis.Redis.from_url(url)
+        self._redis = client
+        self._prefix = prefix
+
+    def incr(self, key, amount=1, ttl=None):
+        key = self._prefix + key
+        # One MULTI transaction, so a key can never be left without its TTL; NX makes only the
+        # increment that created the key set it (PEXPIRE NX needs Redis 7)
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.incrby(key, amount)
+        if ttl:
+            pipe.pexpire(key, max(1, int(ttl * 1000)), nx=True)
+        return pipe.execute()[0]
+
+    def get(self, key):
+        value = self._redis.get(self._prefix + key)
+        return int(value) if value is not None else 0
+
+    def pop(self, key):
+        key = self._prefix + key
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.get(key)
+        pipe.delete(key)
+        value = pipe.execute()[0]
+        return int(value) if value is not None else 0
+
+    def close(self):
+        self._redis.close()
+
+def create_state(backend, url=""):
+    """
+    Create the configured state backend
+
+    Args:
+        backend: memory, sqlite or redis
+        url: sqlite:/// URL or redis:// URL (unused for memory)
+    """
+    backend = backend.lower()
+    if backend == "memory":
+        return MemoryState()
+    if backend == "sqlite":
+        return SQLiteState(url)
+    if backend == "redis":
+        return RedisState(url)
+    raise ValueError(f"Unknown state backend: {backend} (expected memory, sqlite or redis)")
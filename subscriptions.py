@@ -0,0 +1,180 @@
+import json
+import logging
+import re
+
+from events import MediaType, Source, Stage, Status
+from policy import PRIORITY_LEVELS
+
+# Get logger for this module
+logger = logging.getLogger('subscriptions')
+
+# Rule fields matched against a notification's value, with the values each accepts (None: any text)
+FIELDS = {
+    "source": {member.value for member in Source},
+    "media_type": {member.value for member in MediaType},
+    "stage": {member.value for member in Stage},
+    "status": {member.value for member in Status},
+    "title": None,
+}
+
+TOPIC_PATTERN = re.compile(r"^[-_A-Za-z0-9]{1,64}$")
+
+def normalize_title(title):
+    """Case- and whitespace-insensitive form used to compare titles"""
+    return " ".join(title.casefold().split())
+
+def title_keys(title, metadata=None):
+    """
+    Titles a notification can be subscribed by: the media title, the series or artist/album
+    from its metadata, and the part before " - " ("Series - Episode" titles without metadata)
+    """
+    keys = set()
+    if title:
+        keys.add(normalize_title(title))
+        head, sep, _ = title.partition(" - ")
+        if sep:
+            keys.add(normalize_title(head))
+    if metadata is not None:
+        for value in (metadata.series_title, metadata.artist, metadata.album):
+            if value:
+                keys.add(normalize_title(value))
+    return keys
+
+class SubscriptionMatcher:
+    """
+    Subscription rules compiled into per-field bitmask indexes, so matching a notification
+    doesn't scan the rules.
+
+    Each rule is one bit. For every field some rule constrains, an index maps each value
+    rules ask for to the bits of those rules, and a wildcard mask holds the rules that don't
+    constrain the field; a minimum priority becomes one mask per priority level. The rules
+    matching a notification are the AND of those masks, which costs a few dict lookups and
+    integer ANDs however many rules there are. Only the matching bits are turned into topics.
+
+    Immutable once compiled; a reload compiles a new one.
+    """
+    __slots__ = ("rule_count", "topics", "indexes", "priority_masks")
+
+    def __init__(self, rule_count, topics, indexes, priority_masks):
+        self.rule_count = rule_count
+        self.topics = topics                  # bit -> topic
+        self.indexes = indexes                # field -> (value -> mask, wildcard mask)
+        self.priority_masks = priority_masks  # priority name -> mask of rules it satisfies
+
+    @classmethod
+    def load(cls, path):
+        """
+        Compile the rules in a JSON file (a list of rule objects)
+
+        Returns:
+            SubscriptionMatcher, or None if the file has no rules
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                rules = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Could not read subscriptions file {path}: {e}")
+        return cls.compile(rules)
+
+    @classmethod
+    def compile(cls, rules):
+        """
+        Args:
+            rules: List of dicts with a "topic" and any of "source", "media_type", "stage",
+                   "status", "title" (a value or list of values, any of which matches) and
+                   "min_priority"; a field left out matches everything
+
+        Returns:
+            SubscriptionMatcher, or None if there are no rules
+        """
+        if not isinstance(rules, list):
+            raise ValueError("Subscriptions must be a list of rules")
+        if not rules:
+            return None
+
+        topics = []
+        values = {field: {} for field in FIELDS}
+        wildcards = dict.fromkeys(FIELDS, 0)
+        min_levels = []
+        for i, rule in enumerate(rules):
+            if not isinstance(rule, dict):
+                raise ValueError(f"Subscription rule {i + 1} is not an object")
+            unknown = set(rule) - set(FIELDS) - {"topic", "min_priority"}
+            if unknown:
+                raise ValueError(f"Subscription rule {i + 1} has unknown fields: {', '.join(sorted(unknown))}")
+            topic = rule.get("topic")
+            if not isinstance(topic, str) or not TOPIC_PATTERN.match(topic):
+                raise ValueError(f"Subscription rule {i + 1} needs a topic of letters, digits, '-' or '_'")
+            topics.append(topic)
+
+            bit = 1 << i
+            for field, allowed in FIELDS.items():
+                wanted = rule.get(field)
+                if wanted is None:
+                    wildcards[field] |= bit
+                    continue
+                for value in (wanted if isinstance(wanted, list) else [wanted]):
+                    if not isinstance(value, str) or not value.strip():
+                        raise ValueError(f"Subscription rule {i + 1}: {field} values must be non-empty strings")
+                    value = normalize_title(value) if allowed is None else value.strip().lower()
+                    if allowed is not None and value not in allowed:
+                        raise ValueError(f"Subscription rule {i + 1}: unknown {field} '{value}', "
+                                         f"expected one of: {', '.join(sorted(allowed))}")
+                    values[field][value] = values[field].get(value, 0) | bit
+
+            min_priority = rule.get("min_priority", "min")
+            level = PRIORITY_LEVELS.get(str(min_priority).strip().lower())
+            if level is None:
+                raise ValueError(f"Subscription rule {i + 1}: invalid min_priority '{min_priority}', "
+                                 f"expected one of: {', '.join(PRIORITY_LEVELS)}")
+            min_levels.append(level)
+
+        every = (1 << len(rules)) - 1
+        # Fields no rule constrains are left out of matching entirely
+        indexes = {field: (values[field], wildcards[field]) for field in FIELDS if wildcards[field] != every}
+        priority_masks = {}
+        for name, level in PRIORITY_LEVELS.items():
+            mask = 0
+            for i, min_level in enumerate(min_levels):
+                if min_level <= level:
+                    mask |= 1 << i
+            priority_masks[name] = mask
+
+        matcher = cls(len(rules), tuple(topics), indexes, priority_masks)
+        logger.info(f"Compiled {len(rules)} subscription rules for {len(set(topics))} topics")
+        return matcher
+
+    def match(self, source=None, media_type=None, stage=None, status=None, priority="default", titles=()):
+        """
+        Topics subscribed to a notification, in rule order without duplicates
+
+        Args:
+            source, media_type, stage, status: The notification's values (None when unknown,
+                which only rules without a condition on that field match)
+            priority: ntfy priority name
+            titles: Normalized titles the notification can be subscribed by (see title_keys)
+        """
+        mask = self.priority_masks.get(priority, self.priority_masks["default"])
+        indexes = self.indexes
+        for field, value in (("source", source), ("media_type", media_type), ("stage", stage), ("status", status)):
+            if not mask:
+                return []
+            index = indexes.get(field)
+            if index is not None:
+                by_value, wildcard = index
+                mask &= (by_value.get(value.lower(), 0) | wildcard) if value else wildcard
+        index = indexes.get("title")
+        if index is not None and mask:
+            by_value, selected = index
+            for key in titles:
+                selected |= by_value.get(key, 0)
+            mask &= selected
+
+        # Set bits are found with str.find on the binary form, linear in the mask size, not per bit
+        topics = {}
+        bits = bin(mask)[:1:-1]
+        i = bits.find("1")
+        while i >= 0:
+            topics[self.topics[i]] = None
+            i = bits.find("1", i + 1)
+        return list(topics)
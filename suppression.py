@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+
+from fastapi import HTTPException
+
+# Get logger for this module
+logger = logging.getLogger('suppression')
+
+class StormSuppressor:
+    """
+    Detects notification storms (the same status for the same media repeated over and over)
+    and collapses them into one summary per interval.
+
+    Each key uses a sliding window counter: the counts of the current and previous fixed
+    windows, with the previous one weighted by how much of it still overlaps the sliding
+    window. That approximates a true sliding window with two counters per key.
+
+    Counters live in the state backend, so instances sharing a backend see one storm.
+    Only the event loop touches the local bookkeeping, so no locking is needed.
+    """
+    def __init__(self, notifier, dispatch, state, threshold=5, window_seconds=60, summary_interval=300,
+                 max_keys=10000):
+        """
+        Args:
+            notifier: Notifier used to send the summaries
+            dispatch: Callable(fn, *args) that queues a notify call for delivery
+            state: StateBackend holding the window counters
+            threshold: Events per window allowed for a key before repeats are suppressed (0 disables)
+            window_seconds: Length of the sliding window
+            summary_interval: Seconds between "repeats suppressed" summaries
+            max_keys: Upper bound on keys with pending summaries in this process
+        """
+        self.notifier = notifier
+        self.dispatch = dispatch
+        self.state = state
+        self.max_keys = max_keys
+        self.suppressed_total = 0
+        # Key -> latest suppressed event, for keys with a summary pending
+        self._suppressed = {}
+        self._task = None
+        self.configure(threshold, window_seconds, summary_interval)
+
+    def configure(self, threshold, window_seconds, summary_interval):
+        self.threshold = threshold
+        self.window = window_seconds
+        self.summary_interval = summary_interval
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def allow(self, event):
+        """
+        Count an event and decide whether it should be delivered
+
+        Returns:
+            False if the event is a repeat within a storm and should be dropped
+        """
+        if not self.threshold:
+            return True
+        key = f"storm:{event.source}:{event.file_path or event.title}:{event.status}"
+        if self.state.in_process:
+            storming = self._count(key)
+        else:
+            # Shared backends do network/disk I/O, keep it off the event loop
+            storming = await asyncio.get_running_loop().run_in_executor(None, self._count, key)
+        if not storming:
+            return True
+
+        if key not in self._suppressed:
+            if len(self._suppressed) >= self.max_keys:
+                return True
+            logger.warning(f"Notification storm from {event.source}: '{event.title}' ({event.status}), "
+                           f"suppressing repeats")
+        self._suppressed[key] = event
+        self.suppressed_total += 1
+        return False
+
+    def _count(self, key):
+        """Count one event for a key; returns True if the key is past the threshold"""
+        now = time.time()
+        window_id, elapsed = divmod(now, self.window)
+        window_id = int(window_id)
+        # Counters live for two windows: their own and the one where they are the previous window
+        current = self.state.incr(f"{key}:{window_id}", ttl=2 * self.window) - 1
+        previous = self.state.get(f"{key}:{window_id - 1}")
+        estimate = previous * (1 - elapsed / self.window) + current
+        if estimate < self.threshold:
+            return False
+        self.state.incr(f"{key}:suppressed", ttl=2 * self.summary_interval)
+        return True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.summary_interval)
+            pending, self._suppressed = self._suppressed, {}
+            try:
+                if self.state.in_process:
+                    rejected = self._send_summaries(pending)
+                else:
+                    rejected = await asyncio.get_running_loop().run_in_executor(None, self._send_summaries, pending)
+            except Exception as e:
+                logger.exception(f"Error sending storm summaries: {e}")
+                continue
+            if rejected:
+                logger.warning(f"Delivery queue full, {len(rejected)} storm summaries deferred to the next interval")
+                # Back on the event loop; a key suppressed again meanwhile keeps its newer event
+                for key, event in rejected.items():
+                    self._suppressed.setdefault(key, event)
+
+    def _send_summaries(self, pending):
+        """
+        Send one summary per key with suppressed repeats since the last flush
+
+        Returns:
+            Dict of key -> event for the summaries the delivery queue rejected (their counts are
+            put back, so they are reported with the next flush)
+        """
+        rejected = {}
+        for key, event in pending.items():
+            # pop() is atomic, so with a shared backend only one instance reports each batch
+            count = self.state.pop(f"{key}:suppressed")
+            if not count:
+                continue
+            try:
+                self.dispatch(
+                    self.notifier.send_notification,
+                    f"{str(event.source).capitalize()} Repeats Suppressed",
+                    f"{event.title}: {count} repeated '{event.status}' notifications suppressed",
+                    "default",
+                    [str(event.source), "storm"],
+                    None,
+                    None,
+                    event.metadata,
+                    event.source
+                )
+            except HTTPException:
+                self.state.incr(f"{key}:suppressed", count, ttl=2 * self.summary_interval)
+                rejected[key] = event
+        return rejected
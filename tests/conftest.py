@@ -0,0 +1,49 @@
+import functools
+
+import pytest
+
+from notifier import Notifier
+from tests.fakes import RecordingSession, make_settings
+
+@pytest.fixture
+def make_notifier():
+    """Factory: make_notifier(**settings overrides) -> (Notifier, RecordingSession)"""
+    def make(**overrides):
+        session = RecordingSession()
+        return Notifier(make_settings(**overrides), session=session), session
+    return make
+
+@pytest.fixture
+def make_service(tmp_path, monkeypatch):
+    """
+    Factory: make_service(**settings overrides) -> (TestClient, RecordingSession)
+
+    Runs the app with its lifespan startup/shutdown, storing the outbox, history and event
+    log under tmp_path and sending through a fake transport. Use the client as a context manager.
+    """
+    from fastapi.testclient import TestClient
+    import main
+    from limits import BodyLimits
+    from security import RateLimiter, WebhookAuth
+
+    def make(**overrides):
+        settings = make_settings(**{
+            "database_url": f"sqlite:///{tmp_path / 'service.db'}",
+            "event_log_dir": str(tmp_path / "events"),
+            "log_file": None,
+            **overrides,
+        })
+        session = RecordingSession()
+        # Logging is left to pytest; everything else is built from these settings
+        monkeypatch.setattr(main, "logging_configured", True)
+        monkeypatch.setattr(main, "startup_settings", settings)
+        monkeypatch.setattr(main, "current_settings", settings)
+        monkeypatch.setattr(main, "load_settings", lambda reload_env=False: settings)
+        monkeypatch.setattr(main, "Notifier", functools.partial(Notifier, settings, session=session))
+        monkeypatch.setattr(main, "webhook_auth", WebhookAuth(settings.webhook_secret, settings.webhook_secrets))
+        monkeypatch.setattr(main, "rate_limiter", RateLimiter(settings.webhook_rate_limit, settings.webhook_rate_window))
+        monkeypatch.setattr(main.body_limits, "_limits",
+                            BodyLimits.parse(settings.max_body_bytes, settings.max_body_bytes_per_source))
+        monkeypatch.setattr(main, "auth_failures", 0)
+        return TestClient(main.app), session
+    return make
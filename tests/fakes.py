@@ -0,0 +1,176 @@
+import dataclasses
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import load_settings
+
+class RecordedRequest:
+    """One request a Notifier would have sent"""
+    def __init__(self, url, data, headers, auth):
+        self.url = url
+        self.body = data.decode("utf-8")
+        self.headers = headers
+        self.auth = auth
+
+    def json(self):
+        return json.loads(self.body)
+
+class _Response:
+    status_code = 200
+    text = "{}"
+
+class RecordingSession:
+    """Fake transport: records every request instead of sending it and answers 200"""
+    def __init__(self):
+        self.requests = []
+
+    def post(self, url, data=None, headers=None, auth=None, timeout=None):
+        self.requests.append(RecordedRequest(url, data, headers, auth))
+        return _Response()
+
+# Everything the requests depend on, pinned so the environment or a .env file can't change them
+PINNED_SETTINGS = dict(
+    ntfy_server="https://ntfy.example", ntfy_topic="media-processing", ntfy_tv_topic="media-tv",
+    ntfy_movie_topic="media-movies", ntfy_music_topic="media-music", ntfy_token="", ntfy_user="", ntfy_pass="",
+    ntfy_publish_mode="headers", ntfy_use_separate_topics=False, enable_tdarr=False, enable_tapearr=False,
+    enable_artwork=True, quiet_hours="", subscriptions_file="",
+)
+
+def make_settings(**overrides):
+    return dataclasses.replace(load_settings(), **{**PINNED_SETTINGS, **overrides})
+
+class FakeNtfy(ThreadingHTTPServer):
+    """
+    Local stand-in for an ntfy server that answers every publish with 200 after `delay`
+    seconds and records it as raw headers + body text, along with a count per Title header
+    and the most publishes it was handling at once. Start it with serve_forever() on a thread.
+    """
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.received = []
+        self.titles = Counter()
+        self.current = 0
+        self.peak = 0
+        super().__init__(("127.0.0.1", 0), _NtfyHandler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def handle_error(self, request, client_address):
+        # Clients that are killed mid-request are expected (the service is restarted under load)
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def seen(self, marker):
+        with self.lock:
+            return any(marker in text for text in self.received)
+
+class _NtfyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.current += 1
+            server.peak = max(server.peak, server.current)
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(server.delay)
+            with server.lock:
+                server.received.append(str(self.headers) + body.decode("utf-8", errors="replace"))
+                server.titles[self.headers.get("Title", "")] += 1
+        finally:
+            with server.lock:
+                server.current -= 1
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def do_GET(self):
+        # /v1/health, polled by the readiness probe
+        body = b'{"healthy":true}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class FakeRedis:
+    """
+    In-process stand-in for the part of the redis-py client RedisState uses: INCRBY, GET,
+    DEL and PEXPIRE (with NX) on integer values, directly or queued in a MULTI pipeline.
+    Values are returned as bytes, like a real server's.
+    """
+    def __init__(self):
+        self._data = {}  # key -> [bytes value, expires_at or None]
+        self._lock = threading.RLock()
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self._data[key]
+            return None
+        return entry
+
+    def incrby(self, key, amount=1):
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                entry = self._data[key] = [b"0", None]
+            entry[0] = str(int(entry[0]) + amount).encode()
+            return int(entry[0])
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry is not None else None
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._live(key) is not None and self._data.pop(key))
+
+    def pexpire(self, key, milliseconds, nx=False):
+        with self._lock:
+            entry = self._live(key)
+            if entry is None or (nx and entry[1] is not None):
+                return False
+            entry[1] = time.time() + milliseconds / 1000
+            return True
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def close(self):
+        pass
+
+class _FakePipeline:
+    """Queues commands and runs them together under the client's lock, like MULTI/EXEC"""
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self._client, name)
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        commands, self._commands = self._commands, []
+        # The client's lock is reentrant, so holding it makes the batch atomic
+        with self._client._lock:
+            return [command(*args, **kwargs) for command, args, kwargs in commands]
@@ -0,0 +1,99 @@
+import pytest
+
+from adapters import ADAPTERS
+from events import Event, Ignored, MediaInfo, MediaType, Source, Status
+
+POSTER = [{"coverType": "banner", "remoteUrl": "https://img.example/banner.jpg"},
+          {"coverType": "poster", "url": "/MediaCover/1/poster.jpg", "remoteUrl": "https://img.example/poster.jpg"}]
+
+def normalize(source, data):
+    return ADAPTERS[source].normalize(data)
+
+def test_every_source_has_an_adapter():
+    assert set(ADAPTERS) == {"prowlarr", "sonarr", "radarr", "lidarr", "tdarr", "tapearr", "plex"}
+    assert {source: adapter.route for source, adapter in ADAPTERS.items()} == {
+        "prowlarr": "search", "sonarr": "arr", "radarr": "arr", "lidarr": "arr",
+        "tdarr": "process", "tapearr": "process", "plex": "process",
+    }
+
+@pytest.mark.parametrize("source", ["prowlarr", "sonarr", "radarr", "lidarr"])
+def test_test_events_are_ignored(source):
+    assert isinstance(normalize(source, {"eventType": "Test"}), Ignored)
+
+def test_prowlarr_grab():
+    event = normalize("prowlarr", {"eventType": "Grab", "source": "Sonarr",
+                                   "release": {"releaseTitle": "Show.S01E02.1080p", "indexer": "nyaa"}})
+    assert event == Event(Source.PROWLARR, Status.FOUND, "Show.S01E02.1080p",
+                          details={"download_type": "nyaa", "origin": "Sonarr"})
+
+def test_sonarr_download():
+    event = normalize("sonarr", {
+        "eventType": "Download",
+        "series": {"title": "Show", "tvdbId": 81189, "imdbId": "", "images": POSTER},
+        "episodes": [{"title": "Pilot", "seasonNumber": 1, "episodeNumber": 1}],
+        "episodeFile": {"path": "/tv/Show/S01E01.mkv"},
+    })
+    assert event == Event(Source.SONARR, Status.IMPORT_COMPLETE, "Show - Pilot", file_path="/tv/Show/S01E01.mkv",
+                          metadata=MediaInfo(media_type=MediaType.SERIES, season=1, episode=1, series_title="Show",
+                                             episode_title="Pilot", tvdb_id=81189,
+                                             poster_url="https://img.example/poster.jpg"))
+
+@pytest.mark.parametrize("data, status", [
+    ({"eventType": "Grab"}, Status.DOWNLOAD_STARTED),
+    ({"eventType": "Download", "isUpgrade": True}, Status.DOWNLOAD_COMPLETE),
+    ({"eventType": "Download", "manualInteraction": True}, Status.MANUAL_INTERACTION),
+    ({"eventType": "ManualInteractionRequired"}, Status.MANUAL_INTERACTION),
+    ({"eventType": "MovieFileDelete", "deleteReason": "Upgrade"}, Status.FILE_DELETED),
+    ({"eventType": "MovieFileDeleted", "deleteReason": "Manual"}, Status.MANUAL_INTERACTION),
+])
+def test_radarr_event_statuses(data, status):
+    event = normalize("radarr", {**data, "movie": {"title": "The Matrix", "year": 1999}})
+    assert (event.status, event.title) == (status, "The Matrix")
+
+def test_radarr_unknown_event_is_ignored():
+    assert normalize("radarr", {"eventType": "Health", "movie": {}}) == Ignored("Event Health not processed")
+
+@pytest.mark.parametrize("data, status, file_path", [
+    ({"eventType": "Download", "trackFiles": [{"path": "/music/01.flac"}]}, Status.IMPORT_COMPLETE, "/music/01.flac"),
+    ({"eventType": "DownloadFailed", "message": "stalled"}, Status.DOWNLOAD_FAILED, None),
+    ({"eventType": "ImportFailed"}, Status.IMPORT_FAILED, None),
+])
+def test_lidarr_events(data, status, file_path):
+    event = normalize("lidarr", {**data, "artist": {"name": "Radiohead"}, "albums": [{"title": "OK Computer"}]})
+    assert (event.source, event.status, event.title, event.file_path) == \
+        (Source.LIDARR, status, "Radiohead - OK Computer", file_path)
+
+@pytest.mark.parametrize("progress, expected", [("42.5", 42.5), (150, 100.0), (-3, 0.0)])
+def test_process_progress_is_clamped(progress, expected):
+    event = normalize("tdarr", {"status": "progress", "title": "Movie", "progress": progress, "media_type": "movie"})
+    assert event.details == {"progress": expected}
+    assert event.metadata == MediaInfo(media_type=MediaType.MOVIE)
+
+@pytest.mark.parametrize("progress", [None, "abc", "nan", "inf"])
+def test_process_progress_without_a_valid_value_is_ignored(progress):
+    assert isinstance(normalize("tapearr", {"status": "progress", "title": "Movie", "progress": progress}), Ignored)
+
+def test_process_status_update():
+    event = normalize("tapearr", {"status": "failed", "title": "Movie", "error": "disk full", "file_path": "/m.mkv"})
+    assert event == Event(Source.TAPEARR, Status.parse("failed"), "Movie", file_path="/m.mkv", error="disk full",
+                          metadata=MediaInfo(media_type=MediaType.UNKNOWN))
+
+def test_plex_new_episode():
+    event = normalize("plex", {"event": "library.new", "Metadata": {
+        "type": "episode", "title": "Pilot", "grandparentTitle": "Show", "parentIndex": 1, "index": 1,
+        "grandparentThumb": "https://img.example/show.jpg",
+        "Media": [{"Part": [{"id": 1}, {"file": "/tv/Show/S01E01.mkv"}]}],
+    }})
+    assert event == Event(Source.PLEX, Status.ADDED, "Show - Pilot", file_path="/tv/Show/S01E01.mkv",
+                          metadata=MediaInfo(media_type=MediaType.SERIES, series_title="Show", season=1, episode=1,
+                                             episode_title="Pilot", poster_url="https://img.example/show.jpg"))
+
+def test_plex_movie_ids_and_private_thumbnails():
+    event = normalize("plex", {"event": "library.new", "Metadata": {
+        "type": "movie", "title": "The Matrix", "year": 1999, "thumb": "/library/metadata/1/thumb",
+        "Guid": [{"id": "imdb://tt0133093"}, {"id": "tmdb://603"}, {"id": "tvdb://abc"}],
+    }})
+    assert event.metadata == MediaInfo(media_type=MediaType.MOVIE, year=1999, imdb_id="tt0133093", tmdb_id=603)
+
+def test_plex_other_events_are_ignored():
+    assert isinstance(normalize("plex", {"event": "media.play"}), Ignored)
@@ -0,0 +1,81 @@
+"""
+Drives one shared Notifier from many delivery workers at once, with outbox-style resends and
+configuration reloads running alongside, against a local fake ntfy server that answers slowly.
+"""
+import queue
+import threading
+from collections import Counter
+
+import pytest
+
+from delivery import DeliveryQueue
+from notifier import Notifier
+from tests.fakes import FakeNtfy, make_settings
+
+SENDS = 1000
+WORKERS = 48
+LIMIT = 6
+QUEUE_SIZE = 100
+NTFY_DELAY = 0.002
+
+@pytest.fixture
+def ntfy():
+    server = FakeNtfy(NTFY_DELAY)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+def test_concurrent_sends_are_bounded_and_exactly_once(ntfy):
+    settings = make_settings(ntfy_server=ntfy.url, ntfy_max_concurrent_sends=LIMIT)
+    notifier = Notifier(settings)
+    delivery = DeliveryQueue(WORKERS, QUEUE_SIZE)
+    delivery.start()
+
+    # Reloads swap the configuration snapshot while sends are running
+    stop = threading.Event()
+    def reloader():
+        while not stop.is_set():
+            notifier.reload(settings)
+            stop.wait(0.01)
+    reload_thread = threading.Thread(target=reloader, daemon=True)
+    reload_thread.start()
+
+    accepted, resends, resent = [], [], []
+    rejected = 0
+    try:
+        for i in range(SENDS):
+            title = f"Stress {i}"
+            if i % 10 == 0:
+                # Stand-in for an outbox resend running on another thread
+                request = notifier.build_request(title, "resend")
+                thread = threading.Thread(target=lambda r=request: resent.append(
+                    notifier.resend(r.url, r.body, r.headers)))
+                thread.start()
+                resends.append(thread)
+                accepted.append(title)
+                continue
+            while True:
+                try:
+                    delivery.submit(notifier.send_notification, title, "stress")
+                    accepted.append(title)
+                    break
+                except queue.Full:
+                    # Backpressure: the sender waits and retries, as a webhook sender would after a 503
+                    rejected += 1
+                    stop.wait(0.001)
+        for thread in resends:
+            thread.join()
+        leftovers = delivery.stop(timeout=60)
+    finally:
+        stop.set()
+        reload_thread.join()
+
+    sent, failed = notifier.stats.totals()
+    received = Counter({title: n for title, n in ntfy.titles.items() if title.startswith("Stress ")})
+    # The limit was reached but never exceeded
+    assert ntfy.peak == LIMIT
+    assert received == Counter(accepted), "notifications missing or duplicated"
+    assert not leftovers
+    assert failed == 0 and all(resent)
+    # The queue is far smaller than the burst, so it must have pushed back
+    assert rejected > 0
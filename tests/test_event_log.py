@@ -0,0 +1,105 @@
+import os
+
+from event_log import EventLog, HEADER, decode_event, encode_event
+from events import Event, MediaInfo, MediaType, Source, Status
+
+def records(log_tail):
+    return [record for _, record in log_tail]
+
+def test_events_survive_a_restart(tmp_path):
+    log = EventLog(str(tmp_path))
+    log.recover()
+    for i in range(3):
+        log.append({"n": i}, timestamp=1000.0 + i)
+    log.close()
+
+    state, tail = EventLog(str(tmp_path)).recover()
+    assert state is None
+    assert tail == [(1000.0, {"n": 0}), (1001.0, {"n": 1}), (1002.0, {"n": 2})]
+
+def test_flushed_events_survive_a_crash(tmp_path):
+    log = EventLog(str(tmp_path))
+    log.recover()
+    log.append({"n": 1})
+    log.flush()
+    # No close(): the process died
+
+    recovered = EventLog(str(tmp_path))
+    assert records(recovered.recover()[1]) == [{"n": 1}]
+    assert recovered.last_seq == 1
+
+def test_recovery_stops_at_a_damaged_record_and_appends_after_the_last_good_one(tmp_path):
+    log = EventLog(str(tmp_path))
+    log.recover()
+    log.append({"n": 1})
+    log.append({"n": 2})
+    log.close()
+    (segment,) = tmp_path.glob("segment-*.log")
+    with open(segment, "r+b") as f:
+        # Flip a byte in the second record's payload
+        f.seek(2 * HEADER.size + len(b'{"n":1}') + 3)
+        f.write(b"9")
+
+    log = EventLog(str(tmp_path))
+    assert records(log.recover()[1]) == [{"n": 1}]
+    log.append({"n": 3})
+    log.close()
+    assert records(EventLog(str(tmp_path)).recover()[1]) == [{"n": 1}, {"n": 3}]
+
+def test_recovery_starts_from_the_newest_snapshot(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=128)
+    log.recover()
+    for i in range(10):
+        log.append({"n": i})
+    log.write_snapshot(8, {"upto": 8})
+    log.append({"n": 10})
+    log.close()
+
+    recovered = EventLog(str(tmp_path))
+    state, tail = recovered.recover()
+    assert state == {"upto": 8}
+    assert records(tail) == [{"n": 8}, {"n": 9}, {"n": 10}]
+    assert recovered.pending() == 3
+
+def test_snapshots_compact_old_segments(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=64, keep_snapshots=1)
+    log.recover()
+    for i in range(20):
+        log.append({"n": i})
+    segments = log.segment_count()
+    log.write_snapshot(20, {"upto": 20})
+    assert log.segment_count() < segments
+    assert len(list(tmp_path.glob("snapshot-*.json"))) == 1
+    log.close()
+    assert EventLog(str(tmp_path)).recover() == ({"upto": 20}, [])
+
+def test_unreadable_snapshot_falls_back_to_the_previous_one(tmp_path):
+    log = EventLog(str(tmp_path))
+    log.recover()
+    for i in range(4):
+        log.append({"n": i})
+        log.write_snapshot(i + 1, {"upto": i + 1})
+    log.close()
+    (tmp_path / f"snapshot-{4:020d}.json").write_text("{truncated")
+
+    state, tail = EventLog(str(tmp_path)).recover()
+    assert state == {"upto": 3}
+    assert records(tail) == [{"n": 3}]
+
+def test_empty_segment_left_by_a_crash_is_removed(tmp_path):
+    log = EventLog(str(tmp_path))
+    log.recover()
+    log.append({"n": 1})
+    log.close()
+    empty = tmp_path / f"segment-{2:020d}.log"
+    empty.touch()
+
+    assert records(EventLog(str(tmp_path)).recover()[1]) == [{"n": 1}]
+    assert not os.path.exists(empty)
+
+def test_event_encoding_round_trips():
+    event = Event(Source.SONARR, Status.IMPORT_COMPLETE, "Show - Pilot", file_path="/tv/show.mkv",
+                  metadata=MediaInfo(media_type=MediaType.SERIES, season=1, episode=1, series_title="Show"))
+    assert decode_event(encode_event(event)) == event
+    progress = Event(Source.TDARR, Status.PROGRESS, "Movie", details={"progress": 42.0})
+    assert decode_event(encode_event(progress)) == progress
@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from history import History
+from notifier import NtfyRequest
+
+def ntfy_request(title, message="", topic="media", source="sonarr"):
+    return NtfyRequest(topic=topic, url=f"https://ntfy.example/{topic}", body=message.encode(), headers={},
+                       title=title, message=message, priority="default", source=source)
+
+@pytest.fixture
+def history(tmp_path):
+    history = History(f"sqlite:///{tmp_path / 'history.db'}", flush_interval=0.05)
+    history.start()
+    yield history
+    history.stop()
+
+def test_recorded_notifications_are_queryable_after_stop(history):
+    history.record(ntfy_request("Breaking Bad", "Ozymandias imported"), delivered=True)
+    history.record(ntfy_request("The Matrix", "Download failed", topic="movies", source="radarr"), delivered=False)
+    history.stop()
+
+    entries = history.query()["entries"]
+    assert [(e["title"], e["topic"], e["delivered"]) for e in entries] == \
+        [("The Matrix", "movies", False), ("Breaking Bad", "media", True)]
+
+def test_query_filters(history):
+    for i in range(3):
+        history.record(ntfy_request(f"Show {i}", "imported", source="sonarr" if i else "radarr"), delivered=bool(i))
+    history.stop()
+
+    assert [e["title"] for e in history.query(q="Show 1")["entries"]] == ["Show 1"]
+    assert [e["title"] for e in history.query(source="RADARR")["entries"]] == ["Show 0"]
+    assert [e["title"] for e in history.query(delivered=False)["entries"]] == ["Show 0"]
+    assert history.query(until=time.time() - 3600)["entries"] == []
+
+def test_query_pages_newest_first(history):
+    for i in range(5):
+        history.record(ntfy_request(f"Show {i}"), delivered=True)
+    history.stop()
+
+    titles, cursor = [], None
+    while True:
+        page = history.query(limit=2, cursor=cursor)
+        titles += [e["title"] for e in page["entries"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert titles == [f"Show {i}" for i in range(4, -1, -1)]
+
+def test_search_text_is_not_parsed_as_a_query(history):
+    history.record(ntfy_request('Say "Hello" OR -world*', "x"), delivered=True)
+    history.stop()
+    assert len(history.query(q='"Hello" OR')["entries"]) == 1
+
+def test_records_are_dropped_rather_than_blocking_when_the_queue_is_full(tmp_path):
+    history = History(f"sqlite:///{tmp_path / 'history.db'}", max_pending=2)
+    for i in range(5):
+        history.record(ntfy_request(f"Show {i}"), delivered=True)
+    assert history.dropped == 3
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from limits import BodyLimits
+
+TEST_EVENT = json.dumps({"eventType": "Test", "padding": "x" * 200}).encode()
+
+def chunks(body, size=64):
+    """Stream a body without a Content-Length (chunked transfer encoding)"""
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+def test_declared_content_length_over_the_limit_is_rejected(make_service):
+    client, _ = make_service(max_body_bytes=100)
+    with client:
+        response = client.post("/webhook/sonarr", content=TEST_EVENT)
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request body exceeds 100 bytes"}
+
+def test_streamed_body_over_the_limit_is_rejected(make_service):
+    client, _ = make_service(max_body_bytes=100)
+    with client:
+        response = client.post("/webhook/sonarr", content=chunks(TEST_EVENT))
+    assert response.status_code == 413
+
+def test_bodies_within_the_limit_are_accepted(make_service):
+    client, _ = make_service(max_body_bytes=len(TEST_EVENT))
+    with client:
+        assert client.post("/webhook/sonarr", content=TEST_EVENT).status_code == 200
+        assert client.post("/webhook/sonarr", content=chunks(TEST_EVENT)).status_code == 200
+
+def test_per_source_limit_overrides_the_default(make_service):
+    client, _ = make_service(max_body_bytes=100, max_body_bytes_per_source=f"radarr={len(TEST_EVENT)}")
+    with client:
+        assert client.post("/webhook/radarr", content=TEST_EVENT).status_code == 200
+        assert client.post("/webhook/sonarr", content=TEST_EVENT).status_code == 413
+
+def test_zero_disables_the_limit(make_service):
+    client, _ = make_service(max_body_bytes=0)
+    with client:
+        assert client.post("/webhook/sonarr", content=TEST_EVENT).status_code == 200
+
+@pytest.mark.parametrize("rules", ["plex", "plex=big", "plex=-1"])
+def test_invalid_per_source_limits_are_rejected(rules):
+    with pytest.raises(ValueError):
+        BodyLimits.parse(1024, rules)
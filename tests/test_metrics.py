@@ -0,0 +1,19 @@
+import re
+
+def metric_types(text):
+    return dict(re.findall(r"^# TYPE (\S+) (\S+)$", text, re.MULTILINE))
+
+def test_totals_are_counters_and_the_rest_gauges(make_service):
+    client, _ = make_service()
+    with client:
+        client.post("/webhook/sonarr", json={"eventType": "Test"})
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    types = metric_types(response.text)
+    assert types["mns_phase_duration_seconds"] == "histogram"
+    for name in ("mns_event_loop_blocked_total", "mns_notifications_suppressed_total",
+                 "mns_webhook_auth_failures_total", "mns_webhook_rate_limited_total"):
+        assert types[name] == "counter"
+    assert {name for name, kind in types.items() if kind == "counter"} == \
+        {name for name in types if name.endswith("_total")}
+    assert types["mns_delivery_queue_depth"] == "gauge"
@@ -0,0 +1,283 @@
+import json
+import time
+
+import pytest
+
+from events import MediaInfo, MediaType, Source, Stage, Status
+from notifier import UNKNOWN_STAGE_INFO
+
+SERIES = MediaInfo(media_type=MediaType.SERIES, season=5, episode=14)
+MOVIE = MediaInfo(media_type=MediaType.MOVIE, year=1999)
+MUSIC = MediaInfo(media_type=MediaType.MUSIC, artist="Radiohead", album="OK Computer")
+
+# When a notification has a stage, build_request formats its message as a media title again,
+# so notify paths that format the title themselves repeat the year or SxxEyy. The tests pin the
+# requests as they are sent today.
+
+@pytest.fixture
+def notifier(make_notifier):
+    return make_notifier()[0]
+
+# format_media_title
+
+@pytest.mark.parametrize("title, metadata, max_length, expected", [
+    ("Short", None, 60, "Short"),
+    ("A" * 70, None, 60, "A" * 57 + "..."),
+    ("The Matrix", MOVIE, 60, "The Matrix (1999)"),
+    ("A" * 70, MOVIE, 60, "A" * 50 + "... (1999)"),
+    ("The Matrix", MediaInfo(media_type=MediaType.MOVIE), 60, "The Matrix"),
+    ("Breaking Bad", SERIES, 60, "Breaking Bad S05E14    "),
+    ("A" * 70, SERIES, 60, "A" * 50 + "... S05E14    "),
+    ("Breaking Bad", MediaInfo(media_type=MediaType.SERIES, season="x", episode=2), 60, "Breaking Bad Sx"),
+    ("Breaking Bad", MediaInfo(media_type=MediaType.SERIES), 60, "Breaking Bad"),
+    ("Paranoid Android", MUSIC, 60, "Radiohead - OK Computer"),
+    ("Radiohead - OK Computer", MUSIC, 60, "Radiohead - OK Computer"),
+    ("Paranoid Android", MediaInfo(media_type=MediaType.MUSIC, artist="Radiohead"), 60,
+     "Radiohead - Paranoid Android"),
+    ("A" * 50, MediaInfo(media_type=MediaType.MUSIC, artist="Radiohead"), 60, "Radiohead..."),
+    ("A" * 70, MediaInfo(media_type=MediaType.UNKNOWN), 40, "A" * 37 + "..."),
+])
+def test_format_media_title(notifier, title, metadata, max_length, expected):
+    assert notifier.format_media_title(title, metadata, max_length) == expected
+
+# get_topic_for_media_type
+
+def test_single_topic_for_everything(notifier):
+    assert notifier.get_topic_for_media_type(SERIES, Source.RADARR) == "media-processing"
+    assert notifier.get_topic_for_media_type(None, None) == "media-processing"
+
+@pytest.mark.parametrize("metadata, source, expected", [
+    (None, "sonarr", "media-tv"),
+    (None, "Radarr", "media-movies"),
+    (None, "lidarr", "media-music"),
+    # The *arr source wins over the metadata
+    (MOVIE, "sonarr", "media-tv"),
+    (SERIES, "plex", "media-tv"),
+    (MediaInfo(media_type="episode"), "plex", "media-tv"),
+    (MediaInfo(media_type="track"), "plex", "media-music"),
+    (MOVIE, "tdarr", "media-movies"),
+    (MUSIC, None, "media-music"),
+    (MediaInfo(media_type=MediaType.UNKNOWN), "tdarr", "media-processing"),
+    (None, "prowlarr", "media-processing"),
+])
+def test_separate_topics(make_notifier, metadata, source, expected):
+    notifier, _ = make_notifier(ntfy_use_separate_topics=True)
+    assert notifier.get_topic_for_media_type(metadata, source) == expected
+
+# get_stage_info
+
+def test_stage_info_without_optional_stages(notifier):
+    assert notifier.get_stage_info(Stage.SEARCH) == {"index": 0, "emoji": "🔍", "progress": "[1/4]"}
+    assert notifier.get_stage_info(Stage.LIBRARY) == {"index": 3, "emoji": "📚", "progress": "[4/4]"}
+    assert notifier.get_stage_info(Stage.DELETED) == {"index": -1, "emoji": "🗑️", "progress": "[0/4]"}
+    assert notifier.get_stage_info(Stage.TRANSCODE) == UNKNOWN_STAGE_INFO
+    assert notifier.get_stage_info("nonsense") == UNKNOWN_STAGE_INFO
+
+def test_stage_info_with_optional_stages(make_notifier):
+    notifier, _ = make_notifier(enable_tdarr=True, enable_tapearr=True)
+    assert notifier.get_stage_info(Stage.TRANSCODE) == {"index": 4, "emoji": "🔄", "progress": "[5/6]"}
+    assert notifier.get_stage_info(Stage.BACKUP) == {"index": 5, "emoji": "💾", "progress": "[6/6]"}
+    assert notifier.get_stage_info(Stage.DELETED)["progress"] == "[0/6]"
+
+def test_stage_info_with_tapearr_only(make_notifier):
+    notifier, _ = make_notifier(enable_tapearr=True)
+    assert notifier.get_stage_info(Stage.BACKUP) == {"index": 4, "emoji": "💾", "progress": "[5/5]"}
+    assert notifier.get_stage_info(Stage.TRANSCODE) == UNKNOWN_STAGE_INFO
+
+# Outgoing requests
+
+def only_request(session):
+    assert len(session.requests) == 1
+    return session.requests[0]
+
+def test_send_notification_headers(make_notifier):
+    notifier, session = make_notifier()
+    assert notifier.send_notification("Hello", "Message", "high", ["a", "b"])
+    request = only_request(session)
+    assert request.url == "https://ntfy.example/media-processing"
+    assert request.headers == {"Title": "Hello", "Priority": "high", "Tags": "a,b"}
+    assert request.body == "Message"
+    assert request.auth is None
+
+def test_send_notification_token_auth(make_notifier):
+    notifier, session = make_notifier(ntfy_token="tk_secret")
+    notifier.send_notification("Hello", "Message")
+    assert only_request(session).headers == {"Title": "Hello", "Priority": "default", "Tags": "",
+                                             "Authorization": "Bearer tk_secret"}
+
+def test_send_notification_basic_auth(make_notifier):
+    notifier, session = make_notifier(ntfy_user="user", ntfy_pass="pass")
+    notifier.send_notification("Hello", "Message")
+    request = only_request(session)
+    assert request.auth == ("user", "pass")
+    assert "Authorization" not in request.headers
+
+def test_send_notification_json(make_notifier):
+    notifier, session = make_notifier(ntfy_publish_mode="json", ntfy_token="tk_secret")
+    notifier.send_notification("Hello", "Amélie", "high", ["a"], sequence_id="seq-1")
+    request = only_request(session)
+    assert request.url == "https://ntfy.example"
+    assert request.headers == {"Content-Type": "application/json", "Authorization": "Bearer tk_secret"}
+    # Compact and not ASCII-escaped
+    assert request.body == ('{"topic":"media-processing","title":"Hello","message":"Amélie","priority":4,'
+                            '"tags":["a"],"sequence_id":"seq-1"}')
+
+def test_send_notification_artwork(make_notifier):
+    metadata = MOVIE._replace(poster_url="https://img.example/p.jpg", link_url="https://www.imdb.com/title/tt1/")
+    notifier, session = make_notifier()
+    notifier.send_notification("Hello", "Message", metadata=metadata)
+    headers = only_request(session).headers
+    assert headers["Attach"] == "https://img.example/p.jpg"
+    assert headers["Click"] == "https://www.imdb.com/title/tt1/"
+
+    notifier, session = make_notifier(enable_artwork=False)
+    notifier.send_notification("Hello", "Message", metadata=metadata)
+    assert "Attach" not in only_request(session).headers
+
+def test_send_notification_to_subscribed_topics(make_notifier, tmp_path):
+    rules = tmp_path / "subscriptions.json"
+    rules.write_text(json.dumps([
+        {"topic": "alice", "title": "Breaking Bad"},
+        {"topic": "admin", "min_priority": "high"},
+    ]))
+    notifier, session = make_notifier(subscriptions_file=str(rules))
+    notifier.notify_arr_status("sonarr", "Breaking Bad", Status.IMPORT_COMPLETE, metadata=SERIES)
+    assert [r.url for r in session.requests] == ["https://ntfy.example/media-processing", "https://ntfy.example/alice"]
+    assert session.requests[0].body == session.requests[1].body
+
+    notifier.notify_arr_status("radarr", "The Matrix", Status.DOWNLOAD_FAILED, metadata=MOVIE)
+    assert [r.url for r in session.requests[2:]] == ["https://ntfy.example/media-processing",
+                                                     "https://ntfy.example/admin"]
+
+@pytest.mark.parametrize("source, release, expected_url, expected_tags, expected_body", [
+    ("Sonarr", "Some.Show.S02E05.1080p.WEB-DL", "https://ntfy.example/media-tv",
+     "search,prowlarr,torrent,series", "🔍 Some.Show.S02E05.1080p.WEB-DL S02E05    "),
+    ("radarr", "Some.Release.2019.1080p", "https://ntfy.example/media-movies",
+     "search,prowlarr,torrent,movie", "🔍 Some.Release.2019.1080p (2019)"),
+    # Unknown source: the release name decides
+    ("unknown", "Radiohead - OK Computer (1997) [FLAC]", "https://ntfy.example/media-music",
+     "search,prowlarr,torrent,music", "🔍 Radiohead - OK Computer (1997) [FLAC]"),
+])
+def test_notify_prowlarr_found(make_notifier, source, release, expected_url, expected_tags, expected_body):
+    notifier, session = make_notifier(ntfy_use_separate_topics=True)
+    notifier.notify_prowlarr_found(release, "torrent", source)
+    request = only_request(session)
+    # Prowlarr itself isn't an *arr source, so the topic comes from the media type
+    assert request.url == expected_url
+    assert request.headers == {"Title": "[1/4] Media Found", "Priority": "low", "Tags": expected_tags}
+    assert request.body == expected_body
+
+def test_notify_prowlarr_found_metadata_from_release_name(make_notifier, monkeypatch):
+    notifier, _ = make_notifier()
+    sent = []
+    monkeypatch.setattr(notifier, "send_notification", lambda *args, **kwargs: sent.append(kwargs))
+    notifier.notify_prowlarr_found("Some.Show.S02E05.2019.1080p.WEB-DL", "torrent", "sonarr")
+    metadata = sent[0]["metadata"]
+    assert (metadata.media_type, metadata.season, metadata.episode, metadata.year) == (MediaType.SERIES, 2, 5, 2019)
+
+def test_notify_arr_status(make_notifier):
+    notifier, session = make_notifier(ntfy_use_separate_topics=True)
+    notifier.notify_arr_status("sonarr", "Breaking Bad", Status.IMPORT_COMPLETE, "/tv/bb.mkv", SERIES)
+    request = only_request(session)
+    assert request.url == "https://ntfy.example/media-tv"
+    assert request.headers == {"Title": "[3/4] Sonarr Imported", "Priority": "default",
+                               "Tags": "sonarr,import_complete"}
+    assert request.body == "📥 Breaking Bad S05E14     S05E14    "
+    assert "/tv/bb.mkv" not in request.body and "/tv/bb.mkv" not in str(request.headers)
+
+@pytest.mark.parametrize("status, expected_title, expected_priority", [
+    (Status.DOWNLOAD_STARTED, "[2/4] Radarr Downloading", "low"),
+    (Status.DOWNLOAD_FAILED, "[2/4] Radarr Download Failed", "high"),
+    (Status.MANUAL_INTERACTION, "[2/4] Radarr Needs Manual Interaction", "high"),
+    (Status.FILE_DELETED, "[0/4] Radarr File Deleted", "default"),
+])
+def test_notify_arr_status_stages(make_notifier, status, expected_title, expected_priority):
+    notifier, session = make_notifier()
+    notifier.notify_arr_status("radarr", "The Matrix", status, metadata=MOVIE)
+    request = only_request(session)
+    assert request.headers == {"Title": expected_title, "Priority": expected_priority, "Tags": f"radarr,{status}"}
+    assert request.body.endswith(" The Matrix (1999) (1999)")
+
+def test_notify_arr_status_without_metadata_uses_service_media_type(make_notifier):
+    notifier, session = make_notifier(ntfy_use_separate_topics=True)
+    notifier.notify_arr_status("lidarr", "OK Computer", Status.IMPORT_COMPLETE)
+    request = only_request(session)
+    assert request.url == "https://ntfy.example/media-music"
+    assert request.body == "📥 OK Computer"
+
+def test_notify_parallel_process(make_notifier):
+    notifier, session = make_notifier(enable_tdarr=True)
+    notifier.notify_parallel_process("tdarr", "The Matrix", Status.STARTED, file_path="/movies/m.mkv",
+                                     metadata=MOVIE, sequence_id="tdarr-1")
+    request = only_request(session)
+    assert request.url == "https://ntfy.example/media-processing"
+    assert request.headers == {"Title": "[5/5] Tdarr started", "Priority": "low", "Tags": "tdarr,started,movie",
+                               "X-Sequence-ID": "tdarr-1"}
+    assert request.body == "🔄 The Matrix (1999) (1999)"
+
+def test_notify_parallel_process_error(make_notifier):
+    notifier, session = make_notifier()
+    notifier.notify_parallel_process("plex", "The Matrix", Status.ERROR, error="boom")
+    request = only_request(session)
+    assert request.headers == {"Title": "[4/4] Plex error", "Priority": "high", "Tags": "plex,error"}
+    assert request.body == "📚 The Matrix - Error: boom"
+
+def test_notify_progress(make_notifier):
+    notifier, session = make_notifier(enable_tdarr=True)
+    notifier.notify_progress("tdarr", "The Matrix", 42.5, "tdarr-1", metadata=MOVIE)
+    request = only_request(session)
+    assert request.headers == {"Title": "[5/5] Tdarr [####------] 42%", "Priority": "min",
+                               "Tags": "tdarr,progress,movie", "X-Sequence-ID": "tdarr-1"}
+    assert request.body == "🔄 The Matrix (1999) (1999)"
+
+def test_notify_progress_json(make_notifier):
+    notifier, session = make_notifier(enable_tapearr=True, ntfy_publish_mode="json")
+    notifier.notify_progress("tapearr", "The Matrix", 100, "tapearr-1")
+    assert only_request(session).json() == {
+        "topic": "media-processing", "title": "[5/5] Tapearr [##########] 100%", "message": "💾 The Matrix",
+        "priority": 1, "tags": ["tapearr", "progress"], "sequence_id": "tapearr-1",
+    }
+
+def test_notify_processing_complete(make_notifier):
+    notifier, session = make_notifier(enable_tdarr=True, enable_tapearr=True)
+    notifier.notify_processing_complete("The Matrix", metadata=MOVIE, webhook_source="tapearr")
+    request = only_request(session)
+    assert request.headers == {"Title": "[6/6] Processing Complete", "Priority": "default",
+                               "Tags": "complete,success"}
+    assert request.body == "💾 The Matrix (1999)"
+
+def test_notify_error(make_notifier):
+    notifier, session = make_notifier()
+    notifier.notify_error("The Matrix", "disk full", stage=Stage.IMPORT, webhook_source="radarr")
+    request = only_request(session)
+    assert request.headers == {"Title": "[3/4] Processing Error", "Priority": "urgent", "Tags": "error"}
+    assert request.body == "📥 The Matrix: disk full"
+
+def test_notify_error_without_stage(make_notifier):
+    notifier, session = make_notifier()
+    notifier.notify_error("The Matrix", "disk full")
+    request = only_request(session)
+    assert request.headers == {"Title": "Processing Error", "Priority": "urgent", "Tags": "error"}
+    assert request.body == "The Matrix: disk full"
+
+def test_notify_companion_file_update_sends_nothing(make_notifier):
+    notifier, session = make_notifier()
+    notifier.notify_companion_file_update("subtitle", "The Matrix", "/movies/m.en.srt", "added", "radarr")
+    assert session.requests == []
+
+def test_quiet_hours_summary_keeps_the_highest_priority_and_all_tags(make_notifier):
+    # A window around the current time, so the notifications below are held
+    now = time.localtime()
+    start = (now.tm_hour * 60 + now.tm_min - 60) % (24 * 60)
+    window = f"{start // 60:02d}:{start % 60:02d}-{(start + 120) // 60 % 24:02d}:{(start + 120) % 60:02d}"
+    notifier, session = make_notifier(quiet_hours=window, quiet_hours_min_priority="urgent")
+    notifier.send_notification("Grabbed", "The Matrix", "low", ["radarr"])
+    notifier.send_notification("Failed", "Breaking Bad", "high", ["sonarr", "radarr"])
+    assert session.requests == []
+
+    assert notifier.flush_deferred(force=True) == 2
+    request = only_request(session)
+    assert request.headers["Title"] == "Quiet Hours Summary (2 notifications)"
+    assert request.headers["Priority"] == "high"
+    assert request.headers["Tags"] == "quiet_hours,radarr,sonarr"
+    assert request.body == "Grabbed: The Matrix\nFailed: Breaking Bad"
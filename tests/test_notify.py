@@ -0,0 +1,30 @@
+import pytest
+
+@pytest.mark.parametrize("priority", ["min", "low", "default", "high", "urgent"])
+def test_single_notification(make_service, priority):
+    client, session = make_service()
+    with client:
+        response = client.post("/notify", params={"title": "Backup", "message": "done", "priority": priority,
+                                                  "tags": "backup,nas"})
+    assert response.status_code == 200
+    (request,) = session.requests
+    assert request.headers["Priority"] == priority
+    assert request.headers["Tags"] == "backup,nas"
+
+@pytest.mark.parametrize("params", [
+    {"title": "Backup", "message": "done", "priority": "loud"},
+    {"title": "Backup", "message": "done", "priority": "5"},
+    {"title": "Backup"},
+])
+def test_invalid_single_notification_is_rejected(make_service, params):
+    client, session = make_service()
+    with client:
+        assert client.post("/notify", params=params).status_code == 422
+    assert session.requests == []
+
+def test_batch_rejects_an_invalid_priority(make_service):
+    client, session = make_service()
+    with client:
+        response = client.post("/notify", json=[{"title": "Backup", "message": "done", "priority": "loud"}])
+    assert response.status_code == 422
+    assert session.requests == []
@@ -0,0 +1,44 @@
+import logging
+
+import pytest
+
+from events import MediaInfo, MediaType, Stage, Status
+
+SERIES = MediaInfo(media_type=MediaType.SERIES, season=5, episode=14)
+MOVIE = MediaInfo(media_type=MediaType.MOVIE, year=1999, imdb_id="tt0133093")
+TITLE = "The Extremely Long Title Of A Show That Goes On And On Forever"
+
+# Notify path -> (method name, args)
+PATHS = {
+    "send_notification": ("send_notification", ("Hello", "Message", "high", ["a", "b"])),
+    "notify_prowlarr_found": ("notify_prowlarr_found", (TITLE + ".S01E02.1080p", "torrent", "unknown")),
+    "notify_arr_status": ("notify_arr_status", ("sonarr", TITLE, Status.IMPORT_COMPLETE, "/tv/file.mkv", SERIES)),
+    "notify_parallel_process": ("notify_parallel_process",
+                                ("tdarr", TITLE, Status.STARTED, None, "/movies/file.mkv", MOVIE, "tdarr-1")),
+    "notify_progress": ("notify_progress", ("tdarr", TITLE, 42.5, "tdarr-1", "/movies/file.mkv", MOVIE)),
+    "notify_processing_complete": ("notify_processing_complete", (TITLE, None, MOVIE, "plex")),
+    "notify_error": ("notify_error", (TITLE, "Something failed", None, Stage.IMPORT, SERIES, "sonarr")),
+    "notify_companion_file_update": ("notify_companion_file_update",
+                                     ("subtitle", TITLE, "/tv/file.en.srt", "added", "sonarr")),
+}
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    # The notify paths log every call; keep that out of the measurement
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+@pytest.mark.parametrize("publish_mode", ["headers", "json"])
+@pytest.mark.parametrize("path", PATHS)
+def test_notify_path(benchmark, make_notifier, path, publish_mode):
+    notifier, session = make_notifier(ntfy_use_separate_topics=True, enable_tdarr=True, ntfy_publish_mode=publish_mode)
+    method, args = PATHS[path]
+    benchmark(getattr(notifier, method), *args)
+
+    # Every round must have sent the same request
+    sent = {(r.url, r.body, tuple(sorted(r.headers.items())), r.auth) for r in session.requests}
+    if path == "notify_companion_file_update":
+        assert not sent
+    else:
+        assert len(sent) == 1 and session.requests
@@ -0,0 +1,58 @@
+import pytest
+
+from notifier import NtfyRequest
+from outbox import Outbox, OutboxBusy
+
+def ntfy_request(i, topic="media", source="sonarr"):
+    return NtfyRequest(topic=topic, url=f"https://ntfy.example/{topic}", body=f"message {i}".encode(),
+                       headers={"Title": f"title {i}", "Authorization": "Bearer secret"},
+                       title=f"title {i}", message=f"message {i}", priority="default", source=source)
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(f"sqlite:///{tmp_path / 'outbox.db'}", max_entries=5)
+
+def test_failed_requests_are_stored_without_credentials(outbox):
+    outbox.add(ntfy_request(1), "timeout")
+    sent = []
+    outbox.resend(lambda url, body, headers: sent.append((url, body, headers)) or True, rate=0)
+    assert sent == [("https://ntfy.example/media", b"message 1", {"Title": "title 1"})]
+    assert outbox.count() == 0
+
+def test_oldest_entries_are_dropped_when_full(outbox):
+    for i in range(8):
+        outbox.add(ntfy_request(i), "timeout")
+    assert [entry["title"] for entry in outbox.list()["entries"]] == [f"title {i}" for i in range(7, 2, -1)]
+
+def test_list_filters_and_pages(outbox):
+    for i in range(4):
+        outbox.add(ntfy_request(i, topic="tv" if i % 2 else "movies"), "timeout")
+    first = outbox.list(limit=1, topic="tv")
+    assert (first["total"], [e["title"] for e in first["entries"]]) == (2, ["title 3"])
+    second = outbox.list(limit=1, cursor=first["next_cursor"], topic="tv")
+    assert [e["title"] for e in second["entries"]] == ["title 1"]
+    assert outbox.list(source="SONARR")["total"] == 4
+
+def test_resend_keeps_failures_and_stops_when_ntfy_is_down(outbox):
+    for i in range(5):
+        outbox.add(ntfy_request(i), "timeout")
+    result = outbox.resend(lambda url, body, headers: body == b"message 0", rate=0, max_failures=2)
+    assert result == {"sent": 1, "failed": 2, "remaining": 4}
+    attempts = sorted(entry["attempts"] for entry in outbox.list()["entries"])
+    assert attempts == [1, 1, 2, 2]
+
+def test_only_one_resend_runs_at_a_time(outbox):
+    outbox.add(ntfy_request(1), "timeout")
+
+    def send(url, body, headers):
+        with pytest.raises(OutboxBusy):
+            outbox.resend(send)
+        return True
+    assert outbox.resend(send, rate=0)["sent"] == 1
+
+def test_purge(outbox):
+    outbox.add(ntfy_request(1, topic="tv"), "timeout")
+    outbox.add(ntfy_request(2, topic="movies"), "HTTP 500")
+    assert outbox.purge(error="HTTP 500") == 1
+    assert outbox.purge() == 1
+    assert outbox.count() == 0
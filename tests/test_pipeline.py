@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from event_log import EventLog
+from pipeline import Pipeline
+
+class JSONRequest:
+    """The part of a Starlette request the JSON adapters read"""
+    def __init__(self, data):
+        self.data = data
+
+    async def json(self):
+        return self.data
+
+class Dispatch:
+    """Records dispatch(fn, *args) calls; raises 503 like a full delivery queue while `full` is set"""
+    def __init__(self):
+        self.full = False
+        self.calls = []
+
+    def __call__(self, fn, *args):
+        if self.full:
+            raise HTTPException(status_code=503, detail="Notification queue is full, retry later")
+        self.calls.append((fn.__name__, args))
+
+@pytest.fixture
+def pipeline(make_notifier, tmp_path):
+    notifier, _ = make_notifier(enable_tdarr=True)
+    event_log = EventLog(str(tmp_path / "events"))
+    event_log.recover()
+    yield Pipeline(notifier, Dispatch(), event_log=event_log)
+    event_log.close()
+
+def handle(pipeline, data):
+    return asyncio.run(pipeline.handle("tdarr", JSONRequest(data)))
+
+def progress(percent):
+    return {"status": "progress", "title": "Movie", "file_path": "/m.mkv", "progress": percent}
+
+def test_progress_step_is_not_sent_while_the_queue_is_full(pipeline):
+    pipeline.dispatch.full = True
+    with pytest.raises(HTTPException):
+        handle(pipeline, progress(30))
+    assert pipeline.event_log.last_seq == 0
+
+    # The sender retries: the step is still due, and only now logged
+    pipeline.dispatch.full = False
+    assert handle(pipeline, progress(30))["message"] == "Tdarr webhook processed"
+    assert [name for name, _ in pipeline.dispatch.calls] == ["notify_progress"]
+    assert pipeline.event_log.last_seq == 1
+    assert handle(pipeline, progress(35))["message"] == "Tdarr progress recorded"
+    assert pipeline.event_log.last_seq == 2
+
+def test_finished_file_is_kept_while_the_queue_is_full(pipeline):
+    handle(pipeline, progress(30))
+    (_, (_, _, _, sequence_id, _, _)), = pipeline.dispatch.calls
+
+    pipeline.dispatch.full = True
+    with pytest.raises(HTTPException):
+        handle(pipeline, {"status": "completed", "title": "Movie", "file_path": "/m.mkv"})
+    assert pipeline.progress.tracked() == 1
+
+    pipeline.dispatch.full = False
+    handle(pipeline, {"status": "completed", "title": "Movie", "file_path": "/m.mkv"})
+    # The completion replaces the progress notification, then the file is forgotten
+    assert pipeline.dispatch.calls[-1][1][-1] == sequence_id
+    assert pipeline.progress.tracked() == 0
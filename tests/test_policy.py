@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from policy import DeferredNotifications, QuietHours, parse_window
+
+def at(hour, minute, second=0):
+    """Local timestamp for a time of day"""
+    return time.mktime((2024, 1, 15, hour, minute, second, 0, 0, -1))
+
+@pytest.mark.parametrize("now, quiet", [
+    (at(21, 59, 59), False),
+    (at(22, 0), True),       # the window starts at its first minute
+    (at(23, 59, 59), True),
+    (at(0, 0), True),        # and wraps past midnight
+    (at(6, 59, 59), True),
+    (at(7, 0), False),       # the end minute is no longer quiet
+    (at(12, 0), False),
+])
+def test_quiet_hours_window_boundaries(now, quiet):
+    quiet_hours = QuietHours.compile("22:00-07:00", "high")
+    assert quiet_hours.is_quiet("media", now) is quiet
+    assert quiet_hours.holds("media", "default", now) is quiet
+
+def test_window_within_one_day():
+    quiet_hours = QuietHours.compile("13:00-14:30", "high")
+    assert [quiet_hours.is_quiet("media", at(*t)) for t in ((12, 59), (13, 0), (14, 29), (14, 30))] == \
+        [False, True, True, False]
+
+@pytest.mark.parametrize("priority, held", [
+    ("min", True), ("low", True), ("default", True), ("high", False), ("urgent", False),
+])
+def test_min_priority_is_delivered_during_quiet_hours(priority, held):
+    quiet_hours = QuietHours.compile("22:00-07:00", "high")
+    assert quiet_hours.holds("media", priority, at(23, 0)) is held
+
+def test_topic_rules_override_the_default():
+    quiet_hours = QuietHours.compile("22:00-07:00", "high", "alerts=off, tv=20:00-08:00@urgent")
+    assert not quiet_hours.holds("alerts", "min", at(23, 0))
+    assert quiet_hours.holds("tv", "high", at(21, 0))
+    assert not quiet_hours.holds("tv", "urgent", at(21, 0))
+    assert not quiet_hours.holds("media", "default", at(21, 0))
+
+def test_no_quiet_hours_configured():
+    assert QuietHours.compile("", "high") is None
+    assert QuietHours.compile("", "high", "alerts=off") is None
+    assert QuietHours.compile("", "high", "tv=22:00-07:00") is not None
+
+@pytest.mark.parametrize("window", ["22:00", "22:00-24:00", "7-8", "24:00-07:00", "aa:bb-cc:dd"])
+def test_invalid_windows_are_rejected(window):
+    with pytest.raises(ValueError):
+        parse_window(window)
+
+@pytest.mark.parametrize("min_priority, topic_rules", [("loud", ""), ("high", "tv"), ("high", "tv=22:00-07:00@loud")])
+def test_invalid_rules_are_rejected(min_priority, topic_rules):
+    with pytest.raises(ValueError):
+        QuietHours.compile("22:00-07:00", min_priority, topic_rules)
+
+class Held:
+    """Stand-in for the NtfyRequest fields DeferredNotifications stores"""
+    def __init__(self, topic, title, message="", priority="default", tags=()):
+        self.topic, self.title, self.message, self.priority, self.tags = topic, title, message, priority, list(tags)
+
+def test_deferred_notifications_are_released_per_topic_when_quiet_hours_end():
+    quiet_hours = QuietHours.compile("22:00-07:00", "high", "alerts=23:00-06:00")
+    deferred = DeferredNotifications(max_per_topic=2)
+    deferred.add(Held("media", "one", priority="low", tags=["sonarr"]))
+    deferred.add(Held("media", "two", tags=["radarr", "sonarr"]))
+    # Past max_per_topic only the count is kept, but the priority and tags still count
+    deferred.add(Held("media", "three", priority="high", tags=["lidarr"]))
+    deferred.add(Held("alerts", "four"))
+    assert deferred.pending() == 4
+
+    assert deferred.take_released(quiet_hours, at(6, 30)) == {"alerts": ([("four", "")], 0, "default", [])}
+    released = deferred.take_released(quiet_hours, at(7, 0))
+    assert released == {"media": ([("one", ""), ("two", "")], 1, "high", ["sonarr", "radarr", "lidarr"])}
+    assert deferred.pending() == 0
@@ -0,0 +1,61 @@
+import time
+
+from events import Event, Source, Status
+from progress import ProgressTracker, sequence_id_for
+
+def progress_event(title="Movie.mkv", source=Source.TDARR):
+    return Event(source, Status.PROGRESS, title, file_path=f"/media/{title}")
+
+def test_updates_are_sent_when_crossing_a_step():
+    tracker = ProgressTracker(step_percent=25, min_interval=300)
+    event = progress_event()
+    sent = [tracker.update(event, percent, now=0.0) is not None for percent in (0, 10, 24.9, 25, 30, 49, 50, 100)]
+    assert sent == [True, False, False, True, False, False, True, True]
+
+def test_unchanged_progress_waits_for_the_interval():
+    tracker = ProgressTracker(step_percent=25, min_interval=300)
+    event = progress_event()
+    assert tracker.update(event, 10, now=0.0) is not None
+    assert tracker.update(event, 12, now=299.0) is None
+    assert tracker.update(event, 12, now=300.0) is not None
+    # Only a change is worth an update once the interval has passed again
+    assert tracker.update(event, 12, now=1000.0) is None
+    assert tracker.update(event, 13, now=1000.0) is not None
+
+def test_progress_going_backwards_does_not_resend_a_step():
+    tracker = ProgressTracker(step_percent=25, min_interval=300)
+    event = progress_event()
+    assert tracker.update(event, 60, now=0.0) is not None
+    assert tracker.update(event, 30, now=1.0) is None
+    assert tracker.update(event, 70, now=2.0) is None
+    assert tracker.update(event, 75, now=3.0) is not None
+
+def test_files_are_tracked_separately_with_stable_sequence_ids():
+    tracker = ProgressTracker()
+    first, second = progress_event("a.mkv"), progress_event("b.mkv")
+    assert tracker.update(first, 0, now=0.0) == sequence_id_for(Source.TDARR, "/media/a.mkv")
+    assert tracker.update(second, 0, now=0.0) == sequence_id_for(Source.TDARR, "/media/b.mkv")
+    assert tracker.tracked() == 2
+
+    assert tracker.finish(first) == sequence_id_for(Source.TDARR, "/media/a.mkv")
+    assert tracker.finish(first) is None
+    assert tracker.tracked() == 1
+
+def test_least_recently_updated_files_are_forgotten_first():
+    tracker = ProgressTracker(max_files=2)
+    events = [progress_event(f"{i}.mkv") for i in range(3)]
+    tracker.update(events[0], 0, now=0.0)
+    tracker.update(events[1], 0, now=0.0)
+    tracker.update(events[0], 10, now=1.0)
+    tracker.update(events[2], 0, now=2.0)
+    assert [row[1] for row in tracker.snapshot()] == ["/media/0.mkv", "/media/2.mkv"]
+
+def test_restored_snapshot_keeps_the_throttling_state():
+    tracker = ProgressTracker(step_percent=25, min_interval=300)
+    event = progress_event()
+    tracker.update(event, 30, now=time.monotonic())
+
+    restored = ProgressTracker(step_percent=25, min_interval=300)
+    restored.restore(tracker.snapshot())
+    assert restored.update(event, 40) is None
+    assert restored.update(event, 50) == sequence_id_for(Source.TDARR, "/media/Movie.mkv")
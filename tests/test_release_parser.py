@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from events import MediaType
+from release_parser import parse_release
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "release_names.tsv")
+
+# Media type accuracy over the labelled names; the known misses are listed in the fixture header
+MIN_ACCURACY = 0.95
+
+def load_release_names(path=FIXTURE):
+    """(media type, season, episode, year, name) rows of the labelled fixture"""
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            media_type, season, episode, year, name = line.rstrip("\n").split("\t")
+            rows.append((media_type, int(season) if season else None, int(episode) if episode else None,
+                         int(year) if year else None, name))
+    return rows
+
+RELEASE_NAMES = load_release_names()
+
+def test_fixture_covers_every_media_type():
+    assert {row[0] for row in RELEASE_NAMES} == {member.value for member in MediaType}
+    assert len(RELEASE_NAMES) >= 2500
+
+def test_media_type_accuracy():
+    misses = [(media_type, parse_release(name).media_type.value, name)
+              for media_type, _, _, _, name in RELEASE_NAMES
+              if parse_release(name).media_type.value != media_type]
+    accuracy = 1 - len(misses) / len(RELEASE_NAMES)
+    assert accuracy >= MIN_ACCURACY, "\n".join(f"expected {a}, got {b}: {name}" for a, b, name in misses)
+
+def test_extraction_matches_labels_when_classified_correctly():
+    wrong = []
+    for media_type, season, episode, year, name in RELEASE_NAMES:
+        info = parse_release(name)
+        if info.media_type.value == media_type and (info.season, info.episode, info.year) != (season, episode, year):
+            wrong.append(f"{name}: expected {(season, episode, year)}, got {(info.season, info.episode, info.year)}")
+    assert not wrong, "\n".join(wrong)
+
+@pytest.mark.parametrize("name, expected", [
+    ("Breaking.Bad.S05E14.Ozymandias.1080p.WEB-DL.DD5.1.H.264-BS", (MediaType.SERIES, 5, 14, None, "1080p")),
+    ("Friends.S10E17E18.The.Last.One.1080p.BluRay.x264-ROVERS", (MediaType.SERIES, 10, 17, None, "1080p")),
+    ("Shogun.2024.S01E01.Anjin.1080p.DSNP.WEB-DL.DDP5.1.H.264-FLUX", (MediaType.SERIES, 1, 1, 2024, "1080p")),
+    ("top_gear.18x01.hdtv.xvid-fov", (MediaType.SERIES, 18, 1, None, None)),
+    ("Mad.Men.S01-S07.COMPLETE.1080p.BluRay.x264-ROVERS", (MediaType.SERIES, 1, None, None, "1080p")),
+    ("Jeopardy.2024.03.05.720p.HDTV.x264-NTb", (MediaType.SERIES, None, None, None, "720p")),
+    ("Blade.Runner.2049.2017.1080p.BluRay.x264-SPARKS", (MediaType.MOVIE, None, None, 2017, "1080p")),
+    ("2001.A.Space.Odyssey.1968.1080p.BluRay.x264-AMIABLE", (MediaType.MOVIE, None, None, 1968, "1080p")),
+    ("Season.of.the.Witch.2011.720p.BluRay.x264-SPARKS", (MediaType.MOVIE, None, None, 2011, "720p")),
+    ("Star.Wars.Episode.IV.A.New.Hope.1977.1080p.BluRay.x264-SADPANDA", (MediaType.MOVIE, None, None, 1977, "1080p")),
+    ("Single.White.Female.1992.1080p.BluRay.x264-AMIABLE", (MediaType.MOVIE, None, None, 1992, "1080p")),
+    ("Dune (2021) [2160p] [4K] [WEB] [5.1] [YTS.MX]", (MediaType.MOVIE, None, None, 2021, "2160p")),
+    ("Metallica-72_Seasons-24BIT-WEB-FLAC-2023-TiMES", (MediaType.MUSIC, None, None, 2023, None)),
+    ("Taylor Swift - 1989 (Taylor's Version) (2023) [MP3 320]", (MediaType.MUSIC, None, None, 2023, None)),
+    ("Pink Floyd - Discography 1967-2014 [FLAC]", (MediaType.MUSIC, None, None, 2014, None)),
+    ("Adobe.Photoshop.2024.v25.0.Multilingual", (MediaType.UNKNOWN, None, None, 2024, None)),
+])
+def test_exact_extraction(name, expected):
+    assert tuple(parse_release(name)) == expected
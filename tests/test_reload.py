@@ -0,0 +1,60 @@
+import dataclasses
+
+import pytest
+
+import main
+from config import check_settings
+from tests.fakes import make_settings
+
+def reload_with(monkeypatch, settings):
+    """Make the next reload read `settings` instead of .env"""
+    monkeypatch.setattr(main, "load_settings", lambda reload_env=False: settings)
+
+@pytest.mark.parametrize("overrides", [
+    {"quiet_hours": "25:00-07:00"},
+    {"quiet_hours_min_priority": "loud"},
+    {"subscriptions_file": "/nonexistent/subscriptions.json"},
+    {"webhook_secrets": "plex"},
+    {"max_body_bytes_per_source": "plex=big"},
+])
+def test_invalid_reload_changes_nothing(make_service, monkeypatch, overrides):
+    client, _ = make_service()
+    with client:
+        before = (main.current_settings, main.notifier.config, main.webhook_auth.secret_for("plex"),
+                  main.body_limits.for_path("/webhook/plex"), main.progress.step)
+        # Settings applied before the invalid one used to be swapped in anyway
+        reload_with(monkeypatch, dataclasses.replace(main.current_settings, progress_step_percent=10,
+                                                     max_body_bytes=5, webhook_secret="new", **overrides))
+        response = client.post("/admin/reload")
+        assert response.status_code == 400
+        assert (main.current_settings, main.notifier.config, main.webhook_auth.secret_for("plex"),
+                main.body_limits.for_path("/webhook/plex"), main.progress.step) == before
+
+def test_valid_reload_applies_everything(make_service, monkeypatch):
+    client, _ = make_service()
+    with client:
+        new = dataclasses.replace(main.current_settings, progress_step_percent=10, webhook_secret="new",
+                                  max_body_bytes_per_source="plex=5", ntfy_topic="other", delivery_workers=9)
+        reload_with(monkeypatch, new)
+        response = client.post("/admin/reload")
+        assert response.status_code == 200
+        assert response.json()["restart_required"] == ["delivery_workers"]
+        assert main.current_settings is new
+        assert main.notifier.config.default_topic == "other"
+        assert main.webhook_auth.secret_for("plex") == b"new"
+        assert main.body_limits.for_path("/webhook/plex") == 5
+        assert main.progress.step == 10
+
+@pytest.mark.parametrize("name, value", [
+    ("storm_window_seconds", 0),
+    ("ntfy_timeout", -1),
+    ("ntfy_max_concurrent_sends", 0),
+    ("max_body_bytes", -1),
+    ("progress_min_interval", float("nan")),
+])
+def test_check_settings_rejects_out_of_range_values(name, value):
+    with pytest.raises(ValueError, match=name.upper()):
+        check_settings(make_settings(**{name: value}))
+
+def test_check_settings_accepts_defaults():
+    check_settings(make_settings())
@@ -0,0 +1,139 @@
+"""
+Restarts the service while webhooks are arriving and checks that no accepted notification is lost.
+
+The service runs as a real process against a local fake ntfy server that answers slowly.
+Webhooks are fired from several threads and SIGTERM is sent while they are still arriving,
+with a drain deadline short enough that part of the queue is left over for the outbox. After
+a restart every webhook the service accepted (200) must reach ntfy at least once; rejected
+ones (connection refused once shutdown starts) are the sender's to retry and are not counted.
+"""
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from tests.fakes import FakeNtfy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WEBHOOKS = 200
+SENDERS = 8
+NTFY_DELAY = 0.05
+DRAIN_SECONDS = 0.5
+REPLAY_TIMEOUT = 60.0
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="needs POSIX signals")
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _start(env, cwd, timeout=30.0):
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py")], cwd=cwd, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{env['PORT']}/health/live"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=0.5):
+                return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with {process.returncode}")
+            time.sleep(0.02)
+    process.kill()
+    raise RuntimeError(f"Server did not start within {timeout}s")
+
+def _post_webhook(base, marker):
+    payload = json.dumps({"eventType": "Grab", "movie": {"title": marker, "year": 2024}}).encode()
+    request = urllib.request.Request(f"{base}/webhook/radarr", data=payload,
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+@pytest.fixture
+def ntfy():
+    server = FakeNtfy(NTFY_DELAY)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+def test_restart_under_load_loses_no_notifications(tmp_path, ntfy):
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        "ENABLE_FILE_LOGGING": "False",
+        "LOG_LEVEL": "WARNING",
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "NTFY_SERVER": ntfy.url,
+        "NTFY_TOKEN": "",
+        "NTFY_USER": "",
+        "NTFY_PASS": "",
+        "QUIET_HOURS": "",
+        "SUBSCRIPTIONS_FILE": "",
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'restart.db'}",
+        "EVENT_LOG_DIR": str(tmp_path / "events"),
+        "SHUTDOWN_DRAIN_SECONDS": str(DRAIN_SECONDS),
+        # Replay the outbox at full speed rather than the default 5/s
+        "OUTBOX_RESEND_RATE": "0",
+        "ADMIN_TOKEN": "",
+        "WEBHOOK_SECRET": "",
+        "WEBHOOK_SECRETS": "",
+    })
+    base = f"http://127.0.0.1:{port}"
+    process = _start(env, tmp_path)
+
+    accepted, rejected = [], []
+    results_lock = threading.Lock()
+    next_index = iter(range(WEBHOOKS))
+
+    def sender():
+        for i in next_index:
+            marker = f"Restart Check {os.getpid()}-{i}"
+            status = _post_webhook(base, marker)
+            with results_lock:
+                (accepted if status == 200 else rejected).append(marker)
+
+    senders = [threading.Thread(target=sender) for _ in range(SENDERS)]
+    try:
+        for thread in senders:
+            thread.start()
+        # Stop the service once about half the webhooks are in
+        while len(accepted) + len(rejected) < WEBHOOKS // 2:
+            time.sleep(0.005)
+        process.send_signal(signal.SIGTERM)
+        for thread in senders:
+            thread.join()
+        assert process.wait(timeout=30) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+    assert accepted
+
+    process = _start(env, tmp_path)
+    try:
+        deadline = time.monotonic() + REPLAY_TIMEOUT
+        missing = accepted
+        while missing and time.monotonic() < deadline:
+            time.sleep(0.2)
+            missing = [marker for marker in accepted if not ntfy.seen(marker)]
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    assert not missing, f"{len(missing)} of {len(accepted)} accepted notifications never reached ntfy"
@@ -0,0 +1,99 @@
+import base64
+import hashlib
+import hmac
+import json
+
+import pytest
+
+from config import load_settings
+from security import RateLimiter, WebhookAuth
+
+TEST_EVENT = json.dumps({"eventType": "Test"}).encode()
+
+def signature(secret, body):
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+def basic(username, password):
+    return "Basic " + base64.b64encode(f"{username}:{password}".encode()).decode()
+
+def test_webhooks_need_no_secret_when_none_is_configured(make_service):
+    client, _ = make_service(webhook_secret="", webhook_secrets="")
+    with client:
+        assert client.post("/webhook/sonarr", content=TEST_EVENT).status_code == 200
+
+@pytest.mark.parametrize("headers, params", [
+    ({"X-Webhook-Secret": "s3cret"}, {}),
+    ({"Authorization": "Bearer s3cret"}, {}),
+    ({"Authorization": basic("sonarr", "s3cret")}, {}),
+    ({}, {"token": "s3cret"}),
+    ({"X-Signature-256": signature("s3cret", TEST_EVENT)}, {}),
+])
+def test_webhook_accepts_the_secret_in_any_supported_form(make_service, headers, params):
+    client, _ = make_service(webhook_secret="s3cret")
+    with client:
+        response = client.post("/webhook/sonarr", content=TEST_EVENT, headers=headers, params=params)
+    assert response.status_code == 200
+
+@pytest.mark.parametrize("headers, params", [
+    ({}, {}),
+    ({"X-Webhook-Secret": "wrong"}, {}),
+    ({"Authorization": "Bearer wrong"}, {}),
+    ({"Authorization": basic("s3cret", "wrong")}, {}),
+    ({"Authorization": "Basic not-base64!"}, {}),
+    ({}, {"token": "wrong"}),
+    # The signature must match this body; a signature header also means the token isn't checked
+    ({"X-Signature-256": signature("s3cret", b"{}")}, {}),
+    ({"X-Signature-256": signature("wrong", TEST_EVENT)}, {}),
+    ({"X-Signature-256": "sha256=", "X-Webhook-Secret": "s3cret"}, {}),
+])
+def test_webhook_rejects_a_missing_or_wrong_secret(make_service, headers, params):
+    import main
+    client, _ = make_service(webhook_secret="s3cret")
+    with client:
+        response = client.post("/webhook/sonarr", content=TEST_EVENT, headers=headers, params=params)
+    assert response.status_code == 401
+    assert main.auth_failures == 1
+
+def test_per_source_secrets_override_the_default(make_service):
+    client, _ = make_service(webhook_secret="default", webhook_secrets="plex=plex-secret, radarr=radarr-secret")
+    with client:
+        assert client.post("/webhook/radarr", content=TEST_EVENT, params={"token": "default"}).status_code == 401
+        assert client.post("/webhook/radarr", content=TEST_EVENT, params={"token": "radarr-secret"}).status_code == 200
+        assert client.post("/webhook/sonarr", content=TEST_EVENT, params={"token": "default"}).status_code == 200
+
+@pytest.mark.parametrize("rules", ["plex", "plex=", "plex= ,sonarr=x"])
+def test_invalid_per_source_secrets_are_rejected(rules):
+    with pytest.raises(ValueError):
+        WebhookAuth.parse("", rules)
+
+def test_unknown_webhook_paths_count_against_the_rate_limit(make_service):
+    client, _ = make_service(webhook_rate_limit=3)
+    with client:
+        statuses = [client.post(f"/webhook/probe{i}").status_code for i in range(5)]
+    assert statuses == [404, 404, 404, 429, 429]
+
+def test_rate_limiter_allows_up_to_the_limit_per_client():
+    limiter = RateLimiter(limit=3, window_seconds=60)
+    assert [limiter.allow("10.0.0.1", now=1000.0) for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("10.0.0.2", now=1000.0)
+    assert limiter.rejected_total == 1
+
+def test_rate_limiter_weights_the_previous_window():
+    limiter = RateLimiter(limit=4, window_seconds=60)
+    for _ in range(4):
+        assert limiter.allow("10.0.0.1", now=1199.0)
+    # A quarter into the next window, 3 of the 4 earlier requests still count
+    assert limiter.allow("10.0.0.1", now=1215.0)
+    assert not limiter.allow("10.0.0.1", now=1215.0)
+    # Two windows later they no longer count
+    assert limiter.allow("10.0.0.1", now=1345.0)
+
+@pytest.mark.parametrize("window", [0, -1, float("nan")])
+def test_rate_limiter_rejects_non_positive_windows(window):
+    with pytest.raises(ValueError):
+        RateLimiter(limit=10, window_seconds=window)
+
+def test_zero_rate_window_is_rejected_by_load_settings(monkeypatch):
+    monkeypatch.setenv("WEBHOOK_RATE_WINDOW", "0")
+    with pytest.raises(ValueError, match="WEBHOOK_RATE_WINDOW"):
+        load_settings()
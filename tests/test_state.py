@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+
+from events import Source, Status, Event
+from state import MemoryState, SQLiteState, RedisState, create_state
+from suppression import StormSuppressor
+from tests.fakes import FakeRedis
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_state(request, tmp_path):
+    """Factory for the backend under test; calls share one store, like instances sharing a backend"""
+    redis = FakeRedis()
+    created = []
+
+    def make():
+        if request.param == "memory":
+            # Memory state can't be shared, so every "instance" gets the same object
+            state = created[0] if created else MemoryState()
+        elif request.param == "sqlite":
+            state = SQLiteState(f"sqlite:///{tmp_path / 'state.db'}")
+        else:
+            state = RedisState("redis://unused", client=redis)
+        created.append(state)
+        return state
+    yield make
+    for state in set(created):
+        state.close()
+
+def test_incr_get_pop(make_state):
+    state = make_state()
+    assert state.incr("a") == 1
+    assert state.incr("a", 5) == 6
+    assert state.get("a") == 6
+    assert state.get("missing") == 0
+    assert state.incr("b", 7, ttl=60) == 7
+    assert state.get("b") == 7
+    assert state.pop("b") == 7
+    assert state.pop("b") == 0
+    assert state.get("b") == 0
+
+def test_keys_expire_after_their_ttl(make_state):
+    state = make_state()
+    assert state.incr("short", ttl=0.05) == 1
+    time.sleep(0.1)
+    assert state.get("short") == 0
+    assert state.pop("short") == 0
+    # An expired key starts again from zero
+    assert state.incr("short", ttl=0.05) == 1
+
+def test_ttl_is_not_extended_by_later_writes(make_state):
+    state = make_state()
+    state.incr("counter", ttl=0.2)
+    time.sleep(0.12)
+    state.incr("counter", ttl=0.2)
+    time.sleep(0.12)
+    assert state.get("counter") == 0
+
+def test_concurrent_increments_are_not_lost(make_state):
+    instances = [make_state() for _ in range(4)]
+
+    def worker(state):
+        for _ in range(100):
+            state.incr("shared", ttl=60)
+    threads = [threading.Thread(target=worker, args=(state,)) for state in instances]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert instances[0].get("shared") == 400
+
+def test_pop_reports_each_value_once(make_state):
+    first, second = make_state(), make_state()
+    first.incr("suppressed", 3, ttl=60)
+    assert sorted([first.pop("suppressed"), second.pop("suppressed")]) == [0, 3]
+
+def test_instances_sharing_a_backend_see_one_storm(make_state):
+    event = Event(Source.SONARR, Status.DOWNLOAD_FAILED, "Breaking Bad", "/tv/bb.mkv")
+    suppressors = [StormSuppressor(None, None, make_state(), threshold=3, window_seconds=60) for _ in range(2)]
+    key = f"storm:{event.source}:{event.file_path}:{event.status}"
+    storming = [suppressors[i % 2]._count(key) for i in range(5)]
+    # Three events across both instances reach the threshold
+    assert storming == [False, False, False, True, True]
+    assert suppressors[0].state.pop(f"{key}:suppressed") == 2
+
+def test_create_state_rejects_unknown_backends():
+    with pytest.raises(ValueError):
+        create_state("memcached")
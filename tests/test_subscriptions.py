@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from events import MediaInfo, MediaType
+from subscriptions import SubscriptionMatcher, title_keys
+
+RULES = [
+    {"topic": "tv", "media_type": "series"},
+    {"topic": "alice", "title": ["Breaking Bad", "  the   OFFICE "]},
+    {"topic": "admin", "min_priority": "high"},
+    {"topic": "failures", "status": ["download_failed", "import_failed"], "source": "sonarr"},
+    {"topic": "tv", "source": "plex"},
+]
+
+@pytest.fixture
+def matcher():
+    return SubscriptionMatcher.compile(RULES)
+
+def test_matching_rules_in_rule_order_without_duplicates(matcher):
+    assert matcher.match(source="plex", media_type="series", titles={"the office"}) == ["tv", "alice"]
+
+def test_min_priority(matcher):
+    assert matcher.match(source="radarr", priority="default") == []
+    assert matcher.match(source="radarr", priority="high") == ["admin"]
+    assert matcher.match(source="radarr", priority="urgent") == ["admin"]
+
+def test_every_constrained_field_has_to_match(matcher):
+    assert matcher.match(source="sonarr", status="download_failed") == ["failures"]
+    assert matcher.match(source="radarr", status="download_failed") == []
+    assert matcher.match(source="SONARR", status="Import_Failed") == ["failures"]
+
+def test_unknown_values_only_match_rules_without_that_condition(matcher):
+    assert matcher.match(titles={"breaking bad"}) == ["alice"]
+    assert matcher.match(media_type=None, priority="urgent") == ["admin"]
+
+def test_title_keys():
+    assert title_keys("Breaking Bad - Ozymandias") == {"breaking bad - ozymandias", "breaking bad"}
+    assert title_keys("Pilot", MediaInfo(media_type=MediaType.SERIES, series_title="The  Office")) == \
+        {"pilot", "the office"}
+    assert title_keys("", MediaInfo(media_type=MediaType.MUSIC, artist="Radiohead", album="OK Computer")) == \
+        {"radiohead", "ok computer"}
+
+def test_no_rules():
+    assert SubscriptionMatcher.compile([]) is None
+
+def test_many_rules():
+    rules = [{"topic": f"user{i}", "title": f"Show {i}"} for i in range(500)]
+    matcher = SubscriptionMatcher.compile(rules)
+    assert matcher.match(titles={"show 7", "show 499"}) == ["user7", "user499"]
+
+@pytest.mark.parametrize("rules", [
+    {"topic": "tv"},
+    ["tv"],
+    [{"media_type": "series"}],
+    [{"topic": "bad topic!"}],
+    [{"topic": "tv", "colour": "red"}],
+    [{"topic": "tv", "media_type": "podcast"}],
+    [{"topic": "tv", "title": ""}],
+    [{"topic": "tv", "min_priority": "loud"}],
+])
+def test_invalid_rules_are_rejected(rules):
+    with pytest.raises(ValueError):
+        SubscriptionMatcher.compile(rules)
+
+def test_load_from_file(tmp_path):
+    path = tmp_path / "subscriptions.json"
+    path.write_text(json.dumps(RULES))
+    assert SubscriptionMatcher.load(str(path)).rule_count == len(RULES)
+    path.write_text("[{")
+    with pytest.raises(ValueError, match="Could not read"):
+        SubscriptionMatcher.load(str(path))
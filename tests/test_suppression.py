@@ -0,0 +1,86 @@
+import asyncio
+
+from fastapi import HTTPException
+
+from events import Event, Source, Status
+from state import MemoryState
+from suppression import StormSuppressor
+
+EVENT = Event(Source.SONARR, Status.DOWNLOAD_FAILED, "Breaking Bad", "/tv/bb.mkv")
+
+class Dispatched:
+    """Records dispatch(fn, *args) calls instead of queueing them; the next `rejects` calls get a 503 (queue full)"""
+    def __init__(self):
+        self.calls = []
+        self.rejects = 0
+
+    def __call__(self, fn, *args):
+        if self.rejects:
+            self.rejects -= 1
+            raise HTTPException(status_code=503, detail="Notification queue is full, retry later")
+        self.calls.append(args)
+
+def make_suppressor(**kwargs):
+    dispatch = Dispatched()
+    notifier = type("Notifier", (), {"send_notification": None})()
+    return StormSuppressor(notifier, dispatch, MemoryState(), **kwargs), dispatch
+
+def allow_all(suppressor, events):
+    async def run():
+        return [await suppressor.allow(event) for event in events]
+    return asyncio.run(run())
+
+def test_repeats_past_the_threshold_are_suppressed():
+    suppressor, _ = make_suppressor(threshold=3, window_seconds=60)
+    assert allow_all(suppressor, [EVENT] * 5) == [True, True, True, False, False]
+    assert suppressor.suppressed_total == 2
+
+def test_other_media_and_statuses_are_counted_separately():
+    suppressor, _ = make_suppressor(threshold=1, window_seconds=60)
+    other_title = EVENT._replace(title="The Wire", file_path=None)
+    other_status = EVENT._replace(status=Status.IMPORT_COMPLETE)
+    assert allow_all(suppressor, [EVENT, other_title, other_status, EVENT]) == [True, True, True, False]
+
+def test_zero_threshold_disables_suppression():
+    suppressor, _ = make_suppressor(threshold=0)
+    assert all(allow_all(suppressor, [EVENT] * 20))
+
+def test_one_summary_per_storming_key():
+    suppressor, dispatch = make_suppressor(threshold=2, window_seconds=60)
+    allow_all(suppressor, [EVENT] * 5)
+    pending, suppressor._suppressed = suppressor._suppressed, {}
+    suppressor._send_summaries(pending)
+    (args,) = dispatch.calls
+    assert args[:4] == ("Sonarr Repeats Suppressed",
+                        "Breaking Bad: 3 repeated 'download_failed' notifications suppressed",
+                        "default", ["sonarr", "storm"])
+
+    # Nothing new was suppressed, so nothing more is reported
+    suppressor._send_summaries(pending)
+    assert len(dispatch.calls) == 1
+
+def test_keys_past_max_keys_are_delivered_instead_of_tracked():
+    suppressor, _ = make_suppressor(threshold=1, window_seconds=60, max_keys=1)
+    other = EVENT._replace(title="The Wire", file_path=None)
+    assert allow_all(suppressor, [EVENT, EVENT, other, other]) == [True, False, True, True]
+
+def test_summaries_rejected_by_a_full_queue_are_sent_with_the_next_flush():
+    suppressor, dispatch = make_suppressor(threshold=1, window_seconds=60, summary_interval=0.1)
+    other = EVENT._replace(title="The Wire", file_path=None)
+    dispatch.rejects = 1
+
+    async def run():
+        for event in (EVENT, EVENT, EVENT, other, other):
+            await suppressor.allow(event)
+        suppressor.start()
+        # First flush: one summary rejected, the other still sent; second flush: the rejected one
+        await asyncio.sleep(0.15)
+        sent_first = len(dispatch.calls)
+        await asyncio.sleep(0.1)
+        suppressor.stop()
+        return sent_first
+    assert asyncio.run(run()) == 1
+    assert sorted(args[1] for args in dispatch.calls) == [
+        "Breaking Bad: 2 repeated 'download_failed' notifications suppressed",
+        "The Wire: 1 repeated 'download_failed' notifications suppressed",
+    ]
@@ -0,0 +1,51 @@
+from hypothesis import given, settings, strategies as st
+
+from events import MediaInfo, MediaType
+from notifier import Notifier
+from tests.fakes import RecordingSession, make_settings
+
+# One notifier for every example: format_media_title only reads its arguments
+NOTIFIER = Notifier(make_settings(), session=RecordingSession())
+
+titles = st.text(st.characters(blacklist_categories=("Cs",)), min_size=1, max_size=120)
+max_lengths = st.integers(min_value=20, max_value=80)
+
+@given(titles, max_lengths)
+def test_plain_title_fits(title, max_length):
+    result = NOTIFIER.format_media_title(title, None, max_length)
+    assert len(result) <= max_length
+    if len(title) <= max_length:
+        assert result == title
+    else:
+        assert result == title[:max_length - 3] + "..."
+
+@given(titles, st.integers(min_value=1000, max_value=9999), max_lengths)
+def test_movie_keeps_its_year(title, year, max_length):
+    result = NOTIFIER.format_media_title(title, MediaInfo(media_type=MediaType.MOVIE, year=year), max_length)
+    assert result.endswith(f" ({year})")
+    assert len(result) <= max_length
+
+@given(titles, st.integers(min_value=0, max_value=99), st.integers(min_value=0, max_value=999), max_lengths)
+def test_episode_keeps_season_and_episode(title, season, episode, max_length):
+    metadata = MediaInfo(media_type=MediaType.SERIES, season=season, episode=episode)
+    result = NOTIFIER.format_media_title(title, metadata, max_length)
+    assert result.rstrip().endswith(f" S{season:02d}E{episode:02d}")
+    # Four trailing spaces offset the title on the phone; they don't count against the limit
+    assert len(result) - 4 <= max_length
+
+@given(titles, st.sampled_from(["Radiohead", "Daft Punk", "Sigur Rós"]),
+       st.sampled_from(["OK Computer", "Discovery", "( )"]), max_lengths)
+def test_music_keeps_the_artist(title, artist, album, max_length):
+    result = NOTIFIER.format_media_title(title, MediaInfo(media_type=MediaType.MUSIC, artist=artist, album=album),
+                                         max_length)
+    assert len(result) <= max_length
+    if not (artist.lower() in title.lower() and album.lower() in title.lower()):
+        assert result.startswith(f"{artist} - ")
+
+@settings(max_examples=200)
+@given(titles, st.sampled_from(["Radiohead", "Daft Punk", "Sigur Rós"]), max_lengths)
+def test_music_without_album_keeps_the_artist(title, artist, max_length):
+    result = NOTIFIER.format_media_title(title, MediaInfo(media_type=MediaType.MUSIC, artist=artist), max_length)
+    assert len(result) <= max_length
+    if artist.lower() not in title.lower():
+        assert result.startswith(artist)